@@ -0,0 +1,83 @@
+"""
+Measure how fast readings are packed into the data and timestamps of Events.
+
+Run this from the root of the repository:
+
+    $ python benchmarks/bench_event_builder.py --fields 500
+
+The readings mix Python floats, numpy scalars and numpy arrays. The
+previous implementation of RunEngine._save is reproduced here for
+comparison.
+
+With keep_arrays, arrays of at least _KEEP_ARRAYS_MIN_SIZE elements are kept
+as read-only views, and smaller ones are converted to lists because that is
+faster. Vary --array-size around that size to see where keeping them pays
+off:
+
+    $ python benchmarks/bench_event_builder.py --array-size 1000
+"""
+import argparse
+import time as ttime
+import timeit
+import numpy as np
+from bluesky.run_engine import (_rearrange_into_parallel_dicts,
+                                _KEEP_ARRAYS_MIN_SIZE)
+
+
+def _old_sanitize_np(val):
+    if isinstance(val, np.generic):
+        if np.isscalar(val):
+            return val.item()
+        return val.tolist()
+    return val
+
+
+def old_builder(read_cache):
+    readings = {k: v for d in read_cache for k, v in d.items()}
+    for key in readings:
+        readings[key]['value'] = _old_sanitize_np(readings[key]['value'])
+    data = {}
+    timestamps = {}
+    for key, payload in readings.items():
+        data[key] = payload['value']
+        timestamps[key] = payload['timestamp']
+    return data, timestamps
+
+
+def make_read_cache(num_fields, array_size=10, num_objs=10):
+    now = ttime.time()
+    values = [1.5, np.float64(1.5), np.arange(array_size)]
+    read_cache = [{} for _ in range(num_objs)]
+    for i in range(num_fields):
+        read_cache[i % num_objs]['field{}'.format(i)] = {
+            'value': values[i % len(values)], 'timestamp': now}
+    return read_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fields', type=int, default=500,
+                        help='number of fields per Event')
+    parser.add_argument('--num', type=int, default=1000,
+                        help='number of Events per repeat')
+    parser.add_argument('--array-size', type=int, default=10,
+                        help='number of elements in each array reading')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    read_cache = make_read_cache(args.fields, args.array_size)
+    print('arrays of {} elements; keep_arrays keeps arrays of at least {}'
+          .format(args.array_size, _KEEP_ARRAYS_MIN_SIZE))
+    builders = [
+        ('previous', lambda: old_builder(read_cache)),
+        ('single pass', lambda: _rearrange_into_parallel_dicts(read_cache)),
+        ('single pass, keep_arrays',
+         lambda: _rearrange_into_parallel_dicts(read_cache, True))]
+    for name, func in builders:
+        best = min(timeit.repeat(func, number=args.num, repeat=args.repeat))
+        print('{0:>25}: {1:.1f} us per Event'.format(name,
+                                                     1e6 * best / args.num))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compare inserting Events into metadatastore one at a time and in batches.
+
+Run this from the root of the repository:
+
+    $ python benchmarks/bench_register_mds.py
+
+A real database is not needed: an in-memory fake of the metadatastore API
+stands in for it, and each call to it sleeps for --latency seconds to mimic
+a round trip to the server.
+"""
+import argparse
+import sys
+import time as ttime
+import types
+from bluesky import Msg
+from bluesky.examples import Reader, Mover
+from bluesky.tests.utils import setup_test_run_engine
+
+
+class FakeMDS:
+    "Keep documents in lists, taking latency seconds per call."
+    def __init__(self, latency):
+        self.latency = latency
+        self.events = []
+        self.run_starts = []
+        self.descriptors = []
+        self.run_stops = []
+
+    def insert_event(self, **doc):
+        ttime.sleep(self.latency)
+        self.events.append(doc)
+
+    def bulk_insert_events(self, descriptor, events):
+        ttime.sleep(self.latency)
+        self.events.extend(events)
+
+    def insert_run_start(self, **doc):
+        ttime.sleep(self.latency)
+        self.run_starts.append(doc)
+
+    def insert_descriptor(self, **doc):
+        ttime.sleep(self.latency)
+        self.descriptors.append(doc)
+
+    def insert_run_stop(self, **doc):
+        ttime.sleep(self.latency)
+        self.run_stops.append(doc)
+
+
+def install_fake_mds(fake):
+    "Make 'import metadatastore' import the fake instead."
+    api = types.ModuleType('metadatastore.api')
+    commands = types.ModuleType('metadatastore.commands')
+    for name in ['insert_event', 'insert_run_start', 'insert_descriptor',
+                 'insert_run_stop']:
+        setattr(api, name, getattr(fake, name))
+    commands.bulk_insert_events = fake.bulk_insert_events
+    package = types.ModuleType('metadatastore')
+    package.api = api
+    package.commands = commands
+    sys.modules.update({'metadatastore': package,
+                        'metadatastore.api': api,
+                        'metadatastore.commands': commands})
+
+
+def step_plan(det, motor, num):
+    yield Msg('open_run')
+    for i in range(num):
+        yield Msg('set', motor, i)
+        yield Msg('create')
+        yield Msg('read', motor)
+        yield Msg('read', det)
+        yield Msg('save')
+    yield Msg('close_run')
+
+
+def run(register, num):
+    RE = setup_test_run_engine()
+    register(RE)
+    det = Reader('det', ['det'])
+    motor = Mover('motor', ['motor'])
+    start = ttime.perf_counter()
+    RE(step_plan(det, motor, num))
+    return ttime.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num', type=int, default=1000,
+                        help='number of Events in the run')
+    parser.add_argument('--latency', type=float, default=0.001,
+                        help='seconds per call to the fake metadatastore')
+    args = parser.parse_args()
+
+    fake = FakeMDS(args.latency)
+    install_fake_mds(fake)
+    from bluesky.register_mds import register_mds, insert_funcs
+
+    def register_unbuffered(RE):
+        for name, func in insert_funcs.items():
+            RE._register_scan_callback(name, func)
+
+    for label, register in [('one at a time', register_unbuffered),
+                            ('batched', register_mds)]:
+        del fake.events[:]
+        elapsed = run(register, args.num)
+        assert len(fake.events) == args.num
+        print('{0:>14}: {1} Events in {2:.3f} s'.format(label, args.num,
+                                                       elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measure RunEngine message throughput.
+
+Run this from the root of the repository:
+
+    $ python benchmarks/bench_run_engine.py
+
+The plan mimics a fast step scan: each point is a checkpoint, a move, and a
+create/read/save bundle, so every message is cheap and the throughput is
+bounded by the overhead of the RunEngine itself.
+"""
+import argparse
+import time as ttime
+from bluesky import Msg
+from bluesky.examples import Reader, Mover
+from bluesky.tests.utils import setup_test_run_engine
+
+
+def step_plan(det, motor, num):
+    yield Msg('open_run')
+    for i in range(num):
+        yield Msg('checkpoint')
+        yield Msg('set', motor, i)
+        yield Msg('create')
+        yield Msg('read', motor)
+        yield Msg('read', det)
+        yield Msg('save')
+    yield Msg('close_run')
+
+
+def messages_per_second(RE, num):
+    det = Reader('det', ['det'])
+    motor = Mover('motor', ['motor'])
+    msgs = list(step_plan(det, motor, num))
+    start = ttime.perf_counter()
+    RE(msgs)
+    elapsed = ttime.perf_counter() - start
+    return len(msgs) / elapsed, len(msgs), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num', type=int, default=5000,
+                        help='number of points in the step scan')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--validation', default='full',
+                        choices=['full', 'sampled', 'off'],
+                        help='document schema validation mode')
+    args = parser.parse_args()
+
+    RE = setup_test_run_engine()
+    RE.validation = args.validation
+    for i in range(args.repeat):
+        rate, num_msgs, elapsed = messages_per_second(RE, args.num)
+        print('{0} messages in {1:.3f} s: {2:.0f} messages/s'
+              ''.format(num_msgs, elapsed, rate))
+
+
+if __name__ == '__main__':
+    main()
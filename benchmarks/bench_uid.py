@@ -0,0 +1,30 @@
+"""
+Compare the speed of the unique id generators for documents.
+
+Run this from the root of the repository:
+
+    $ python benchmarks/bench_uid.py
+"""
+import argparse
+import timeit
+from bluesky.run_engine import new_uid, SequentialUIDFactory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num', type=int, default=100000,
+                        help='number of ids per repeat')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    factories = [('new_uid', new_uid),
+                 ('SequentialUIDFactory', SequentialUIDFactory())]
+    for name, factory in factories:
+        best = min(timeit.repeat(factory, number=args.num,
+                                 repeat=args.repeat))
+        print('{0:>22}: {1:.3f} us per id'.format(name,
+                                                  1e6 * best / args.num))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,14 @@
 """
 Useful callbacks for the Run Engine
 """
+import asyncio
 import sys
+import threading
+import time as ttime
+import tempfile
 from itertools import count
-from collections import deque
+from collections import deque, OrderedDict
+from weakref import WeakKeyDictionary
 import warnings
 from prettytable import PrettyTable
 
@@ -11,6 +16,7 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from datetime import datetime
 import numpy as np
+from .utils import unpack_event_page
 
 import logging
 logger = logging.getLogger(__name__)
@@ -30,6 +36,11 @@ class CallbackBase(object):
     def bulk_events(self, doc):
         logger.debug("CallbackBase: I'm an event with a big doc")
 
+    def event_page(self, doc):
+        "Unpack the page and pass each Event to the event method."
+        for event in unpack_event_page(doc):
+            self.event(event)
+
     def descriptor(self, doc):
         logger.debug("CallbackBase: I'm a descriptor with doc = %r", doc)
 
@@ -84,6 +95,154 @@ def collector(field, output):
     return f
 
 
+class _GrowableArray:
+    """
+    A numpy array that rows can be appended to in amortized constant time
+
+    Parameters
+    ----------
+    shape : tuple, optional
+        the shape of each row; by default, rows are scalars
+    capacity : int, optional
+        the number of rows to preallocate; it doubles when it runs out
+    dtype : numpy dtype, optional
+        float by default
+    spill_threshold : int, optional
+        If not None, an array larger than this many bytes is kept in a
+        temporary memory-mapped file instead of in memory. Object arrays are
+        always kept in memory.
+    """
+    def __init__(self, shape=(), capacity=64, dtype=float,
+                 spill_threshold=None):
+        self.spill_threshold = spill_threshold
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype)
+        self._array = self._allocate(capacity)
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def data(self):
+        "A view of the rows appended so far"
+        return self._array[:self._len]
+
+    def _allocate(self, capacity):
+        shape = (capacity,) + self._shape
+        if (self.spill_threshold is not None and
+                self._dtype != np.dtype(object) and
+                int(np.prod(shape)) * self._dtype.itemsize >
+                self.spill_threshold):
+            return np.memmap(tempfile.TemporaryFile(), dtype=self._dtype,
+                             mode='w+', shape=shape)
+        return np.empty(shape, dtype=self._dtype)
+
+    def to_objects(self):
+        "Hold each row as one Python object, from now on."
+        rows = list(np.array(self.data))
+        self._dtype = np.dtype(object)
+        self._shape = ()
+        self._array = self._allocate(len(self._array))
+        self._len = 0
+        self.extend(rows)
+
+    def extend(self, rows):
+        if self._dtype == np.dtype(object) and not self._shape:
+            # Keep each row whole, even if it is a sequence.
+            objs = np.empty(len(rows), dtype=object)
+            for i, row in enumerate(rows):
+                objs[i] = row
+            rows = objs
+        else:
+            rows = np.asarray(rows)
+            if not np.can_cast(rows.dtype, self._dtype, 'same_kind'):
+                raise TypeError("Cannot append {0} to an array of {1}"
+                                "".format(rows.dtype, self._dtype))
+        new_len = self._len + len(rows)
+        if new_len > len(self._array):
+            capacity = max(new_len, 2 * len(self._array))
+            array = self._allocate(capacity)
+            array[:self._len] = self.data
+            self._array = array
+        self._array[self._len:new_len] = rows
+        self._len = new_len
+
+    def append(self, row):
+        self.extend([row])
+
+
+class _RedrawThrottle:
+    """
+    Coalesce requests to redraw into at most max_fps redraws per second.
+
+    A request that comes too soon after the last redraw is deferred. A
+    timer on the event loop performs it when the interval is up, unless
+    another request or flush gets there first. Redraws happen on the main
+    thread, where the event loop runs. Requests and flushes from other
+    threads, such as the Dispatcher's worker thread that processes Events
+    by default, are handed over to the event loop.
+
+    Parameters
+    ----------
+    redraw : callable
+        expects no arguments
+    max_fps : float or None
+        If None, redraw on every request.
+    loop : asyncio event loop, optional
+        defaults to ``asyncio.get_event_loop()``
+    """
+    def __init__(self, redraw, max_fps, loop=None):
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self.redraw = redraw
+        self.min_interval = 1 / max_fps if max_fps else 0
+        self.pending = False
+        self._last_redraw = -np.inf
+        self._loop = loop
+        self._timer = None  # handle of the deferred redraw, if scheduled
+        self._handed_over = False  # if a request is waiting for the loop
+
+    def request(self):
+        if threading.current_thread() is not threading.main_thread():
+            # Coalesce requests until the loop gets to them.
+            if not self._handed_over:
+                self._handed_over = True
+                self._loop.call_soon_threadsafe(self._handed_over_request)
+            return
+        wait = self._last_redraw + self.min_interval - ttime.time()
+        if wait > 0:
+            self.pending = True
+            if self._timer is None:
+                self._timer = self._loop.call_later(wait, self.flush)
+            return
+        self._redraw()
+
+    def _handed_over_request(self):
+        # Reset first, so a request arriving during the redraw is not lost.
+        self._handed_over = False
+        self.request()
+
+    def flush(self):
+        "Perform a deferred redraw, if there is one."
+        if threading.current_thread() is not threading.main_thread():
+            self._loop.call_soon_threadsafe(self.flush)
+            return
+        if self._handed_over:
+            self._handed_over = False
+            self.pending = True
+        if self.pending:
+            self._redraw()
+
+    def _redraw(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_redraw = ttime.time()
+        self.pending = False
+        self.redraw()
+
+
 class LivePlot(CallbackBase):
     """
     Build a function that updates a plot from a stream of Events.
@@ -91,6 +250,11 @@ class LivePlot(CallbackBase):
     Note: If your figure blocks the main thread when you are trying to
     scan with this callback, call `plt.ion()` in your IPython session.
 
+    The plot is redrawn at most max_fps times per second, and at the end of
+    the run. When new points fit within the data seen so far, which leaves
+    the axes limits unchanged, only the line is redrawn (if the canvas
+    supports blitting and no other LivePlot is updating the same axes).
+
     Parameters
     ----------
     y : str
@@ -106,6 +270,8 @@ class LivePlot(CallbackBase):
         passed to Axes.set_xlim
     ylim : tuple
         passed to Axes.set_ylim
+    max_fps : float, optional
+        maximum number of redraws per second; None to redraw on every Event
     All additional keyword arguments are passed through to ``Axes.plot``.
 
     Examples
@@ -113,8 +279,11 @@ class LivePlot(CallbackBase):
     >>> my_plotter = LivePlot('det', 'motor', legend_keys=['sample'])
     >>> RE(my_scan, my_plotter)
     """
+    # the LivePlots between start and stop, keyed by the axes they draw on
+    _live = WeakKeyDictionary()
+
     def __init__(self, y, x=None, legend_keys=None, xlim=None, ylim=None,
-                 fig=None, **kwargs):
+                 fig=None, max_fps=10, **kwargs):
         super().__init__()
         if fig is None:
             # overplot (or, if no fig exists, one is made)
@@ -142,20 +311,34 @@ class LivePlot(CallbackBase):
         self.lines = []
         self.legend = None
         self.legend_title = " :: ".join([name for name in self.legend_keys])
+        self._throttle = _RedrawThrottle(self._redraw, max_fps)
+        self._background = None  # for blitting, captured after each draw
+        self._bounds = None  # (xmin, xmax, ymin, ymax) of the data drawn
+        self._num_drawn = 0
+        fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    @property
+    def x_data(self):
+        return self._x_buffer.data
+
+    @property
+    def y_data(self):
+        return self._y_buffer.data
 
     def start(self, doc):
         # The doc is not used; we just use the singal that a new run began.
-        self.x_data, self.y_data = [], []
+        self._x_buffer, self._y_buffer = _GrowableArray(), _GrowableArray()
+        self._bounds = None
+        self._num_drawn = 0
         label = " :: ".join(
             [str(doc.get(name, ' ')) for name in self.legend_keys])
         self.current_line, = self.ax.plot([], [], label=label, **self.kwargs)
         self.lines.append(self.current_line)
         self.legend = self.ax.legend(loc=0, title=self.legend_title).draggable()
+        self._live.setdefault(self.ax, set()).add(self)
 
     def event(self, doc):
         "Update line with data from this Event."
-        # Do repeated 'self' lookups once, for perf.
-        ax = self.ax
         try:
             if self.x is not None:
                 # this try/except block is needed because multiple event streams
@@ -168,13 +351,86 @@ class LivePlot(CallbackBase):
         except KeyError:
             # wrong event stream, skip it
             return
-        self.y_data.append(new_y)
-        self.x_data.append(new_x)
-        self.current_line.set_data(self.x_data, self.y_data)
-        # Rescale and redraw.
+        _extend_flexibly(self._y_buffer, [new_y])
+        _extend_flexibly(self._x_buffer, [new_x])
+        self._throttle.request()
+
+    def event_page(self, doc):
+        "Update line with data from this page of Events."
+        try:
+            if self.x is not None:
+                new_x = doc['data'][self.x]
+            else:
+                new_x = doc['seq_num']
+            new_y = doc['data'][self.y]
+        except KeyError:
+            # wrong event stream, skip it
+            return
+        _extend_flexibly(self._y_buffer, new_y)
+        _extend_flexibly(self._x_buffer, new_x)
+        self._throttle.request()
+
+    def stop(self, doc):
+        self._throttle.flush()
+        self._live.get(self.ax, set()).discard(self)
+
+    def _on_draw(self, event):
+        canvas = self.fig.canvas
+        if getattr(canvas, 'supports_blit', False):
+            try:
+                self._background = canvas.copy_from_bbox(self.ax.bbox)
+            except AttributeError:
+                # This backend cannot copy regions after all.
+                self._background = None
+
+    def _redraw(self):
+        ax = self.ax
+        canvas = ax.figure.canvas
+        x, y = self.x_data, self.y_data
+        self.current_line.set_data(x, y)
+        new_x, new_y = x[self._num_drawn:], y[self._num_drawn:]
+        self._num_drawn = len(x)
+        if not len(new_x):
+            return
+        if x.dtype == object or y.dtype == object:
+            # Values such as strings or datetimes; let matplotlib scale them.
+            new_bounds = bounds = None
+        else:
+            new_bounds = (np.min(new_x), np.max(new_x),
+                          np.min(new_y), np.max(new_y))
+            bounds = self._bounds
+        # Restoring the background would erase what another live line on
+        # these axes has drawn since it was captured.
+        alone = self._live.get(ax, set()) <= {self}
+        if (alone and bounds is not None and self._background is not None and
+                bounds[0] <= new_bounds[0] and new_bounds[1] <= bounds[1] and
+                bounds[2] <= new_bounds[2] and new_bounds[3] <= bounds[3]):
+            # The limits are unchanged, so only the line needs redrawing.
+            canvas.restore_region(self._background)
+            ax.draw_artist(self.current_line)
+            canvas.blit(ax.bbox)
+            return
+        if bounds is not None:
+            new_bounds = (min(bounds[0], new_bounds[0]),
+                          max(bounds[1], new_bounds[1]),
+                          min(bounds[2], new_bounds[2]),
+                          max(bounds[3], new_bounds[3]))
+        self._bounds = new_bounds
+        # Rescale and redraw. The background is stale until the next draw.
+        self._background = None
         ax.relim(visible_only=True)
         ax.autoscale_view(tight=True)
-        ax.figure.canvas.draw()
+        canvas.draw_idle()
+
+
+def _extend_flexibly(buffer, values):
+    "Extend a _GrowableArray, holding values as objects if they need it."
+    try:
+        buffer.extend(values)
+    except (TypeError, ValueError):
+        # e.g., strings or datetimes, which a list used to take as well
+        buffer.to_objects()
+        buffer.extend(values)
 
 
 def format_num(x, max_len=11, pre=5, post=5):
@@ -385,31 +641,178 @@ def _get_obj_fields(fields):
     return string_fields
 
 
+class RunBuffer(CallbackBase):
+    """
+    Keep the data of a run in numpy arrays, one per field and Event stream.
+
+    Each Event Descriptor gets a column for each of its data keys, typed
+    according to the 'dtype' and 'shape' of the key, and a column of the
+    Events' sequence numbers. The buffer is cleared when a run starts.
+
+    Parameters
+    ----------
+    spill_threshold : int, optional
+        size in bytes beyond which a column is moved to a temporary
+        memory-mapped file; by default, all columns are kept in memory
+
+    Attributes
+    ----------
+    start_doc, stop_doc : dict
+        the RunStart and RunStop documents, or None
+    descriptors : OrderedDict
+        the Event Descriptors of the run, keyed by uid
+
+    Examples
+    --------
+    >>> buf = RunBuffer()
+    >>> RE(AbsScan([det], motor, 1, 5, 5), buf)
+    >>> buf.column('det')
+    """
+    _dtypes = {'number': float, 'integer': int, 'boolean': bool}
+
+    def __init__(self, spill_threshold=None):
+        super().__init__()
+        self.spill_threshold = spill_threshold
+        self.reset()
+
+    def reset(self):
+        self.start_doc = None
+        self.stop_doc = None
+        self.descriptors = OrderedDict()
+        self._columns = dict()  # descriptor uid -> {field: _GrowableArray}
+        self._seq_nums = dict()  # descriptor uid -> _GrowableArray
+
+    def __len__(self):
+        return sum(len(seq_nums) for seq_nums in self._seq_nums.values())
+
+    def _resolve(self, field, descriptor):
+        # Find the uid of the Descriptor, by default the first with field.
+        if isinstance(descriptor, dict):
+            descriptor = descriptor['uid']
+        if descriptor is not None:
+            return descriptor
+        for uid, columns in self._columns.items():
+            if field is None or field in columns:
+                if field is None and len(self._columns) > 1:
+                    raise ValueError("This run has more than one Event "
+                                     "Descriptor; specify one.")
+                return uid
+        raise KeyError(field)
+
+    def column(self, field, descriptor=None):
+        """
+        Get the values of a field, without copying them.
+
+        Parameters
+        ----------
+        field : str
+        descriptor : dict or str, optional
+            an Event Descriptor or its uid; by default, the first one that
+            includes field
+
+        Returns
+        -------
+        values : numpy.ndarray
+            a view that is only valid until more Events are added
+        """
+        return self._columns[self._resolve(field, descriptor)][field].data
+
+    def seq_num(self, descriptor=None):
+        """
+        Get the sequence numbers of the Events, without copying them.
+
+        Parameters
+        ----------
+        descriptor : dict or str, optional
+            an Event Descriptor or its uid; may be omitted if there is
+            only one
+
+        Returns
+        -------
+        seq_nums : numpy.ndarray
+            a view that is only valid until more Events are added
+        """
+        return self._seq_nums[self._resolve(None, descriptor)].data
+
+    def start(self, doc):
+        self.reset()
+        self.start_doc = doc
+
+    def descriptor(self, doc):
+        uid = doc['uid']
+        self.descriptors[uid] = doc
+        columns = {}
+        for key, data_key in doc['data_keys'].items():
+            dtype = self._dtypes.get(data_key['dtype'], object)
+            shape = data_key.get('shape') or ()
+            if 'external' in data_key or dtype is object:
+                # Hold each value, which may be a reference to data stored
+                # elsewhere, as one object.
+                dtype, shape = object, ()
+            columns[key] = _GrowableArray(shape, dtype=dtype,
+                                          spill_threshold=self.spill_threshold)
+        self._columns[uid] = columns
+        self._seq_nums[uid] = _GrowableArray(dtype=int)
+
+    def event(self, doc):
+        self._append(doc['descriptor'], {key: [val] for key, val
+                                         in doc['data'].items()},
+                     [doc['seq_num']])
+
+    def event_page(self, doc):
+        self._append(doc['descriptor'], doc['data'], doc['seq_num'])
+
+    def bulk_events(self, doc):
+        for uid, events in doc.items():
+            for event in events:
+                self.event(event)
+
+    def stop(self, doc):
+        self.stop_doc = doc
+
+    def _append(self, uid, data, seq_nums):
+        for key, column in self._columns[uid].items():
+            values = data[key]
+            try:
+                column.extend(values)
+            except (TypeError, ValueError):
+                # The values do not fit the dtype or the shape described.
+                column.to_objects()
+                column.extend(values)
+        self._seq_nums[uid].extend(seq_nums)
+
+
 class CollectThenCompute(CallbackBase):
 
     def __init__(self):
         self._start_doc = None
         self._stop_doc = None
-        self._events = deque()
+        self._buffer = RunBuffer()
         self._descriptors = deque()
 
     def start(self, doc):
         self._start_doc = doc
+        self._buffer.start(doc)
 
     def descriptor(self, doc):
         self._descriptors.append(doc)
+        self._buffer.descriptor(doc)
 
     def event(self, doc):
-        self._events.append(doc)
+        self._buffer.event(doc)
+
+    def event_page(self, doc):
+        self._buffer.event_page(doc)
 
     def stop(self, doc):
         self._stop_doc = doc
+        self._buffer.stop(doc)
         self.compute()
 
     def reset(self):
         self._start_doc = None
         self._stop_doc = None
-        self._events.clear()
+        self._buffer.reset()
         self._descriptors.clear()
 
     def compute(self):
@@ -434,9 +837,12 @@ class LiveMesh(CallbackBase):
 
     cmap : str or colormap, optional
        The color map to use
+
+    max_fps : float, optional
+       maximum number of redraws per second; None to redraw on every Event
     """
     def __init__(self, x, y, I, *, xlim=None, ylim=None,
-                 clim=None, cmap='viridis'):
+                 clim=None, cmap='viridis', max_fps=10):
         fig, ax = plt.subplots()
         self.x = x
         self.y = y
@@ -448,7 +854,9 @@ class LiveMesh(CallbackBase):
         self.ax = ax
         ax.margins(.1)
         self.fig = fig
-        self._xdata, self._ydata, self._Idata = [], [], []
+        self._offsets = _GrowableArray((2,))
+        self._Idata = _GrowableArray()
+        self._throttle = _RedrawThrottle(self._redraw, max_fps)
         self._norm = mcolors.Normalize()
 
         if xlim is not None:
@@ -460,21 +868,26 @@ class LiveMesh(CallbackBase):
         self.cmap = cmap
 
     def start(self, doc):
-        self._xdata, self._ydata, self._Idata = [], [], []
-        sc = self.ax.scatter(self._xdata, self._ydata, c=self._Idata,
+        self._offsets = _GrowableArray((2,))
+        self._Idata = _GrowableArray()
+        sc = self.ax.scatter([], [], c=[],
                              norm=self._norm, cmap=self.cmap, edgecolor='face',
                              s=50)
         self._sc.append(sc)
         self.sc = sc
 
     def event(self, doc):
-        self._xdata.append(doc['data'][self.x])
-        self._ydata.append(doc['data'][self.y])
+        self._offsets.append((doc['data'][self.x], doc['data'][self.y]))
         self._Idata.append(doc['data'][self.I])
+        self._throttle.request()
 
-        offsets = np.vstack([self._xdata, self._ydata]).T
-        self.sc.set_offsets(offsets)
-        self.sc.set_array(np.asarray(self._Idata))
+    def stop(self, doc):
+        self._throttle.flush()
+
+    def _redraw(self):
+        self.sc.set_offsets(self._offsets.data)
+        self.sc.set_array(self._Idata.data)
+        self.fig.canvas.draw_idle()
 
 
 class LiveRaster(CallbackBase):
@@ -496,10 +909,13 @@ class LiveRaster(CallbackBase):
 
     cmap : str or colormap, optional
        The color map to use
+
+    max_fps : float, optional
+       maximum number of redraws per second; None to redraw on every Event
     """
     def __init__(self, raster_shape, I, *,
                  clim=None, cmap='viridis',
-                 xlabel='x', ylabel='y', extent=None):
+                 xlabel='x', ylabel='y', extent=None, max_fps=10):
         fig, ax = plt.subplots()
         self.I = I
         ax.set_xlabel(xlabel)
@@ -516,6 +932,7 @@ class LiveRaster(CallbackBase):
         self.raster_shape = raster_shape
         self.im = None
         self.extent = extent
+        self._throttle = _RedrawThrottle(self._redraw, max_fps)
 
     def start(self, doc):
         if self.im is not None:
@@ -535,7 +952,16 @@ class LiveRaster(CallbackBase):
         pos = np.unravel_index(seq_num, self.raster_shape)
 
         self._Idata[pos] = doc['data'][self.I]
-        if self.clim is None:
+        self._throttle.request()
+
+    def stop(self, doc):
+        self._throttle.flush()
+
+    def _redraw(self):
+        # Once per redraw, not per Event. A pixel measured again may have
+        # held the old extreme, so the limits are found over the image.
+        if self.clim is None and not np.all(np.isnan(self._Idata)):
             self.im.set_clim(np.nanmin(self._Idata), np.nanmax(self._Idata))
 
         self.im.set_array(self._Idata)
+        self.fig.canvas.draw_idle()
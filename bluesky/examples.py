@@ -254,11 +254,13 @@ class MockFlyer:
         self._future.add_done_callback(lambda x: self._finish())
         return self
 
-    def collect(self):
-        if not self.ready:
+    def collect(self, partial=False):
+        if not (self.ready or partial):
             raise RuntimeError("No reading until done!")
 
-        yield from self._data
+        # Pop the data so that a partial collection is not collected again.
+        while self._data:
+            yield self._data.popleft()
         self._thread = None
 
     def _scan(self):
@@ -332,9 +334,10 @@ class FlyMagic(Base):
         return self
 
     def describe(self):
-        return [{k: {'source': self._name, 'dtype': 'number'}
+        return [{k: {'source': self._name, 'dtype': 'number', 'shape': None}
                  for k in [self._motor, self._det]},
-                {self._det2: {'source': self._name, 'dtype': 'number'}}]
+                {self._det2: {'source': self._name, 'dtype': 'number',
+                              'shape': None}}]
 
     def collect(self):
         if self._time is None:
@@ -0,0 +1,400 @@
+"""
+Journal documents to local disk and replay them into metadatastore later.
+
+The RunEngine appends every document to the journal, which only costs a
+write to local disk. A JournalReplayer, in another thread or process, ships
+the documents to the database in bulk and remembers how far it got, so
+nothing is lost while the database is slow or down.
+
+Each journal segment is a file of JSON lines, one ``[name, doc]`` pair per
+line. The journal writing a segment holds a lock on it, which tells the
+replayer that more lines may come.
+"""
+import glob
+import json
+import os
+import threading
+import time as ttime
+import numpy as np
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # not on Windows
+from bluesky.run_engine import DocumentNames
+from bluesky.utils import unpack_event_page
+import logging
+logger = logging.getLogger(__name__)
+
+
+__all__ = ['DocumentJournal', 'JournalReplayer', 'register_journal']
+
+
+_SEGMENT_TEMPLATE = 'segment-{0:08d}.jsonl'
+_PROGRESS_FILE = 'progress.json'
+
+
+def _segments(directory):
+    "The paths of the journal segments in directory, oldest first."
+    return sorted(glob.glob(os.path.join(directory, 'segment-*.jsonl')))
+
+
+def _being_written(path):
+    "Whether a DocumentJournal still has the segment at path open."
+    if fcntl is None:
+        # Without locks, assume that only the newest segment is open.
+        return path == _segments(os.path.dirname(path))[-1]
+    with open(path, 'rb') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+def _default(obj):
+    # RE.keep_arrays lets read-only numpy arrays into Events.
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("{0!r} is not JSON serializable".format(obj))
+
+
+class DocumentJournal:
+    """
+    Append documents to segment files in a local directory.
+
+    Every document is written through to the operating system at once, so
+    it survives a crash of the Python process. Writes are also synced to
+    disk every fsync_interval seconds and at the end of each run, so at
+    most that much is lost if the whole machine goes down.
+
+    A new segment is started when the current one grows past
+    segment_size bytes, and every time a journal is opened, so that each
+    segment is written by only one journal.
+
+    Parameters
+    ----------
+    directory : str
+        created if it does not exist
+    fsync_interval : float, optional
+        seconds between syncs to disk
+    segment_size : int, optional
+        bytes per segment, roughly
+
+    Examples
+    --------
+    >>> journal = register_journal(RE, '/var/lib/bluesky/journal')
+    """
+    def __init__(self, directory, *, fsync_interval=1,
+                 segment_size=64 * 2**20):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.segment_size = segment_size
+        segments = _segments(directory)
+        if segments:
+            basename = os.path.basename(segments[-1])
+            self._segment_number = int(basename[8:16])
+        else:
+            self._segment_number = 0
+        self._file = None
+        self._last_fsync = ttime.monotonic()
+        self._lock = threading.Lock()
+
+    def __call__(self, name, doc):
+        if isinstance(name, DocumentNames):
+            name = name.name
+        line = json.dumps([name, doc], default=_default) + '\n'
+        with self._lock:
+            if self._file is None or self._file.tell() > self.segment_size:
+                self._open_segment()
+            self._file.write(line)
+            self._file.flush()
+            now = ttime.monotonic()
+            if (name == DocumentNames.stop.name or
+                    now - self._last_fsync > self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+    def _open_segment(self):
+        self.close()
+        # 'x' so that two journals never write to the same segment. If
+        # another journal took this number first, try the next one.
+        while True:
+            self._segment_number += 1
+            path = os.path.join(self.directory,
+                                _SEGMENT_TEMPLATE.format(self._segment_number))
+            try:
+                self._file = open(path, 'x', encoding='utf-8')
+            except FileExistsError:
+                continue
+            break
+        if fcntl is not None:
+            # Held until the segment is closed, or the process dies.
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def close(self):
+        "Sync and close the current segment."
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+def register_journal(runengine, directory, **kwargs):
+    """
+    Journal every document the RunEngine emits.
+
+    Parameters
+    ----------
+    runengine : RunEngine
+    directory : str
+    **kwargs
+        passed to DocumentJournal
+
+    Returns
+    -------
+    journal : DocumentJournal
+    """
+    journal = DocumentJournal(directory, **kwargs)
+    for name in DocumentNames:
+        runengine._register_scan_callback(name, journal)
+    return journal
+
+
+def _mds_inserters():
+    # Imported here so that journaling works without metadatastore.
+    from metadatastore.commands import bulk_insert_events
+    from bluesky.register_mds import insert_funcs
+    inserters = {name.name: func for name, func in insert_funcs.items()}
+    return inserters, bulk_insert_events
+
+
+def _mds_duplicate_errors():
+    "The exceptions metadatastore raises for a uid that is already stored"
+    errors = []
+    try:
+        from pymongo.errors import BulkWriteError, DuplicateKeyError
+    except ImportError:
+        pass
+    else:
+        errors.extend([BulkWriteError, DuplicateKeyError])
+    try:
+        from mongoengine.errors import NotUniqueError
+    except ImportError:
+        pass
+    else:
+        errors.append(NotUniqueError)
+    return tuple(errors)
+
+
+class JournalReplayer:
+    """
+    Ship journaled documents to metadatastore and record the progress.
+
+    Events are inserted in bulk, up to batch_size at a time. After each
+    insert, the byte offset reached in the segment is saved to a progress
+    file in the journal directory, so a replayer picks up where the last
+    one stopped. Documents are delivered at least once: if the replayer
+    stops between an insert and saving the progress, the same documents
+    are inserted again by the next one. The database refuses them as
+    duplicates, and the replayer takes that to mean they were delivered.
+
+    A segment that a journal still has open is replayed up to its last
+    complete line, and more is picked up later. An incomplete line at the
+    end of a segment no journal has open was cut off by a crash, and it is
+    skipped.
+
+    Parameters
+    ----------
+    directory : str
+        the directory of a DocumentJournal
+    inserters : dict, optional
+        maps document names ('start', 'descriptor', ...) to functions that
+        expect the name and the document; metadatastore by default
+    bulk_insert_events : callable, optional
+        expects a Descriptor uid and a list of Events; metadatastore by
+        default
+    batch_size : int, optional
+        the most Events to insert at once
+    duplicate_errors : tuple of exception types, optional
+        raised by the inserters for a document that is already stored; by
+        default, those of pymongo and mongoengine that are installed. If
+        bulk_insert_events raises one, the Events are inserted one at a
+        time by inserters['event'] instead.
+
+    Examples
+    --------
+    Ship everything journaled so far.
+
+    >>> JournalReplayer('/var/lib/bluesky/journal').replay()
+
+    Keep shipping on a background thread.
+
+    >>> replayer = JournalReplayer('/var/lib/bluesky/journal')
+    >>> replayer.start()
+    """
+    def __init__(self, directory, inserters=None, bulk_insert_events=None,
+                 batch_size=1000, duplicate_errors=None):
+        if inserters is None or bulk_insert_events is None:
+            mds_inserters, mds_bulk_insert_events = _mds_inserters()
+            if inserters is None:
+                inserters = mds_inserters
+            if bulk_insert_events is None:
+                bulk_insert_events = mds_bulk_insert_events
+        self.directory = directory
+        self.inserters = inserters
+        self.bulk_insert_events = bulk_insert_events
+        self.batch_size = batch_size
+        if duplicate_errors is None:
+            duplicate_errors = _mds_duplicate_errors()
+        self.duplicate_errors = duplicate_errors
+        self._offsets = {}
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def progress(self):
+        "maps segment file names to the byte offsets replayed so far"
+        path = os.path.join(self.directory, _PROGRESS_FILE)
+        try:
+            with open(path) as f:
+                progress = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return progress['offsets']
+
+    def _save_progress(self, segment, offset):
+        self._offsets[segment] = offset
+        # Write a new file and rename it over the old one, which is atomic.
+        path = os.path.join(self.directory, _PROGRESS_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'offsets': self._offsets}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def replay(self):
+        """
+        Ship the documents journaled since the last replay.
+
+        Returns
+        -------
+        num_docs : int
+            the number of documents shipped
+        """
+        # Another journal may still append to an older segment, so each
+        # segment is replayed from its own offset.
+        self._offsets = self.progress
+        num_docs = 0
+        for path in _segments(self.directory):
+            segment = os.path.basename(path)
+            offset = self._offsets.get(segment, 0)
+            if offset < os.path.getsize(path):
+                num_docs += self._replay_segment(segment, offset)
+        return num_docs
+
+    def _replay_segment(self, segment, offset):
+        path = os.path.join(self.directory, segment)
+        start_offset = offset
+        num_docs = 0
+        batch = []  # Events of one Descriptor, not yet inserted
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    if _being_written(path):
+                        # The journal is still writing this line.
+                        break
+                    logger.warning("Skipping the incomplete last line of "
+                                   "%s, which was cut off.", path)
+                    offset += len(line)
+                    continue
+                name, doc = json.loads(line.decode('utf-8'))
+                # Events are batched per Descriptor, whatever document
+                # they were journaled in.
+                if name == DocumentNames.event_page.name:
+                    event_groups = [list(unpack_event_page(doc))]
+                elif name == DocumentNames.event.name:
+                    event_groups = [[doc]]
+                elif name == DocumentNames.bulk_events.name:
+                    event_groups = [events for events in doc.values()
+                                    if events]
+                else:
+                    event_groups = None
+                if event_groups is not None:
+                    for events in event_groups:
+                        if (batch and batch[0]['descriptor'] !=
+                                events[0]['descriptor']):
+                            # Saves the offset of the start of this line,
+                            # so the rest of it is replayed again if the
+                            # replayer stops now.
+                            self._insert_events(batch, segment, offset)
+                            batch = []
+                        batch.extend(events)
+                    offset += len(line)
+                    if len(batch) >= self.batch_size:
+                        self._insert_events(batch, segment, offset)
+                        batch = []
+                else:
+                    if batch:
+                        self._insert_events(batch, segment, offset)
+                        batch = []
+                    self._insert(name, doc)
+                    offset += len(line)
+                    self._save_progress(segment, offset)
+                num_docs += 1
+        if batch:
+            self._insert_events(batch, segment, offset)
+        elif offset != start_offset:
+            self._save_progress(segment, offset)
+        return num_docs
+
+    def _insert(self, name, doc):
+        try:
+            self.inserters[name](name, doc)
+        except self.duplicate_errors:
+            # It was inserted before the progress could be saved.
+            logger.debug("%s %s was already inserted.", name,
+                         doc.get('uid'))
+
+    def _insert_events(self, batch, segment, offset):
+        try:
+            self.bulk_insert_events(batch[0]['descriptor'], batch)
+        except self.duplicate_errors:
+            # Some of the batch was inserted before the progress could be
+            # saved. Insert the rest.
+            for event in batch:
+                self._insert(DocumentNames.event.name, event)
+        self._save_progress(segment, offset)
+
+    def start(self, poll_interval=1):
+        "Replay in a background thread every poll_interval seconds."
+        if self._thread is not None:
+            raise RuntimeError("This replayer is already running.")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        args=(poll_interval,),
+                                        name='journal-replayer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        "Stop the background thread after its current replay."
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, poll_interval):
+        while not self._stop_event.is_set():
+            try:
+                self.replay()
+            except Exception:
+                # The database may be down. Try again later.
+                logger.exception("Replaying the journal in %s failed.",
+                                 self.directory)
+            self._stop_event.wait(poll_interval)
@@ -1,8 +1,10 @@
 import metadatastore.api as mds
 from metadatastore.commands import bulk_insert_events
-import copy
+import queue
+import threading
 import time as ttime
 from bluesky.run_engine import DocumentNames
+from bluesky.utils import unpack_event_page
 
 
 __all__ = ['register_mds']
@@ -22,17 +24,18 @@ known_run_start_keys = ['time', 'scan_id', 'beamline_id', 'uid', 'owner',
 
 def _insert_run_start(name, doc):
     """Rearrange the dict for unpacking it into the MDS API."""
-    # Move dynamic keys into 'custom' for MDS API.
-    # We should change this in MDS to save the time of copying here:
-    doc = copy.deepcopy(doc)
-    for key in list(doc):
-        if key not in known_run_start_keys:
-            try:
-                doc['custom']
-            except KeyError:
-                doc['custom'] = {}
-            doc['custom'][key] = doc.pop(key)
-    return mds.insert_run_start(**doc)
+    # Move dynamic keys into 'custom' for MDS API. Build new dicts instead
+    # of copying doc, which the RunEngine passes on to other callbacks.
+    kwargs = {}
+    custom = {}
+    for key, value in doc.items():
+        if key in known_run_start_keys:
+            kwargs[key] = value
+        else:
+            custom[key] = value
+    if custom:
+        kwargs['custom'] = custom
+    return mds.insert_run_start(**kwargs)
 
 
 def _insert_bulk_events(name, doc):
@@ -41,21 +44,184 @@ def _insert_bulk_events(name, doc):
         bulk_insert_events(desc_uid, events)
 
 
+def _insert_event_page(name, doc):
+    """Bulk insert the Events in an Event Page."""
+    bulk_insert_events(doc['descriptor'], list(unpack_event_page(doc)))
+
+
 insert_funcs = {DocumentNames.event: _make_insert_func(mds.insert_event),
                 DocumentNames.bulk_events: _insert_bulk_events,
+                DocumentNames.event_page: _insert_event_page,
                 DocumentNames.descriptor: _make_insert_func(
                     mds.insert_descriptor),
                 DocumentNames.start: _insert_run_start,  # see above
                 DocumentNames.stop: _make_insert_func(mds.insert_run_stop)}
 
 
-def register_mds(runengine):
+class _Flush:
+    "Tells the writer thread to insert what it has now, and when it has."
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _BufferedEventWriter:
+    """
+    Insert Events in batches on a background thread.
+
+    The RunEngine calls put and flush on the thread that runs the scan, so
+    neither waits longer than timeout seconds. Beyond that they raise
+    RuntimeError, which stops the scan instead of stalling it.
+
+    Parameters
+    ----------
+    bulk_insert : callable
+        expects a Descriptor uid and a list of Events
+    max_batch_size : int
+        the most Events to insert at once
+    max_delay : float
+        the longest time, in seconds, an Event waits for others to join its
+        batch
+    max_queue_size : int
+        the most Events waiting to be inserted; beyond that, put waits
+    timeout : float
+        the longest time, in seconds, put waits for room in the queue or
+        flush waits for the queued Events to be inserted
+    """
+    def __init__(self, bulk_insert, max_batch_size, max_delay,
+                 max_queue_size, timeout):
+        self.bulk_insert = bulk_insert
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._exception = None  # from the last failed insert, until raised
+
+    def put(self, name, doc):
+        "Queue an Event for insertion."
+        self._raise_exception()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='mds-event-writer',
+                                            daemon=True)
+            self._thread.start()
+        self._put(doc, self.timeout)
+
+    def flush(self):
+        "Wait until all the queued Events are inserted."
+        if self._thread is not None:
+            deadline = ttime.monotonic() + self.timeout
+            marker = _Flush()
+            self._put(marker, self.timeout)
+            if not marker.done.wait(max(deadline - ttime.monotonic(), 0)):
+                raise RuntimeError("The queued Events were not inserted into "
+                                   "metadatastore within {0} seconds."
+                                   "".format(self.timeout))
+        self._raise_exception()
+
+    def _put(self, item, timeout):
+        try:
+            self._queue.put(item, timeout=timeout)
+        except queue.Full:
+            raise RuntimeError("metadatastore did not make room for more "
+                               "Events within {0} seconds."
+                               "".format(timeout)) from None
+
+    def _raise_exception(self):
+        exc, self._exception = self._exception, None
+        if exc is not None:
+            raise exc
+
+    def _run(self):
+        while True:
+            batch = []
+            item = self._queue.get()
+            deadline = ttime.monotonic() + self.max_delay
+            while not isinstance(item, _Flush):
+                batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+                timeout = deadline - ttime.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(timeout, 0))
+                except queue.Empty:
+                    break
+            try:
+                self._insert(batch)
+            except Exception as exc:
+                self._exception = exc
+            if isinstance(item, _Flush):
+                item.done.set()
+
+    def _insert(self, batch):
+        # Keep the order of the Events in each stream.
+        streams = {}
+        for doc in batch:
+            streams.setdefault(doc['descriptor'], []).append(doc)
+        for desc_uid, events in streams.items():
+            self.bulk_insert(desc_uid, events)
+
+
+def _buffered_insert_funcs(inserters, bulk_insert, **kwargs):
+    """
+    Wrap inserters so that Events go through a _BufferedEventWriter.
+
+    Events arriving one at a time, in bulk_events, or in event_page
+    documents share one writer, which is flushed before each RunStop.
+    kwargs are passed to the writer.
+    """
+    writer = _BufferedEventWriter(bulk_insert, **kwargs)
+
+    def insert_bulk_events(name, doc):
+        for events in doc.values():
+            for event in events:
+                writer.put(name, event)
+
+    def insert_event_page(name, doc):
+        for event in unpack_event_page(doc):
+            writer.put(name, event)
+
+    def insert_run_stop(name, doc):
+        writer.flush()
+        return inserters[DocumentNames.stop](name, doc)
+
+    funcs = dict(inserters)
+    funcs[DocumentNames.event] = writer.put
+    funcs[DocumentNames.bulk_events] = insert_bulk_events
+    funcs[DocumentNames.event_page] = insert_event_page
+    funcs[DocumentNames.stop] = insert_run_stop
+    return funcs
+
+
+def register_mds(runengine, *, max_batch_size=1000, max_delay=1,
+                 max_queue_size=10000, timeout=10):
     """
     Register metadatastore insert_* functions to consume documents from scan.
 
+    Events are inserted in batches on a background thread, so the scan does
+    not wait for the database after each Event. All the Events of a run are
+    inserted before its RunStop. If an insert fails, the exception is raised
+    to the RunEngine by the next Event or RunStop.
+
     Parameters
     ----------
-    scan : ophyd.scans.Scan
+    runengine : RunEngine
+    max_batch_size : int, optional
+        the most Events to insert at once
+    max_delay : float, optional
+        the longest time, in seconds, an Event waits for others to join its
+        batch
+    max_queue_size : int, optional
+        the most Events waiting to be inserted; beyond that, the scan waits
+    timeout : float, optional
+        the longest time, in seconds, the scan waits for room in the queue,
+        or at the RunStop for the queued Events to be inserted, before
+        raising RuntimeError
     """
-    for name in insert_funcs.keys():
-        runengine._register_scan_callback(name, insert_funcs[name])
+    funcs = _buffered_insert_funcs(insert_funcs, bulk_insert_events,
+                                   max_batch_size=max_batch_size,
+                                   max_delay=max_delay,
+                                   max_queue_size=max_queue_size,
+                                   timeout=timeout)
+    for name in funcs.keys():
+        runengine._register_scan_callback(name, funcs[name])
@@ -4,8 +4,13 @@ import types
 import time as ttime
 import sys
 import logging
-from itertools import count, tee
-from collections import namedtuple, deque, defaultdict, Iterable
+import threading
+import warnings
+from functools import partial
+from weakref import ref, WeakKeyDictionary
+from itertools import count
+from collections import (namedtuple, deque, defaultdict, OrderedDict,
+                         Iterable)
 import uuid
 import signal
 from enum import Enum
@@ -19,8 +24,9 @@ from super_state_machine.errors import TransitionError
 import numpy as np
 from pkg_resources import resource_filename as rs_fn
 
-from .utils import (CallbackRegistry, SignalHandler, ExtendedList,
-                    normalize_subs_input)
+from .utils import (CallbackRegistry, CallbackTiming, LatencyHistogram,
+                    SignalHandler,
+                    ExtendedList, normalize_subs_input, object_name)
 
 logger = logging.getLogger(__name__)
 
@@ -29,44 +35,30 @@ __all__ = ['Msg', 'RunEngineStateMachine', 'RunEngine', 'Dispatcher',
            'RunInterrupt', 'PanicError', 'IllegalMessageSequence']
 
 
-def expiring_function(func, *args, **kwargs):
-    """
-    If timeout has not occurred, call func(*args, **kwargs).
-
-    This is meant to used with the event loop's run_in_exector
-    method. Outside that context, it doesn't make any sense.
-    """
-    def dummy(start_time, timeout):
-        if loop.time() > start_time + timeout:
-            return
-        func(*args, **kwargs)
-        return
-
-    return dummy
-
-
 class DocumentNames(Enum):
     stop = 'stop'
     start = 'start'
     descriptor = 'descriptor'
     event = 'event'
     bulk_events = 'bulk_events'
+    event_page = 'event_page'
 
 SCHEMA_PATH = 'schema'
 SCHEMA_NAMES = {DocumentNames.start: 'run_start.json',
                 DocumentNames.stop: 'run_stop.json',
                 DocumentNames.event: 'event.json',
                 DocumentNames.bulk_events: 'bulk_events.json',
+                DocumentNames.event_page: 'event_page.json',
                 DocumentNames.descriptor: 'event_descriptor.json'}
 fn = '{}/{{}}'.format(SCHEMA_PATH)
 schemas = {}
 for name, filename in SCHEMA_NAMES.items():
     with open(rs_fn('bluesky', fn.format(filename))) as fin:
         schemas[name] = json.load(fin)
-
-
-loop = asyncio.get_event_loop()
-loop.set_debug(True)
+# Build each validator once; jsonschema.validate would rebuild it per call.
+schema_validators = {name: jsonschema.validators.validator_for(schema)(schema)
+                     for name, schema in schemas.items()}
+VALIDATION_MODES = ('full', 'sampled', 'off')
 
 
 class Msg(namedtuple('Msg_base', ['command', 'obj', 'args', 'kwargs'])):
@@ -135,11 +127,11 @@ class LoggingPropertyMachine(PropertyMachine):
 
 class RunEngine:
 
-    _loop = loop  # just a convenient way to inspect the global event loop
     state = LoggingPropertyMachine(RunEngineStateMachine, logger=logger)
     _UNCACHEABLE_COMMANDS = ['pause', 'subscribe', 'unsubscribe']
 
-    def __init__(self, md=None, *, md_validator=None, logbook=None):
+    def __init__(self, md=None, *, md_validator=None, logbook=None,
+                 loop=None):
         """
         The Run Engine execute messages and emits Documents.
 
@@ -163,6 +155,9 @@ class RunEngine:
         logbook : callable, optional
             logbook(msg, properties=dict)
 
+        loop : BaseEventLoop, optional
+            The event loop to work on. Several Run Engines can share one
+            loop if their plans are run as tasks with ``run``.
 
         Attributes
         ----------
@@ -170,16 +165,80 @@ class RunEngine:
             {'idle', 'running', 'paused'}
         md
             direct access to the dict-like persistent storage described above
-        event_timeout
-            number of seconds before Events yet unprocessed by callbacks are
-            skipped
+        dispatcher
+            the Dispatcher that feeds documents to subscriptions; see its
+            ``policy`` and ``stats`` attributes to tune and monitor the
+            asynchronous delivery of Events
         logbook
             callable accepting a message and an optional dict
         ignore_callback_exceptions
             boolean, True by default
+        loop_yield_interval
+            maximum number of seconds the Run Engine processes messages
+            without yielding to the event loop; 0.01 by default
+        validation
+            {'full', 'sampled', 'off'} how emitted documents are checked
+            against the document schemas; 'full' by default. In 'sampled'
+            mode, every document except Events is validated, as well as the
+            first Event for each Event Descriptor and every Nth Event after
+            that, where N is ``validation_sample_interval``.
+        validation_sample_interval
+            integer, 100 by default
+        event_pages
+            boolean, False by default. If True, Events are accumulated per
+            Event Descriptor and emitted as 'event_page' documents instead of
+            'event' documents. A page is emitted when it holds
+            ``event_page_size`` Events, when its first Event is older than
+            ``event_page_timeout`` seconds, and at every checkpoint and at
+            the end of the run.
+        event_page_size
+            integer, 100 by default
+        event_page_timeout
+            number of seconds, 1 by default
+        collect_chunk_size
+            maximum number of Events in each 'bulk_events' document emitted
+            while collecting a flyer; 1000 by default
+        max_msg_cache_size
+            maximum number of messages cached since the last checkpoint so
+            that they can be replayed on resume; None (no limit) by default.
+            If a plan exceeds it, a warning is issued and, until the next
+            checkpoint, the run can still be paused but not resumed: it can
+            only be stopped or aborted.
+        record_stats
+            boolean, False by default. If True, the time spent processing
+            each message, each stage of emitting each document, and each
+            blocking callback is recorded. See ``stats``.
+        stats
+            a snapshot of the statistics recorded while ``record_stats`` is
+            True; see ``clear_stats`` to start over
+        stats_interval
+            number of seconds between summaries of ``stats`` logged at the
+            INFO level while ``record_stats`` is True; None (the default)
+            disables them
+        slow_command_threshold
+            number of seconds, None by default. If not None, each message
+            that takes longer than this to process is logged as a warning
+            and reported in ``slow_commands``.
+        slow_commands
+            a deque of the 1000 most recent slow messages, each described
+            by a dict with the keys 'msg', 'command', 'obj', 'duration' (in
+            seconds), and 'time' (when processing finished)
+        uid_factory
+            callable that returns a new, globally unique id string for each
+            document; ``new_uid`` (a random uuid4) by default. For high-rate
+            Events, ``SequentialUIDFactory()`` is much faster.
+        keep_arrays
+            boolean, False by default. Numpy arrays in readings are converted
+            to lists unless this is True, in which case Events hold
+            read-only views of the arrays themselves. That saves a copy for
+            in-process consumers, but such Events are not JSON-serializable.
+            Arrays of fewer than 100 elements are converted to lists
+            regardless, because that is faster than making a view.
 
         Methods
         -------
+        run
+            Run a plan as a task on the event loop (a coroutine).
         request_pause
             Pause the Run Engine at the next checkpoint.
         resume
@@ -190,12 +249,19 @@ class RunEngine:
             Force the Run Engine to stop and/or disallow resume.
         all_is_well
             Un-panic
+        clear_describe_cache
+            Forget the cached output of describe() for one or all objects.
+        clear_stats
+            Discard the statistics recorded so far.
         register_command
             Teach the Run Engine a new Message command.
         unregister_command
             Undo register_command.
         """
         super().__init__()
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self._loop = loop
         if md is None:
             md = {}
         self.md = md
@@ -209,32 +275,60 @@ class RunEngine:
         self._bundling = False  # if we are in the middle of bundling readings
         self._run_is_open = False  # if we have emitted a RunStart, no RunStop
         self._deferred_pause_requested = False  # pause at next 'checkpoint'
+        self._yield_requested = False  # yield to the loop before next msg
         self._sigint_handler = None  # intercepts Ctrl+C
+        self._sigint_hold = None  # Future holding the run after a Ctrl+C
+        self._sigint_timer = None  # pauses if no second Ctrl+C comes soon
         self._exception = None  # stored and then raised in the _run loop
         self._objs_read = deque()  # objects read in one Event
         self._read_cache = deque()  # cache of obj.read() in one Event
+        self._last_readings = dict()  # obj -> its last reading in the run
         self._configured = set()  # objects configured, not yet deconfigured
         self._movable_objs_touched = set()  # objects we moved at any point
         self._uncollected = set()  # objects after kickoff(), before collect()
         self._run_start_uids = list()  # run start uids generated by __call__
-        self._describe_cache = dict()  # cache of all obj.describe() output
+        # obj.describe() output, across runs, without keeping objs alive
+        self._describe_cache = WeakKeyDictionary()
+        self._strong_describe_cache = dict()  # same, for objs w/o weakrefs
+        self._run_data_keys = dict()  # data keys of each obj read in the run
+        self._data_key_index = dict()  # field name -> obj read in the run
         self._descriptor_uids = dict()  # cache of all Descriptor uids
-        self._sequence_counters = dict()  # a seq_num counter per Descriptor
-        self._teed_sequence_counters = dict()  # for if we redo datapoints
+        self._validation_counters = dict()  # Events seen per Descriptor
+        self._sequence_counters = dict()  # last seq_num per Descriptor
+        self._event_pages = OrderedDict()  # unemitted Events per Descriptor
+        self._event_page_task = None  # emits the last timed-out Event Page
+        self._sequence_counters_copy = dict()  # for if we redo datapoints
         self._pause_requests = dict()  # holding {<name>: callable}
         self._block_groups = defaultdict(set)  # sets of objs to wait for
+        # (group, msg, status, kept through a checkpoint) of sets, triggers
+        self._unwaited_msgs = list()
         self._temp_callback_ids = set()  # ids from CallbackRegistry
         self._msg_cache = None  # may be used to hold recently processed msgs
+        self._msg_cache_overflowed = False  # if msgs were dropped from it
         self._genstack = deque()  # stack of generators to work off of
         self._new_gen = True  # flag if we need to prime the generator
         self._exit_status = 'success'  # optimistic default
         self._reason = ''  # reason for abort
         self._task = None  # asyncio.Task associated with call to self._run
+        self._wait_tasks = set()  # tasks of _wait_for, cancelled at the end
+        self._blocking = False  # if __call__ (not run) is running the loop
+        self._runner = None  # the task of run() started by __call__
+        self._paused = None  # Future that returns control to __call__
+        self._resumed = None  # Future the run awaits while paused
         self._plan = None  # the scan plan instance from __call__
+        self._record_stats = False  # if we time commands and emit stages
+        self._slow_command_threshold = None  # report commands slower than it
+        self._time_commands = False  # if either of the above needs timing
+        self._command_stats = defaultdict(LatencyHistogram)  # by command
+        self._object_stats = defaultdict(LatencyHistogram)  # by obj, command
+        self._emit_stats = defaultdict(LatencyHistogram)  # by emit stage
+        self._last_stats_report = 0  # loop.time() of last stats log entry
         self._command_registry = {
             'create': self._create,
             'save': self._save,
             'read': self._read,
+            'read_many': self._read_many,
+            'read_last': self._read_last,
             'null': self._null,
             'set': self._set,
             'trigger': self._trigger,
@@ -254,9 +348,20 @@ class RunEngine:
         }
 
         # public dispatcher for callbacks processed on the main thread
-        self.dispatcher = Dispatcher()
+        self.dispatcher = Dispatcher(loop=self._loop)
         self.ignore_callback_exceptions = True
-        self.event_timeout = 0.1
+        self.loop_yield_interval = 0.01
+        self.validation = 'full'
+        self.validation_sample_interval = 100
+        self.event_pages = False
+        self.event_page_size = 100
+        self.event_page_timeout = 1
+        self.collect_chunk_size = 1000
+        self.max_msg_cache_size = None
+        self.stats_interval = None
+        self.slow_commands = deque(maxlen=1000)
+        self.uid_factory = new_uid
+        self.keep_arrays = False
         self.subscribe = self.dispatcher.subscribe
         self.unsubscribe = self.dispatcher.unsubscribe
 
@@ -265,27 +370,40 @@ class RunEngine:
 
         self.verbose = False
 
-        loop.call_soon(self._check_for_trouble)
-        loop.call_soon(self._check_for_signals)
-
     def _clear_run_cache(self):
         self._metadata_per_run.clear()
         self._bundling = False
         self._run_is_open = False
         self._msg_cache = None  # checkpoints can't rewind into a closed run
+        self._msg_cache_overflowed = False
         self._objs_read.clear()
         self._read_cache.clear()
-        self._describe_cache.clear()
+        self._last_readings.clear()
+        self._run_data_keys.clear()
+        self._data_key_index.clear()
         self._descriptor_uids.clear()
+        self._validation_counters.clear()
+        self._clear_event_pages()
         self._sequence_counters.clear()
-        self._teed_sequence_counters.clear()
+        self._sequence_counters_copy.clear()
         self._block_groups.clear()
+        self._unwaited_msgs.clear()
+
+    def _clear_event_pages(self):
+        for page, first_time, timer in self._event_pages.values():
+            timer.cancel()
+        self._event_pages.clear()
+        if self._event_page_task is not None:
+            self._event_page_task.cancel()
+            self._event_page_task = None
 
     def _clear_call_cache(self):
         self._metadata_per_call.clear()
         self._configured.clear()
         self._movable_objs_touched.clear()
         self._deferred_pause_requested = False
+        self._yield_requested = False
+        self._release_sigint_hold()
         self._genstack = deque()
         self._new_gen = True
         self._exception = None
@@ -303,11 +421,106 @@ class RunEngine:
     def reset(self):
         self._clear_run_cache()
         self._clear_call_cache()
+        self.clear_describe_cache()
         self.dispatcher.unsubscribe_all()
 
     @property
     def resumable(self):
-        return self._msg_cache is not None
+        return self._msg_cache is not None and not self._msg_cache_overflowed
+
+    @property
+    def validation(self):
+        return self._validation
+
+    @validation.setter
+    def validation(self, val):
+        if val not in VALIDATION_MODES:
+            raise ValueError("validation must be one of {0}"
+                             "".format(VALIDATION_MODES))
+        self._validation = val
+
+    @property
+    def record_stats(self):
+        return self._record_stats
+
+    @record_stats.setter
+    def record_stats(self, val):
+        self._record_stats = bool(val)
+        self._scan_cb_registry.record_timing = self._record_stats
+        self.dispatcher.cb_registry.record_timing = self._record_stats
+        self._time_commands = (self._record_stats or
+                               self._slow_command_threshold is not None)
+
+    @property
+    def slow_command_threshold(self):
+        return self._slow_command_threshold
+
+    @slow_command_threshold.setter
+    def slow_command_threshold(self, val):
+        self._slow_command_threshold = val
+        self._time_commands = self._record_stats or val is not None
+
+    @property
+    def stats(self):
+        """
+        A snapshot of the statistics recorded while ``record_stats`` is True
+
+        All times are in seconds. Latencies are summarized by their count,
+        total, mean, max, and a histogram, a list of (upper bucket edge,
+        count) pairs.
+
+        Returns
+        -------
+        stats : dict
+            commands maps each command to the latency of processing its
+            messages, including time spent waiting on the objects. objects
+            maps the name of each object (as given by
+            ``bluesky.utils.object_name``) to the same, per command. emit maps each stage of emitting a document
+            -- 'validate', 'scan_callbacks', and 'dispatch' -- to its
+            latency.
+            scan_callbacks maps the id of each blocking callback to the time
+            spent in it. dispatcher is ``RE.dispatcher.stats``.
+        """
+        objects = defaultdict(dict)
+        for (name, command), hist in list(self._object_stats.items()):
+            objects[name][command] = hist.to_dict()
+        timings = self._scan_cb_registry.timings
+        return {'commands': {command: hist.to_dict() for command, hist
+                             in list(self._command_stats.items())},
+                'objects': dict(objects),
+                'emit': {stage: hist.to_dict() for stage, hist
+                         in list(self._emit_stats.items())},
+                'scan_callbacks': {cid: timing.to_dict() for cid, timing
+                                   in list(timings.items())},
+                'dispatcher': self.dispatcher.stats}
+
+    def clear_stats(self):
+        "Discard the statistics recorded so far."
+        self._command_stats.clear()
+        self._object_stats.clear()
+        self._emit_stats.clear()
+        self._scan_cb_registry.timings.clear()
+        self.dispatcher.cb_registry.timings.clear()
+
+    def _record_command(self, msg, elapsed):
+        threshold = self._slow_command_threshold
+        if threshold is not None and elapsed > threshold:
+            self.slow_commands.append({'msg': msg, 'command': msg.command,
+                                       'obj': msg.obj, 'duration': elapsed,
+                                       'time': ttime.time()})
+            logger.warning("Slow message (%.3f s): %r", elapsed, msg)
+        if not self._record_stats:
+            return
+        self._command_stats[msg.command].add(elapsed)
+        if msg.obj is not None:
+            key = (object_name(msg.obj), msg.command)
+            self._object_stats[key].add(elapsed)
+        interval = self.stats_interval
+        if interval is not None:
+            now = self._loop.time()
+            if now - self._last_stats_report >= interval:
+                self._last_stats_report = now
+                logger.info("RunEngine stats: %r", self.stats)
 
     @property
     def ignore_callback_exceptions(self):
@@ -348,9 +561,26 @@ class RunEngine:
 
         If the RunEngine is currently paused, it will stay in the 'paused'
         state, and it will disallow resume() until all_is_well() is called.
+
+        This can be called from any thread.
         """
         self._panic = True
-        self._task.cancel()
+        if self.state.is_running:
+            self._exit_status = 'fail'
+            exc = PanicError("Something told the Run Engine to "
+                             "panic after the run began. "
+                             "Records were created, but the run "
+                             "was marked with "
+                             "exit_status='fail'.")
+            self._exception = exc  # will stop _run coroutine
+            self._yield_requested = True
+            # Interrupt whatever the run is waiting for.
+            self._loop.call_soon_threadsafe(self._cancel_task)
+
+    def _cancel_task(self):
+        # Cancel the run, unless it has already finished running.
+        if self.state.is_running and self._task is not None:
+            self._task.cancel()
 
     def all_is_well(self):
         """
@@ -359,9 +589,6 @@ class RunEngine:
         If the panic occurred during a pause, the run can be resumed.
         """
         self._panic = False
-        # The cycle where _check_for_trouble schedules a future call to itself
-        # is broken when it raises a PanicError.
-        loop.call_later(0.1, self._check_for_trouble)
 
     def request_pause(self, defer=False, name=None, callback=None):
         """
@@ -394,12 +621,14 @@ class RunEngine:
                                  "a name.")
             self._pause_requests[name] = callback
         # Now to the right pause state if we can.
+        self._yield_requested = True
         if not defer:
             if self.state.can_pause:
                 print("Pausing...")
                 self.state = 'paused'
-                if self.resumable:
-                    loop.stop()
+                if self._msg_cache is not None:
+                    # We have a checkpoint.
+                    self._stop_loop()
                 else:
                     print("No checkpoint; cannot pause. Aborting...")
                     self._exception = FailedPause()
@@ -462,9 +691,70 @@ class RunEngine:
         ...
         >>> RE(my_generator, subs={'event': print_data, 'stop': celebrate})
         """
-        # First thing's first: if we are in the wrong state, raise.
+        # Raise before making a task, which would otherwise be left to fail
+        # on a loop that the run in progress may still be using.
+        self._check_idle()
+        runner = self._loop.create_task(self.run(plan, subs, **metadata_kw))
+        self._blocking = True
+        self._runner = runner
+        return self._run_until_paused(runner)
+
+    def _run_until_paused(self, runner):
+        # Run the loop until runner finishes or the run pauses. A paused run
+        # waits in _run for resume, which calls this again.
+        self._paused = asyncio.Future(loop=self._loop)
+        with SignalHandler(signal.SIGINT,
+                           self._on_sigint) as self._sigint_handler:  # ^C
+            self._loop.run_until_complete(
+                asyncio.wait([runner, self._paused], loop=self._loop,
+                             return_when=asyncio.FIRST_COMPLETED))
+        if not runner.done():
+            return self._run_start_uids
+        if runner is self._runner:
+            self._blocking = False
+            self._runner = None
+        if runner.cancelled():
+            return self._run_start_uids
+        return runner.result()
+
+    @asyncio.coroutine
+    def run(self, plan, subs=None, **metadata_kw):
+        """Run the scan defined by ``plan`` as a task on the event loop
+
+        This coroutine is the asynchronous counterpart of calling the Run
+        Engine. It does not start or stop the event loop, so several Run
+        Engines sharing one loop can run plans concurrently, alongside
+        unrelated tasks. It takes the same arguments.
+
+        The caller is responsible for handling SIGINT (Ctrl+C). A pause
+        holds the task until ``resume()`` (or ``abort()``, or ``stop()``)
+        is called from another task, thread, or callback. Cancelling the
+        task aborts the run.
+
+        Returns
+        -------
+        uids : list
+            list of Header uids (a.k.a RunStart uids) of run(s)
+
+        Examples
+        --------
+        >>> RE1, RE2 = RunEngine(loop=loop), RunEngine(loop=loop)
+        >>> loop.run_until_complete(asyncio.gather(RE1.run(scan1),
+        ...                                        RE2.run(scan2)))
+        """
+        self._prepare_call(plan, subs, metadata_kw)
+        self._task = self._loop.create_task(self._run())
+        yield from self._task
+        return self._run_start_uids
+
+    def _check_idle(self):
         if not self.state.is_idle:
             raise RuntimeError("The RunEngine is in a %s state" % self.state)
+
+    def _prepare_call(self, plan, subs, metadata_kw):
+        # Common setup for __call__ and run.
+        # First thing's first: if we are in the wrong state, raise.
+        self._check_idle()
         if self._panic:
             raise PanicError("RunEngine is panicked. The run "
                              "was aborted before it began. No records "
@@ -499,15 +789,6 @@ class RunEngine:
             gen = (msg for msg in gen)
         self._genstack.append(gen)
         self._new_gen = True
-        with SignalHandler(signal.SIGINT) as self._sigint_handler:  # ^C
-            self._task = loop.create_task(self._run())
-            loop.run_forever()
-            if self._task.done() and not self._task.cancelled():
-                exc = self._task.exception()
-                if exc is not None:
-                    raise exc
-
-        return self._run_start_uids
 
     def resume(self):
         """Resume a run from the last checkpoint.
@@ -527,6 +808,11 @@ class RunEngine:
         if self._panic:
             raise PanicError("Run Engine is panicked. If are you sure all is "
                              "well, call the all_is_well() method.")
+        if self._msg_cache_overflowed:
+            raise RuntimeError("More than {0} messages were processed since "
+                               "the last checkpoint, so the run cannot be "
+                               "rewound and resumed. Use stop() or abort()."
+                               "".format(self.max_msg_cache_size))
 
         # This is needed to 'cancel' an open bundling (e.g. create) if
         # the pause happens after a 'checkpoint', after a 'create', but before
@@ -544,25 +830,45 @@ class RunEngine:
         if outstanding_requests:
             return outstanding_requests
 
-        self._genstack.append((msg for msg in list(self._msg_cache)))
+        self._rewind(list(self._msg_cache))
+        return self._resume_event_loop()
+
+    def _rewind(self, msgs):
+        # Replay msgs to retake the data since the last checkpoint.
+        self._genstack.append((msg for msg in msgs))
         self._new_gen = True
         self._msg_cache = deque()
         self._sequence_counters.clear()
-        self._sequence_counters.update(self._teed_sequence_counters)
-        self._resume_event_loop()
-        return self._run_start_uids
+        self._sequence_counters.update(self._sequence_counters_copy)
+        # The replay sends the sets and triggers still in flight again.
+        self._unwaited_msgs.clear()
+        # Objects may have been moved while we were paused or suspended.
+        self._last_readings.clear()
 
     def _resume_event_loop(self):
         # may be called by 'resume' or 'abort'
         self.state = 'running'
-        with SignalHandler(signal.SIGINT) as self._sigint_handler:  # ^C
-            if self._task.done():
-                return
-            loop.run_forever()
-            if self._task.done() and not self._task.cancelled():
-                exc = self._task.exception()
-                if exc is not None:
-                    raise exc
+        # Wake up the task, which waits for resume in _run.
+        self._loop.call_soon_threadsafe(self._wake_up)
+        if self._blocking:
+            # Run the loop for it again, until it finishes or pauses.
+            return self._run_until_paused(self._runner)
+        return self._run_start_uids
+
+    def _wake_up(self):
+        if self._resumed is not None and not self._resumed.done():
+            self._resumed.set_result(None)
+
+    def _stop_loop(self):
+        # Hand control back to the caller of __call__ or resume, which are
+        # blocked running the loop. With the async API, the loop keeps
+        # running. Either way, the paused task waits for resume in _run.
+        if self._blocking:
+            self._loop.call_soon_threadsafe(self._return_control)
+
+    def _return_control(self):
+        if self._paused is not None and not self._paused.done():
+            self._paused.set_result(None)
 
     def request_suspend(self, fut):
         """
@@ -572,18 +878,18 @@ class RunEngine:
         ----------
         fut : asyncio.Future
         """
-        if not self.resumable:
+        if self._msg_cache is None:
             print("No checkpoint; cannot suspend. Aborting...")
             self._exception = FailedPause()
+        elif self._msg_cache_overflowed:
+            print("Too many messages since the last checkpoint; cannot "
+                  "suspend. Pausing...")
+            self.request_pause()
         else:
             print("Suspending....To get prompt hit Ctrl-C to pause the scan")
             wait_msg = Msg('wait_for', [fut, ])
-            new_msg_lst = [wait_msg, ] + list(self._msg_cache)
-            self._sequence_counters.clear()
-            self._sequence_counters.update(self._teed_sequence_counters)
-            self._msg_cache = deque()
-            self._genstack.append((msg for msg in new_msg_lst))
-            self._new_gen = True
+            self._rewind([wait_msg, ] + list(self._msg_cache))
+        self._yield_requested = True
 
     def abort(self, reason=''):
         """
@@ -594,6 +900,7 @@ class RunEngine:
         print("Aborting....")
         self._reason = reason
         self._exception = RequestAbort()
+        self._yield_requested = True
         self._task.cancel()
         if self.state == 'paused':
             self._resume_event_loop()
@@ -603,6 +910,7 @@ class RunEngine:
             raise TransitionError("RunEngine is already idle.")
         print("Stopping...")
         self._exception = RequestStop()
+        self._yield_requested = True
         if self.state == 'paused':
             self._resume_event_loop()
 
@@ -610,17 +918,33 @@ class RunEngine:
     def _run(self):
         response = None
         self._reason = ''
+        last_yield = self._loop.time()
         try:
             while True:
                 try:
-                    # This 'yield from' must be here to ensure that this
-                    # coroutine breaks out of its current bevior before trying
-                    # to get the next message from the top of the generator
-                    # stack in case there has been a pause requested.
-                    # Without this the next message after the pause may be
-                    # processed first on resume (instead of the first
-                    # message in self._msg_cache).
-                    yield from asyncio.sleep(0.0001)
+                    # Yield to the event loop only if a pause, suspension, or
+                    # abort is pending or if we have not yielded for a while.
+                    # A pending request must break out of this coroutine
+                    # before it gets the next message from the top of the
+                    # generator stack. Otherwise, the next message after a
+                    # pause may be processed first on resume (instead of the
+                    # first message in self._msg_cache). The periodic yield
+                    # lets callbacks scheduled on the loop (e.g., by other
+                    # threads) run even if no command awaits anything.
+                    now = self._loop.time()
+                    if (self._yield_requested or
+                            now - last_yield > self.loop_yield_interval):
+                        self._yield_requested = False
+                        yield from asyncio.sleep(0)
+                        last_yield = self._loop.time()
+                    if self._sigint_hold is not None:
+                        # After a Ctrl+C, wait to see if we pause or abort.
+                        yield from asyncio.wait([self._sigint_hold])
+                    if self.state.is_paused:
+                        # Wait here for resume (or abort, or stop).
+                        self._resumed = asyncio.Future(loop=self._loop)
+                        yield from self._resumed
+                        self._resumed = None
                     if self._exception is not None:
                         raise self._exception
                     # Send last response;
@@ -638,20 +962,31 @@ class RunEngine:
                     if (self._msg_cache is not None and
                             msg.command not in self._UNCACHEABLE_COMMANDS):
                         # We have a checkpoint.
-                        self._msg_cache.append(msg)
+                        self._cache_msg(msg)
                     self._new_gen = False
                     coro = self._command_registry[msg.command]
                     logger.debug("Processing message %r", msg)
-                    self.debug("About to process: {0}, {1}".format(coro, msg))
-                    response = yield from coro(msg)
-                    self.debug('RE.state: ' + self.state)
-                    self.debug('msg: {}\n  response: {}'.format(msg, response))
+                    if self.verbose:
+                        self.debug("About to process: {0}, {1}"
+                                   "".format(coro, msg))
+                    if self._time_commands:
+                        start = ttime.perf_counter()
+                        response = yield from coro(msg)
+                        self._record_command(msg,
+                                             ttime.perf_counter() - start)
+                    else:
+                        response = yield from coro(msg)
+                    if self.verbose:
+                        self.debug('RE.state: ' + self.state)
+                        self.debug('msg: {}\n  response: {}'
+                                   ''.format(msg, response))
                 except KeyboardInterrupt:
                     # This only happens if some external code captures SIGINT
                     # -- overriding the RunEngine -- and then raises instead
                     # of (properly) calling the RunEngine's handler.
                     # See https://github.com/NSLS-II/bluesky/pull/242
-                    loop.call_soon(self.request_pause, False, 'SIGINT')
+                    self._loop.call_soon(self.request_pause, False, 'SIGINT')
+                    self._yield_requested = True
                     print(PAUSE_MSG)
         except (StopIteration, RequestStop):
             self._exit_status = 'success'
@@ -693,6 +1028,7 @@ class RunEngine:
                 except Exception:
                     logger.error("Failed to deconfigure %r", obj)
                 self._configured.remove(obj)
+                self.clear_describe_cache(obj)
             sys.stdout.flush()
             # Emit RunStop if necessary.
             if self._run_is_open:
@@ -701,56 +1037,80 @@ class RunEngine:
                 except Exception:
                     logger.error("Failed to close run %r", self._run_start_uid)
                     # Exceptions from the callbacks should be re-raised.
-                    # Close the loop first.
-                    for task in asyncio.Task.all_tasks(loop):
-                        task.cancel()
-                    loop.stop()
+                    # Clean up first.
+                    self._finish_loop()
                     raise
                 self._run_is_open = False
-            for task in asyncio.Task.all_tasks(loop):
-                task.cancel()
-            loop.stop()
-
-    def _check_for_trouble(self):
-        if self.state.is_running:
-            # Check for panic.
-            if self._panic:
-                self._exit_status = 'fail'
-                exc = PanicError("Something told the Run Engine to "
-                                 "panic after the run began. "
-                                 "Records were created, but the run "
-                                 "was marked with "
-                                 "exit_status='fail'.")
-                self._exception = exc  # will stop _run coroutine
-
-        loop.call_later(0.1, self._check_for_trouble)
+            self._finish_loop()
+
+    def _finish_loop(self):
+        # Cancel the waits on objects that this run left behind (e.g., if it
+        # was aborted while waiting). Other tasks on the loop are not ours.
+        for task in self._wait_tasks:
+            task.cancel()
+        self._wait_tasks.clear()
+        # Pages are flushed when the run closes; drop any left by a failure.
+        self._clear_event_pages()
+        for group in self._block_groups.values():
+            for coro in group:
+                coro.close()
+        self._block_groups.clear()
+        self._unwaited_msgs.clear()
+        # A finished plan cannot be rewound, and the next one starts afresh.
+        self._msg_cache = None
+        self._msg_cache_overflowed = False
+
+    def _on_sigint(self):
+        # Called by the signal handler. Defer the work to the event loop,
+        # waking it up if necessary.
+        self._loop.call_soon_threadsafe(self._handle_sigint)
+
+    def _handle_sigint(self):
+        # Called on the event loop for each SIGINT (Ctrl+C).
+        if not self.state.is_running:
+            return
+        if self._sigint_hold is None:
+            self.debug("RunEngine detected a SIGINT (Ctrl+C)")
+            # We know we will either pause or abort, so we can hold up the
+            # scan now (see _run). Pause in 0.5 seconds unless we catch a
+            # second SIGINT first, without blocking the event loop.
+            self._sigint_hold = asyncio.Future(loop=self._loop)
+            self._sigint_timer = self._loop.call_later(0.5,
+                                                       self._sigint_pause)
+            self._yield_requested = True
+        else:
+            self.debug("RunEngine detected as second SIGINT")
+            self._release_sigint_hold()
+            self.abort("SIGINT (Ctrl+C)")
 
-    def _check_for_signals(self):
-        # Check for pause requests from keyboard.
+    def _sigint_pause(self):
+        self._release_sigint_hold()
         if self.state.is_running:
-            if self._sigint_handler.interrupted:
-                self._sigint_handler.interrupted = False
-                with SignalHandler(signal.SIGINT) as second_sigint_handler:
-                    self.debug("RunEngine detected a SIGINT (Ctrl+C)")
-                    # We know we will either pause or abort, so we can
-                    # hold up the scan now. Wait until 0.5 seconds pass or
-                    # we catch a second SIGINT, whichever happens first.
-                    for i in range(10):
-                        ttime.sleep(0.05)
-                        if second_sigint_handler.interrupted:
-                            self.debug("RunEngine detected as second SIGINT")
-                            loop.call_soon(self.abort, "SIGINT (Ctrl+C)")
-                            break
-                    else:
-                        loop.call_soon(self.request_pause, False, 'SIGINT')
-                        print(PAUSE_MSG)
-
-        loop.call_later(0.1, self._check_for_signals)
+            self.request_pause(False, 'SIGINT')
+            print(PAUSE_MSG)
+
+    def _release_sigint_hold(self):
+        if self._sigint_timer is not None:
+            self._sigint_timer.cancel()
+            self._sigint_timer = None
+        if self._sigint_hold is not None:
+            if not self._sigint_hold.done():
+                self._sigint_hold.set_result(None)
+            self._sigint_hold = None
 
     @asyncio.coroutine
     def _wait_for(self, msg):
-        futs = msg.obj
-        yield from asyncio.wait(futs)
+        futs = []
+        for fut in msg.obj:
+            task = asyncio.ensure_future(fut, loop=self._loop)
+            if task is not fut:
+                # We wrapped a coroutine (e.g., a wait on a block group).
+                self._wait_tasks.add(task)
+            futs.append(task)
+        try:
+            yield from asyncio.wait(futs, loop=self._loop)
+        finally:
+            self._wait_tasks.difference_update(futs)
 
     @asyncio.coroutine
     def _open_run(self, msg):
@@ -759,7 +1119,7 @@ class RunEngine:
                                          "received before the 'open_run' "
                                          "message")
         self._clear_run_cache()
-        self._run_start_uid = new_uid()
+        self._run_start_uid = self.uid_factory()
         self._run_start_uids.append(self._run_start_uid)
 
         # Increment scan ID
@@ -789,9 +1149,10 @@ class RunEngine:
     @asyncio.coroutine
     def _close_run(self, msg):
         logger.debug("Stopping run %s", self._run_start_uid)
+        yield from self._flush_event_pages()
         self._run_is_open = False
         doc = dict(run_start=self._run_start_uid,
-                   time=ttime.time(), uid=new_uid(),
+                   time=ttime.time(), uid=self.uid_factory(),
                    exit_status=self._exit_status,
                    reason=self._reason)
         yield from self.emit(DocumentNames.stop, doc)
@@ -812,21 +1173,141 @@ class RunEngine:
     def _read(self, msg):
         obj = msg.obj
         self._objs_read.append(obj)
-        if obj not in self._describe_cache:
-            # Validate that there is no data key name collision.
-            data_keys = obj.describe()
-            keys = data_keys.keys()  # that is, field names
-            for known_obj, known_data_keys in self._describe_cache.items():
-                known_keys = known_data_keys.keys()  # that is, field names
-                if set(known_keys) & set(keys):
-                    raise ValueError("Data keys (field names) from {0!r} "
-                                     "collide with those from {1!r}"
-                                     "".format(obj, known_obj))
-            self._describe_cache[obj] = data_keys
+        self._describe(obj)
         ret = obj.read(*msg.args, **msg.kwargs)
         self._read_cache.append(ret)
+        self._last_readings[obj] = ret
         return ret
 
+    @asyncio.coroutine
+    def _read_many(self, msg):
+        """
+        Read several objects concurrently and return the merged readings.
+
+        Expected message object is:
+
+            Msg('read_many', None, objs, *args, **kwargs)
+
+        The objects are read on a thread pool, so the time it takes is that
+        of the slowest read, not the sum of them. Any further arguments are
+        passed to the read method of each object. The readings are added to
+        the current Event in the order of objs.
+        """
+        objs = list(msg.args[0])
+        args = msg.args[1:]
+        for obj in objs:
+            self._describe(obj)
+        if len(objs) == 1:
+            readings = [objs[0].read(*args, **msg.kwargs)]
+        else:
+            readings = yield from asyncio.gather(
+                *[self._loop.run_in_executor(
+                    None, partial(obj.read, *args, **msg.kwargs))
+                  for obj in objs])
+        ret = {}
+        for obj, reading in zip(objs, readings):
+            self._objs_read.append(obj)
+            self._read_cache.append(reading)
+            self._last_readings[obj] = reading
+            ret.update(reading)
+        return ret
+
+    @asyncio.coroutine
+    def _read_last(self, msg):
+        """
+        Add the last reading of an object to the current Event.
+
+        Expected message object is:
+
+            Msg('read_last', obj, timestamps='original')
+
+        If obj was read earlier in this run and has not been set or
+        triggered since, its last reading is reused without reading it
+        again. Otherwise, it is read as it would be by 'read'. The
+        timestamps of a reused reading are those of the original reading
+        if timestamps='original' (the default) or the current time if
+        timestamps='now'.
+        """
+        obj = msg.obj
+        policy = msg.kwargs.get('timestamps', 'original')
+        if policy not in ('original', 'now'):
+            raise ValueError("timestamps must be 'original' or 'now', not "
+                             "{0!r}".format(policy))
+        try:
+            reading = self._last_readings[obj]
+        except KeyError:
+            return (yield from self._read(Msg('read', obj)))
+        if policy == 'now':
+            now = ttime.time()
+            reading = {key: dict(val, timestamp=now)
+                       for key, val in reading.items()}
+        self._objs_read.append(obj)
+        self._read_cache.append(reading)
+        return reading
+
+    def _describe(self, obj):
+        # Note the data keys of obj the first time it is read in this run,
+        # checking that they are new.
+        if obj in self._run_data_keys:
+            return
+        data_keys = self._cached_describe(obj)
+        # Validate that there is no data key name collision.
+        index = self._data_key_index
+        for key in data_keys:  # that is, field names
+            known_obj = index.get(key, obj)
+            if known_obj is not obj:
+                raise ValueError("Data keys (field names) from {0!r} "
+                                 "collide with those from {1!r}"
+                                 "".format(obj, known_obj))
+        for key in data_keys:
+            index[key] = obj
+        self._run_data_keys[obj] = data_keys
+
+    def _cached_describe(self, obj):
+        # Call obj.describe() only if it is not cached or if the cached
+        # output is from an older describe_version of obj.
+        version = getattr(obj, 'describe_version', None)
+        cache = self._describe_cache_for(obj)
+        try:
+            cached_version, data_keys = cache[obj]
+        except KeyError:
+            pass
+        else:
+            if cached_version == version:
+                return data_keys
+        data_keys = obj.describe()
+        cache[obj] = (version, data_keys)
+        return data_keys
+
+    def _describe_cache_for(self, obj):
+        try:
+            ref(obj)
+        except TypeError:
+            # These are held until clear_describe_cache.
+            return self._strong_describe_cache
+        return self._describe_cache
+
+    def clear_describe_cache(self, obj=None):
+        """
+        Forget the cached output of describe() so it is called again.
+
+        The Run Engine caches the output of each object's describe() method
+        across runs. The cache entry of an object is discarded when the
+        object is configured or deconfigured, or when its
+        ``describe_version`` attribute (if any) changes. Call this method if
+        the data keys of an object may have changed in some other way.
+
+        Parameters
+        ----------
+        obj : object, optional
+            If None (the default), forget all objects.
+        """
+        if obj is None:
+            self._describe_cache.clear()
+            self._strong_describe_cache.clear()
+        else:
+            self._describe_cache_for(obj).pop(obj, None)
+
     @asyncio.coroutine
     def _save(self, msg):
         if not self._bundling:
@@ -841,9 +1322,9 @@ class RunEngine:
         if objs_read not in self._descriptor_uids:
             # We don't not have an Event Descriptor for this set.
             data_keys = {}
-            [data_keys.update(self._describe_cache[obj]) for obj in objs_read]
+            [data_keys.update(self._run_data_keys[obj]) for obj in objs_read]
             _fill_missing_fields(data_keys)  # TODO Move this to ophyd/controls
-            descriptor_uid = new_uid()
+            descriptor_uid = self.uid_factory()
             doc = dict(run_start=self._run_start_uid, time=ttime.time(),
                        data_keys=data_keys, uid=descriptor_uid)
             yield from self.emit(DocumentNames.descriptor, doc)
@@ -851,38 +1332,101 @@ class RunEngine:
             self._descriptor_uids[objs_read] = descriptor_uid
         else:
             descriptor_uid = self._descriptor_uids[objs_read]
-        # This is a separate check because it can be reset on resume.
-        if objs_read not in self._sequence_counters:
-            self._sequence_counters[objs_read] = count(1)
         self._bundling = False
 
         # Events
-        seq_num = next(self._sequence_counters[objs_read])
-        event_uid = new_uid()
-        # Merge list of readings into single dict.
-        readings = {k: v for d in self._read_cache for k, v in d.items()}
-        for key in readings:
-            readings[key]['value'] = _sanitize_np(readings[key]['value'])
-        data, timestamps = _rearrange_into_parallel_dicts(readings)
+        # The counter may be missing because it can be reset on resume.
+        seq_num = self._sequence_counters.get(objs_read, 0) + 1
+        self._sequence_counters[objs_read] = seq_num
+        event_uid = self.uid_factory()
+        # Merge list of readings into data and timestamps dicts.
+        data, timestamps = _rearrange_into_parallel_dicts(self._read_cache,
+                                                          self.keep_arrays)
         doc = dict(descriptor=descriptor_uid,
                    time=ttime.time(), data=data, timestamps=timestamps,
                    seq_num=seq_num, uid=event_uid)
-        yield from self.emit(DocumentNames.event, doc)
-        self.debug("*** Emitted Event:\n%s" % doc)
+        if self.event_pages:
+            yield from self._add_to_event_page(doc)
+        else:
+            yield from self.emit(DocumentNames.event, doc)
+            if self.verbose:
+                self.debug("*** Emitted Event:\n%s" % doc)
+
+    @asyncio.coroutine
+    def _add_to_event_page(self, doc):
+        descriptor_uid = doc['descriptor']
+        try:
+            page, first_time, timer = self._event_pages[descriptor_uid]
+        except KeyError:
+            page = dict(descriptor=descriptor_uid, uid=[], time=[],
+                        seq_num=[], data={k: [] for k in doc['data']},
+                        timestamps={k: [] for k in doc['timestamps']})
+            first_time = doc['time']
+            # Emit the page on time even if no more Events come for it.
+            timer = self._loop.call_later(self.event_page_timeout,
+                                          self._event_page_timed_out,
+                                          descriptor_uid)
+            self._event_pages[descriptor_uid] = (page, first_time, timer)
+        page['uid'].append(doc['uid'])
+        page['time'].append(doc['time'])
+        page['seq_num'].append(doc['seq_num'])
+        for key, value in doc['data'].items():
+            page['data'][key].append(value)
+        for key, value in doc['timestamps'].items():
+            page['timestamps'][key].append(value)
+        if (len(page['uid']) >= self.event_page_size or
+                doc['time'] - first_time >= self.event_page_timeout):
+            del self._event_pages[descriptor_uid]
+            timer.cancel()
+            yield from self._join_event_page_task()
+            yield from self._emit_event_page(page)
+
+    def _event_page_timed_out(self, descriptor_uid):
+        "Emit a page that has waited event_page_timeout seconds for Events."
+        page, first_time, timer = self._event_pages.pop(descriptor_uid)
+        # Chain the emits so that the pages go out in order.
+        self._event_page_task = self._loop.create_task(
+            self._emit_event_page(page, after=self._event_page_task))
+
+    @asyncio.coroutine
+    def _join_event_page_task(self):
+        "Wait for the timed-out pages to be emitted, and raise their errors."
+        task, self._event_page_task = self._event_page_task, None
+        if task is not None:
+            yield from task
+
+    @asyncio.coroutine
+    def _emit_event_page(self, page, after=None):
+        if after is not None:
+            yield from after
+        yield from self.emit(DocumentNames.event_page, page)
+        if self.verbose:
+            self.debug("*** Emitted Event Page:\n%s" % page)
+
+    @asyncio.coroutine
+    def _flush_event_pages(self):
+        "Emit every partially filled Event Page."
+        yield from self._join_event_page_task()
+        while self._event_pages:
+            descriptor_uid, (page, first_time, timer) = (
+                self._event_pages.popitem(last=False))
+            timer.cancel()
+            yield from self._emit_event_page(page)
 
     @asyncio.coroutine
     def _kickoff(self, msg):
         obj = msg.obj
         self._uncollected.add(obj)
-        block_group = msg.kwargs.pop('block_group', None)
+        kwargs = dict(msg.kwargs)
+        block_group = kwargs.pop('block_group', None)
         self._movable_objs_touched.add(obj)
-        ret = obj.kickoff(*msg.args, **msg.kwargs)
+        ret = obj.kickoff(*msg.args, **kwargs)
 
         if block_group:
-            p_event = asyncio.Event()
+            p_event = asyncio.Event(loop=self._loop)
 
             def done_callback():
-                loop.call_soon_threadsafe(p_event.set)
+                self._loop.call_soon_threadsafe(p_event.set)
 
             ret.finished_cb = done_callback
             self._block_groups[block_group].add(p_event.wait())
@@ -891,44 +1435,73 @@ class RunEngine:
 
     @asyncio.coroutine
     def _collect(self, msg):
+        """
+        Collect data from a flyer and emit it in 'bulk_events' documents.
+
+        The data is emitted in chunks of at most ``collect_chunk_size``
+        Events as the flyer's ``collect()`` generator produces them.
+
+        Expected message object is:
+
+            Msg('collect', flyer, partial=False)
+
+        If partial is True, the flyer is collected while it is still running,
+        and it must be collected again (not partially) before the run ends.
+        Flyers that support this accept a ``partial=True`` keyword argument in
+        their ``collect`` method and yield only the data acquired since the
+        previous collection.
+        """
         obj = msg.obj
+        partial = msg.kwargs.get('partial', False)
         data_keys_list = obj.describe()
-        bulk_data = {}
         for data_keys in data_keys_list:
             objs_read = frozenset(data_keys)
             if objs_read not in self._descriptor_uids:
                 # We don't not have an Event Descriptor for this set.
-                descriptor_uid = new_uid()
+                descriptor_uid = self.uid_factory()
                 doc = dict(run_start=self._run_start_uid, time=ttime.time(),
                            data_keys=data_keys, uid=descriptor_uid)
                 yield from self.emit(DocumentNames.descriptor, doc)
                 self.debug("Emitted Event Descriptor:\n%s" % doc)
                 self._descriptor_uids[objs_read] = descriptor_uid
-                self._sequence_counters[objs_read] = count(1)
-            else:
-                descriptor_uid = self._descriptor_uids[objs_read]
-
-            bulk_data[descriptor_uid] = []
+                self._sequence_counters[objs_read] = 0
 
-        for ev in obj.collect():
+        if partial:
+            events = obj.collect(partial=True)
+        else:
+            events = obj.collect()
+        chunk_size = self.collect_chunk_size
+        keep_arrays = self.keep_arrays
+        bulk_data = defaultdict(list)
+        num_events = 0
+        for ev in events:
             objs_read = frozenset(ev['data'])
-            seq_num = next(self._sequence_counters[objs_read])
+            seq_num = self._sequence_counters.get(objs_read, 0) + 1
+            self._sequence_counters[objs_read] = seq_num
             descriptor_uid = self._descriptor_uids[objs_read]
-            event_uid = new_uid()
+            event_uid = self.uid_factory()
 
-            reading = ev['data']
-            for key in ev['data']:
-                reading[key] = _sanitize_np(reading[key])
-            ev['data'] = reading
+            ev['data'] = {key: _sanitize_np(val, keep_arrays)
+                          for key, val in ev['data'].items()}
             ev['descriptor'] = descriptor_uid
             ev['seq_num'] = seq_num
             ev['uid'] = event_uid
 
             bulk_data[descriptor_uid].append(ev)
-
-        yield from self.emit(DocumentNames.bulk_events, bulk_data)
-        self.debug("Emitted bulk events")
-        self._uncollected.remove(msg.obj)
+            num_events += 1
+            if num_events >= chunk_size:
+                yield from self.emit(DocumentNames.bulk_events,
+                                     dict(bulk_data))
+                self.debug("Emitted bulk events")
+                # Consumers may hold on to the emitted dict; start a new one.
+                bulk_data = defaultdict(list)
+                num_events = 0
+
+        if num_events:
+            yield from self.emit(DocumentNames.bulk_events, dict(bulk_data))
+            self.debug("Emitted bulk events")
+        if not partial:
+            self._uncollected.remove(msg.obj)
 
     @asyncio.coroutine
     def _null(self, msg):
@@ -936,35 +1509,42 @@ class RunEngine:
 
     @asyncio.coroutine
     def _set(self, msg):
-        block_group = msg.kwargs.pop('block_group', None)
+        # Leave msg as it is, in case it is replayed.
+        kwargs = dict(msg.kwargs)
+        block_group = kwargs.pop('block_group', None)
         self._movable_objs_touched.add(msg.obj)
-        ret = msg.obj.set(*msg.args, **msg.kwargs)
+        self._last_readings.pop(msg.obj, None)
+        ret = msg.obj.set(*msg.args, **kwargs)
         if block_group:
-            p_event = asyncio.Event()
+            p_event = asyncio.Event(loop=self._loop)
 
             def done_callback():
-                loop.call_soon_threadsafe(p_event.set)
+                self._loop.call_soon_threadsafe(p_event.set)
                 self.debug("The object %r reports set is done." % msg.obj)
 
             ret.finished_cb = done_callback
             self._block_groups[block_group].add(p_event.wait())
+            self._unwaited_msgs.append((block_group, msg, ret, False))
 
         return ret
 
     @asyncio.coroutine
     def _trigger(self, msg):
-        block_group = msg.kwargs.pop('block_group', None)
-        ret = msg.obj.trigger(*msg.args, **msg.kwargs)
+        kwargs = dict(msg.kwargs)
+        block_group = kwargs.pop('block_group', None)
+        self._last_readings.pop(msg.obj, None)
+        ret = msg.obj.trigger(*msg.args, **kwargs)
 
         if block_group:
-            p_event = asyncio.Event()
+            p_event = asyncio.Event(loop=self._loop)
 
             def done_callback():
-                loop.call_soon_threadsafe(p_event.set)
+                self._loop.call_soon_threadsafe(p_event.set)
                 self.debug("The object %r reports trigger is done." % msg.obj)
 
             ret.finished_cb = done_callback
             self._block_groups[block_group].add(p_event.wait())
+            self._unwaited_msgs.append((block_group, msg, ret, False))
 
         return ret
 
@@ -974,6 +1554,8 @@ class RunEngine:
         # triggered with the keyword argument `block=group` is done.
         group = msg.kwargs.get('group', msg.args[0])
         objs = list(self._block_groups.pop(group, []))
+        self._unwaited_msgs = [item for item in self._unwaited_msgs
+                               if item[0] != group]
         if objs:
             yield from self._wait_for(Msg('wait_for', objs))
 
@@ -985,23 +1567,53 @@ class RunEngine:
     def _pause(self, msg):
         self.request_pause(*msg.args, **msg.kwargs)
 
+    def _cache_msg(self, msg):
+        # Remember msg so it can be replayed on resume, unless the cache is
+        # full, in which case we give up rewinding to the last checkpoint.
+        if self._msg_cache_overflowed:
+            return
+        max_size = self.max_msg_cache_size
+        if max_size is not None and len(self._msg_cache) >= max_size:
+            warnings.warn("More than {0} messages since the last checkpoint. "
+                          "The run cannot be resumed if it is paused or "
+                          "suspended before the next checkpoint."
+                          "".format(max_size))
+            self._msg_cache.clear()
+            self._msg_cache_overflowed = True
+        else:
+            self._msg_cache.append(msg)
+
     @asyncio.coroutine
     def _checkpoint(self, msg):
         if self._bundling:
             raise IllegalMessageSequence("Cannot 'checkpoint' after 'create' "
                                          "and before 'save'. Aborting!")
+        yield from self._flush_event_pages()
+        # Sets and triggers still in flight were sent before this checkpoint,
+        # but the plan waits for them after it, so a rewind to here must send
+        # them again. (Pipelined scans start the next move this way.) A set
+        # or trigger that is done and was kept through an earlier checkpoint
+        # as well is not being waited for; it is forgotten.
+        self._unwaited_msgs = [
+            (group, msg, status, True)
+            for group, msg, status, kept in self._unwaited_msgs
+            if not (kept and getattr(status, 'done', False))]
         self._msg_cache = deque()
+        self._msg_cache_overflowed = False
+        for group, msg, status, kept in self._unwaited_msgs:
+            self._cache_msg(msg)
 
         # Keep a safe separate copy of the sequence counters to use if we
         # rewind and retake some data points.
-        for key, counter in list(self._sequence_counters.items()):
-            counter_copy1, counter_copy2 = tee(counter)
-            self._sequence_counters[key] = counter_copy1
-            self._teed_sequence_counters[key] = counter_copy2
+        self._sequence_counters_copy.clear()
+        self._sequence_counters_copy.update(self._sequence_counters)
 
         if self._deferred_pause_requested:
+            # Pause once; a later checkpoint should not pause again.
+            self._deferred_pause_requested = False
             self.state = 'paused'
-            loop.stop()
+            self._yield_requested = True
+            self._stop_loop()
 
     @asyncio.coroutine
     def _logbook(self, msg):
@@ -1033,6 +1645,7 @@ class RunEngine:
         if not hasattr(obj, 'configure'):
             return None
         self._configured.add(obj)  # add first in case of failure below
+        self.clear_describe_cache(obj)
         return obj.configure(kwargs.get('state'))
 
     @asyncio.coroutine
@@ -1046,6 +1659,7 @@ class RunEngine:
         # TODO Address this in Message validation.
         result = obj.deconfigure()
         self._configured.remove(obj)
+        self.clear_describe_cache(obj)
         return result
 
     @asyncio.coroutine
@@ -1064,15 +1678,46 @@ class RunEngine:
     @asyncio.coroutine
     def emit(self, name, doc):
         "Process blocking callbacks and schedule non-blocking callbacks."
-        jsonschema.validate(doc, schemas[name])
+        record_stats = self._record_stats
+        if record_stats:
+            start = ttime.perf_counter()
+        self._validate(name, doc)
+        if record_stats:
+            start = self._record_emit_stage('validate', start)
         self._scan_cb_registry.process(name, name.name, doc)
-        if name != DocumentNames.event:
+        if record_stats:
+            start = self._record_emit_stage('scan_callbacks', start)
+        if name not in _QUEUED_DOCUMENTS:
+            # Let queued Events reach the subscriptions first to keep order.
+            if not self.dispatcher.idle:
+                yield from self._loop.run_in_executor(None,
+                                                      self.dispatcher.join)
             self.dispatcher.process(name, doc)
             logger.info("Emitting %s document: %r", name.name, doc)
-        else:
-            start_time = loop.time()
-            dummy = expiring_function(self.dispatcher.process, name, doc)
-            loop.run_in_executor(None, dummy, start_time, self.event_timeout)
+        elif not self.dispatcher.put_nowait(name, doc):
+            # The queue is full and the policy is 'block'. Wait for room.
+            yield from self._loop.run_in_executor(None, self.dispatcher.put,
+                                                  name, doc)
+        if record_stats:
+            self._record_emit_stage('dispatch', start)
+
+    def _record_emit_stage(self, stage, start):
+        now = ttime.perf_counter()
+        self._emit_stats[stage].add(now - start)
+        return now
+
+    def _validate(self, name, doc):
+        "Check doc against its schema, according to the validation mode."
+        mode = self._validation
+        if mode == 'off':
+            return
+        if mode == 'sampled' and name == DocumentNames.event:
+            descriptor = doc['descriptor']
+            counter = self._validation_counters.get(descriptor, 0)
+            self._validation_counters[descriptor] = counter + 1
+            if counter % self.validation_sample_interval:
+                return
+        schema_validators[name].validate(doc)
 
     def debug(self, msg):
         "Print if the verbose attribute is True."
@@ -1080,18 +1725,146 @@ class RunEngine:
             print(msg)
 
 
+DISPATCH_POLICIES = ('block', 'drop_oldest', 'coalesce')
+_QUEUED_DOCUMENTS = (DocumentNames.event, DocumentNames.event_page)
+LANES = ('thread', 'main')
+
+
 class Dispatcher:
-    """Dispatch documents to user-defined consumers on the main thread."""
+    """
+    Dispatch documents to user-defined consumers.
 
-    def __init__(self):
-        self.cb_registry = CallbackRegistry(allowed_sigs=DocumentNames)
+    Start, Descriptor, and Stop documents are processed on the main thread.
+    Events and Event Pages are put on a bounded FIFO queue and processed, in
+    order, by a dedicated worker thread. Before any other document is
+    processed, the queue is drained so that every consumer sees documents in
+    order.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        maximum number of Events waiting in the queue; 1000 by default
+    policy : {'block', 'drop_oldest', 'coalesce'}, optional
+        what to do with a new Event when the queue is full:
+
+        - 'block' (default): make the scan wait until there is room
+        - 'drop_oldest': discard the oldest waiting Event
+        - 'coalesce': replace the newest waiting Event with the new one,
+          so that consumers always get the most recent data
+
+        Discarded and replaced Events are counted in ``stats['dropped']``.
+    loop : BaseEventLoop, optional
+        The event loop that processes the queues of subscriptions in the
+        'main' lane
+    record_timing : bool, optional
+        If True, time each subscription for ``stats['callbacks']``. The
+        RunEngine turns this on and off along with ``RE.record_stats``.
+    """
+    def __init__(self, *, maxsize=1000, policy='block', loop=None,
+                 record_timing=False):
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self.cb_registry = CallbackRegistry(allowed_sigs=DocumentNames,
+                                            record_timing=record_timing)
         self._counter = count()
         self._token_mapping = dict()
+        self._queue = _EventQueue(self.process, maxsize, 'block')
+        self._lanes = dict()  # public token -> queue of a separate lane
+        self.policy = policy
 
     def process(self, name, doc):
         self.cb_registry.process(name, name.name, doc)
 
-    def subscribe(self, name, func):
+    @property
+    def maxsize(self):
+        return self._queue.maxsize
+
+    @maxsize.setter
+    def maxsize(self, val):
+        self._queue.maxsize = val
+
+    @property
+    def policy(self):
+        return self._queue.policy
+
+    @policy.setter
+    def policy(self, val):
+        if val not in DISPATCH_POLICIES:
+            raise ValueError("policy must be one of {0}"
+                             "".format(DISPATCH_POLICIES))
+        self._queue.policy = val
+
+    @property
+    def idle(self):
+        "True if no Events are waiting or being processed"
+        return self._queue.idle
+
+    def put_nowait(self, name, doc):
+        """
+        Queue a document for the worker thread without blocking.
+
+        Returns False, leaving the document unqueued, if the queue is full
+        and the policy is 'block'.
+        """
+        return self._queue.put(name, doc, block=False)
+
+    def put(self, name, doc):
+        "Queue a document for the worker thread, waiting for room if needed."
+        self._queue.put(name, doc, block=True)
+
+    def join(self, lanes=False):
+        """
+        Block until every queued Event has been processed.
+
+        Parameters
+        ----------
+        lanes : bool, optional
+            If True, also wait for the subscriptions that have their own
+            lanes to process every document queued for them.
+        """
+        self._queue.join()
+        if lanes:
+            for lane in list(self._lanes.values()):
+                lane.join()
+
+    @property
+    def stats(self):
+        """
+        A snapshot of the dispatch metrics
+
+        Returns
+        -------
+        stats : dict
+            queue_depth, max_queue_depth, processed, dropped, and latency
+            (time between queueing an Event and processing it) summarize the
+            Event queue. callbacks maps the token of each subscription that
+            has been called while record_timing was on to the count, total,
+            mean and max time (in seconds) spent in it. For subscriptions
+            with their own lane, that is only the time spent queueing
+            documents; lanes maps their tokens to the metrics of their own
+            queues.
+        """
+        stats = self._queue.stats()
+        timings = self.cb_registry.timings
+        callbacks = {}
+        for public_token, private_tokens in self._token_mapping.items():
+            total = CallbackTiming()
+            for private_token in private_tokens:
+                timing = timings.get(private_token)
+                if timing is not None:
+                    total.count += timing.count
+                    total.total += timing.total
+                    total.max = max(total.max, timing.max)
+            if total.count:
+                callbacks[public_token] = total.to_dict()
+        stats['callbacks'] = callbacks
+        stats['lanes'] = {token: lane.stats()
+                          for token, lane in list(self._lanes.items())}
+        return stats
+
+    def subscribe(self, name, func, *, lane=None, maxsize=1000,
+                  policy='block'):
         """
         Register a function to consume documents.
 
@@ -1104,25 +1877,50 @@ class Dispatcher:
         name: {'start', 'descriptor', 'event', 'stop', 'all'}
         func: callable
             expecting signature like ``f(mongoengine.Document)``
+        lane : {None, 'thread', 'main'}, optional
+            By default, func is called along with all the other
+            subscriptions, so a slow func delays the others. Use 'thread' to
+            give func its own worker thread and queue, or 'main' to give it
+            its own queue processed by the event loop on the main thread.
+            Either way, func sees documents in order.
+        maxsize : int, optional
+            maximum number of documents waiting in the lane's queue
+        policy : {'block', 'drop_oldest', 'coalesce'}, optional
+            what the lane does with a new document when its queue is full;
+            see ``Dispatcher``
 
         Returns
         -------
         token : int
             an integer token that can be used to unsubscribe
         """
+        if lane is not None:
+            if lane not in LANES:
+                raise ValueError("lane must be one of {0}".format(LANES))
+            if policy not in DISPATCH_POLICIES:
+                raise ValueError("policy must be one of {0}"
+                                 "".format(DISPATCH_POLICIES))
+            lane_name = 'bluesky-lane-{0!r}'.format(func)
+            if lane == 'thread':
+                func = _EventQueue(func, maxsize, policy, name=lane_name)
+            else:
+                func = _LoopQueue(func, maxsize, policy, name=lane_name,
+                                  loop=self._loop)
+
         if name == 'all':
             private_tokens = []
             for key in DocumentNames:
                 private_tokens.append(self.cb_registry.connect(key, func))
             public_token = next(self._counter)
             self._token_mapping[public_token] = private_tokens
-            return public_token
-
-        if name not in DocumentNames:
-            name = DocumentNames[name]
-        private_token = self.cb_registry.connect(name, func)
-        public_token = next(self._counter)
-        self._token_mapping[public_token] = [private_token]
+        else:
+            if name not in DocumentNames:
+                name = DocumentNames[name]
+            private_token = self.cb_registry.connect(name, func)
+            public_token = next(self._counter)
+            self._token_mapping[public_token] = [private_token]
+        if lane is not None:
+            self._lanes[public_token] = func
         return public_token
 
     def unsubscribe(self, token):
@@ -1136,6 +1934,9 @@ class Dispatcher:
         """
         for private_token in self._token_mapping[token]:
             self.cb_registry.disconnect(private_token)
+        lane = self._lanes.pop(token, None)
+        if lane is not None:
+            lane.close()
 
     def unsubscribe_all(self):
         """Unregister ALL callbacks from the dispatcher
@@ -1152,25 +1953,245 @@ class Dispatcher:
         self.cb_registry.ignore_exceptions = val
 
 
+class _EventQueue:
+    """
+    A bounded FIFO of documents, processed in order by one worker thread.
+
+    The thread is started when the first document is queued.
+    """
+    def __init__(self, process, maxsize, policy, *, name='bluesky-dispatcher'):
+        self.process = process
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+        self._items = deque()
+        self._busy = False  # worker is processing an item off the queue
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._max_depth = 0
+        self._processed = 0
+        self._dropped = 0
+        self._latency = CallbackTiming()
+
+    @property
+    def idle(self):
+        return not (self._items or self._busy)
+
+    def __call__(self, name, doc):
+        "Queue a document, as a subscription of the Dispatcher."
+        # Only Events may be dropped; other documents always wait for room.
+        self.put(name, doc, droppable=(name in ('event', 'event_page')))
+
+    def put(self, name, doc, block=True, droppable=True):
+        item = (name, doc, ttime.perf_counter(), droppable)
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if droppable and self._make_room():
+                    self._dropped += 1
+                elif block or not droppable:
+                    self._cond.wait_for(
+                        lambda: len(self._items) < self.maxsize)
+                else:
+                    return False
+            self._items.append(item)
+            self._max_depth = max(self._max_depth, len(self._items))
+            self._start()
+            self._cond.notify_all()
+        return True
+
+    def join(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.idle)
+
+    def close(self):
+        "Stop the worker once the documents already queued are processed."
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {'queue_depth': len(self._items),
+                    'max_queue_depth': self._max_depth,
+                    'processed': self._processed,
+                    'dropped': self._dropped,
+                    'latency': self._latency.to_dict()}
+
+    def _make_room(self):
+        # Called with the lock held. Discard an item, if the policy allows.
+        items = self._items
+        if self.policy == 'drop_oldest':
+            for i, item in enumerate(items):
+                if item[-1]:
+                    del items[i]
+                    return True
+        elif self.policy == 'coalesce':
+            if items and items[-1][-1]:
+                items.pop()
+                return True
+        return False
+
+    def _start(self):
+        # Called with the lock held whenever a document is queued.
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work,
+                                            name=self.name, daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._items or self._closed)
+                if not self._items:
+                    return
+                # Mark busy before popping so that idle is never briefly True.
+                self._busy = True
+                item = self._items.popleft()
+                self._cond.notify_all()
+            self._process_item(*item)
+
+    def _process_item(self, name, doc, queued_at, droppable):
+        try:
+            self.process(name, doc)
+        except Exception:
+            logger.exception("Exception processing %r document", name)
+        finally:
+            with self._cond:
+                self._busy = False
+                self._processed += 1
+                self._latency.add(ttime.perf_counter() - queued_at)
+                self._cond.notify_all()
+
+
+class _LoopQueue(_EventQueue):
+    """
+    A bounded FIFO of documents, processed in order by the event loop.
+
+    Documents queued from the main thread, where the event loop runs, are
+    processed immediately, after any documents queued before them.
+    """
+    def __init__(self, *args, loop=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self._scheduled = False
+
+    def put(self, name, doc, block=True, droppable=True):
+        if threading.current_thread() is not threading.main_thread():
+            return super().put(name, doc, block, droppable)
+        self._drain()
+        with self._cond:
+            self._busy = True
+        self._process_item(name, doc, ttime.perf_counter(), droppable)
+        return True
+
+    def join(self):
+        if threading.current_thread() is threading.main_thread():
+            self._drain()
+        else:
+            super().join()
+
+    def _start(self):
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._cond:
+                if not self._items:
+                    self._scheduled = False
+                    return
+                self._busy = True
+                item = self._items.popleft()
+                self._cond.notify_all()
+            self._process_item(*item)
+
+
 def new_uid():
     return str(uuid.uuid4())
 
 
-def _sanitize_np(val):
-    "Convert any numpy objects into built-in Python types."
-    if isinstance(val, np.generic):
-        if np.isscalar(val):
-            return val.item()
-        return val.tolist()
-    return val
+class SequentialUIDFactory:
+    """
+    Generate unique ids like new_uid, but much faster
+
+    Each id is the first 24 characters of a random uuid4, shared by all the
+    ids from this factory, followed by a 12-digit hexadecimal counter in
+    place of the last (random) field of the uuid4. The ids have the same
+    format as those from new_uid. When the counter runs out, a new random
+    prefix is drawn.
+
+    Examples
+    --------
+    >>> RE.uid_factory = SequentialUIDFactory()
+    """
+    _MAX_COUNT = 16**12
+
+    def __init__(self):
+        self._new_prefix()
+
+    def _new_prefix(self):
+        self._prefix = new_uid()[:24]
+        self._counter = count()
 
+    def __call__(self):
+        n = next(self._counter)
+        if n >= self._MAX_COUNT:
+            self._new_prefix()
+            n = next(self._counter)
+        return '%s%012x' % (self._prefix, n)
 
-def _rearrange_into_parallel_dicts(readings):
+
+_NP_TYPES = (np.ndarray, np.generic)
+# Making a read-only view costs about as much as converting an array of this
+# many elements to a list (see benchmarks/bench_event_builder.py).
+_KEEP_ARRAYS_MIN_SIZE = 100
+
+
+def _sanitize_np(val, keep_arrays=False):
+    """
+    Convert any numpy objects into built-in Python types.
+
+    Scalars and 0-d arrays become Python scalars. Other arrays become
+    (nested) lists or, if keep_arrays is True, read-only views. Even then,
+    arrays of fewer than _KEEP_ARRAYS_MIN_SIZE elements become lists, which
+    is faster.
+    """
+    if not isinstance(val, _NP_TYPES):
+        return val
+    if keep_arrays and val.ndim and val.size >= _KEEP_ARRAYS_MIN_SIZE:
+        if val.flags.writeable:
+            val = val.view()
+            val.flags.writeable = False
+        return val
+    return val.tolist()  # a Python scalar if val is a scalar or 0-d
+
+
+def _rearrange_into_parallel_dicts(readings, keep_arrays=False):
+    """
+    Merge readings into parallel data and timestamps dicts in one pass.
+
+    Parameters
+    ----------
+    readings : iterable
+        dicts mapping each field to a dict with 'value' and 'timestamp',
+        like the output of obj.read(); later readings take precedence
+    keep_arrays : bool, optional
+        passed to _sanitize_np
+
+    Returns
+    -------
+    data, timestamps : dict
+    """
     data = {}
     timestamps = {}
-    for key, payload in readings.items():
-        data[key] = payload['value']
-        timestamps[key] = payload['timestamp']
+    for reading in readings:
+        for key, payload in reading.items():
+            data[key] = _sanitize_np(payload['value'], keep_arrays)
+            timestamps[key] = payload['timestamp']
     return data, timestamps
 
 
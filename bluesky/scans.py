@@ -1,12 +1,36 @@
 from collections import deque, defaultdict
 import itertools
-import functools
-import operator
+import time as ttime
+import warnings
 from boltons.iterutils import chunked
-from cycler import cycler
 import numpy as np
 from .run_engine import Msg
-from .utils import Struct, snake_cyclers, Subs
+from .utils import Struct, Subs, Trajectory
+
+
+def _pipeline_safe(objs):
+    "Whether all the objects opted in to pipelined step scans."
+    return all(getattr(obj, 'pipeline_safe', False) for obj in objs)
+
+
+def _latched_before(readings, time):
+    "Whether all the readings have timestamps no later than time."
+    return all(reading['timestamp'] <= time for reading in readings.values())
+
+
+def _warn_unlatched(readings):
+    warnings.warn("Readings of {0} are stamped after the next move started, "
+                  "so they may not be from the previous point. That point "
+                  "will be retaken, and this scan will not move during "
+                  "readout any more.".format(sorted(readings)))
+
+
+def _trigger_and_read(dets):
+    "Trigger the detectors, wait for them, and read them."
+    for det in dets:
+        yield Msg('trigger', det, block_group='B')
+    yield Msg('wait', None, 'B')
+    return (yield Msg('read_many', None, dets))
 
 
 class ScanBase(Struct):
@@ -155,18 +179,27 @@ class Count(ScanBase):
             yield Msg('create')
             for det in dets:
                 yield Msg('trigger', det, block_group='A')
-            for det in dets:
-                yield Msg('wait', None, 'A')
-            for det in dets:
-                yield Msg('read', det)
+            yield Msg('wait', None, 'A')
+            yield Msg('read_many', None, dets)
             yield Msg('save')
             yield Msg('sleep', None, delay)
 
 
 class Scan1D(ScanBase):
-    "Use AbsListScan or DeltaListScan. Subclasses must define _abs_steps."
+    """
+    Use AbsListScan or DeltaListScan. Subclasses must define _abs_steps.
+
+    If the motor and all the detectors have a true ``pipeline_safe``
+    attribute, the motor starts moving to the next step as soon as the
+    detectors are triggered, while they are read and the Event is saved.
+    If a reading turns out to be stamped after the move started, the
+    motor is sent back, the point is retaken, and the rest of the scan
+    is not pipelined.
+    """
     _fields = ['detectors', 'motor', 'steps']
     _derived_fields = []
+    # If True, reuse the last reading of the motor when it did not move.
+    reuse_readings = False
 
     @property
     def _objects(self):
@@ -174,18 +207,44 @@ class Scan1D(ScanBase):
 
     def _gen(self):
         dets = self.detectors
-        for step in self._abs_steps:
+        motor = self.motor
+        steps = list(self._abs_steps)
+        pipelined = _pipeline_safe(list(dets) + [motor])
+        last_step = None
+        premoved = False  # if the motor was sent to this step during readout
+        for i, step in enumerate(steps):
             yield Msg('checkpoint')
-            yield Msg('set', self.motor, step, block_group='A')
-            yield Msg('wait', None, 'A')
+            moved = last_step is None or step != last_step
+            if moved:
+                if not premoved:
+                    yield Msg('set', motor, step, block_group='A')
+                yield Msg('wait', None, 'A')
+                last_step = step
             yield Msg('create')
-            yield Msg('read', self.motor)
+            if moved or not self.reuse_readings:
+                yield Msg('read', motor)
+            else:
+                yield Msg('read_last', motor)
             for det in dets:
                 yield Msg('trigger', det, block_group='B')
-            for det in dets:
-                yield Msg('wait', None, 'B')
-            for det in dets:
-                yield Msg('read', det)
+            yield Msg('wait', None, 'B')
+            premoved = False
+            if pipelined and i + 1 < len(steps) and steps[i + 1] != step:
+                # Start moving to the next step while the detectors read out.
+                move_start = ttime.time()
+                yield Msg('set', motor, steps[i + 1], block_group='A')
+                premoved = True
+            readings = yield Msg('read_many', None, dets)
+            if premoved and not _latched_before(readings, move_start):
+                _warn_unlatched(readings)
+                pipelined = False
+                premoved = False
+                # Retake this point without moving. The new readings take
+                # the place of the old ones in the Event.
+                yield Msg('wait', None, 'A')
+                yield Msg('set', motor, step, block_group='A')
+                yield Msg('wait', None, 'A')
+                yield from _trigger_and_read(dets)
             yield Msg('save')
 
 
@@ -437,18 +496,16 @@ class _AdaptiveScanBase(ScanBase):
         target_field = self.target_field
         while next_pos < stop:
             yield Msg('checkpoint')
-            yield Msg('set', motor, next_pos)
+            yield Msg('set', motor, next_pos, block_group='A')
             yield Msg('wait', None, 'A')
             yield Msg('create')
             yield Msg('read', motor)
             for det in dets:
                 yield Msg('trigger', det, block_group='B')
-            for det in dets:
-                yield Msg('wait', None, 'B')
-            for det in dets:
-                cur_det = yield Msg('read', det)
-                if target_field in cur_det:
-                    cur_I = cur_det[target_field]['value']
+            yield Msg('wait', None, 'B')
+            cur_det = yield Msg('read_many', None, dets)
+            if target_field in cur_det:
+                cur_I = cur_det[target_field]['value']
             yield Msg('save')
 
             # special case first first loop
@@ -653,12 +710,10 @@ class Center(ScanBase):
             seen_x.append(ret_mot[key]['value'])
             for det in dets:
                 yield Msg('trigger', det, block_group='B')
-            for det in dets:
-                yield Msg('wait', None, 'B')
-            for det in dets:
-                ret_det = yield Msg('read', det)
-                if target_field in ret_det:
-                    seen_y.append(ret_det[target_field]['value'])
+            yield Msg('wait', None, 'B')
+            ret_det = yield Msg('read_many', None, dets)
+            if target_field in ret_det:
+                seen_y.append(ret_det[target_field]['value'])
             yield Msg('save')
 
         model = GaussianModel() + LinearModel()
@@ -684,12 +739,10 @@ class Center(ScanBase):
             seen_x.append(ret_mot[key]['value'])
             for det in dets:
                 yield Msg('trigger', det, block_group='B')
-            for det in dets:
-                yield Msg('wait', None, 'B')
-            for det in dets:
-                ret_det = yield Msg('read', det)
-                if target_field in ret_det:
-                    seen_y.append(ret_det[target_field]['value'])
+            yield Msg('wait', None, 'B')
+            ret_det = yield Msg('read_many', None, dets)
+            if target_field in ret_det:
+                seen_y.append(ret_det[target_field]['value'])
             yield Msg('save')
 
         yield Msg('set', motor, np.clip(guesses['center'], min_cen, max_cen))
@@ -702,8 +755,20 @@ class Center(ScanBase):
 
 
 class ScanND(ScanBase):
+    """
+    Base class for scans over the points of a cycler.
+
+    If all the motors and detectors have a true ``pipeline_safe``
+    attribute, the motors start moving to the next point as soon as the
+    detectors are triggered, while they are read and the Event is saved.
+    If a reading turns out to be stamped after the move started, the
+    motors are sent back, the point is retaken, and the rest of the scan
+    is not pipelined.
+    """
     _fields = ['detectors', 'cycler']
     _derived_fields = ['motors', 'num']
+    # If True, reuse the last reading of each motor that did not move.
+    reuse_readings = False
 
     @property
     def motors(self):
@@ -713,30 +778,60 @@ class ScanND(ScanBase):
     def _objects(self):
         return list(self.detectors) + list(self.motors)
 
+    def _move(self, step):
+        "Set the motors that step moves, and return them."
+        moved = set()
+        for motor, pos in step.items():
+            if pos == self._last_set_point[motor]:
+                # This step does not move this motor.
+                continue
+            yield Msg('set', motor, pos, block_group='A')
+            self._last_set_point[motor] = pos
+            moved.add(motor)
+        return moved
+
     def _gen(self):
         self._last_set_point = {m: None for m in self.motors}
         dets = self.detectors
-        for step in list(self.cycler):
+        pipelined = _pipeline_safe(list(dets) + list(self.motors))
+        points = iter(self.cycler)
+        step = next(points, None)
+        moved = None  # motors sent to this step during readout, if any
+        while step is not None:
             yield Msg('checkpoint')
-            for motor, pos in step.items():
-                if pos == self._last_set_point[motor]:
-                    # This step does not move this motor.
-                    continue
-                yield Msg('set', motor, pos, block_group='A')
-                self._last_set_point[motor] = pos
-
-            yield Msg('wait', None, 'A')
+            if moved is None:
+                moved = yield from self._move(step)
+            if moved:
+                yield Msg('wait', None, 'A')
             yield Msg('create')
 
             for motor in self.motors:
-                yield Msg('read', motor)
+                if motor in moved or not self.reuse_readings:
+                    yield Msg('read', motor)
+                else:
+                    yield Msg('read_last', motor)
             for det in dets:
                 yield Msg('trigger', det, block_group='B')
-            for det in dets:
-                yield Msg('wait', None, 'B')
-            for det in dets:
-                yield Msg('read', det)
+            yield Msg('wait', None, 'B')
+            next_step = next(points, None)
+            moved = None
+            if pipelined and next_step is not None:
+                # Start moving to the next point while the detectors read out.
+                move_start = ttime.time()
+                moved = yield from self._move(next_step)
+            readings = yield Msg('read_many', None, dets)
+            if moved and not _latched_before(readings, move_start):
+                _warn_unlatched(readings)
+                pipelined = False
+                moved = None
+                # Retake this point without moving. The new readings take
+                # the place of the old ones in the Event.
+                yield Msg('wait', None, 'A')
+                yield from self._move(step)
+                yield Msg('wait', None, 'A')
+                yield from _trigger_and_read(dets)
             yield Msg('save')
+            step = next_step
 
 
 class _OuterProductScanBase(ScanND):
@@ -775,20 +870,19 @@ class _OuterProductScanBase(ScanND):
 
     @property
     def cycler(self):
-        # Build a Cycler for ScanND.
-        cyclers = []
+        # Build a lazy Trajectory, which ScanND iterates like a Cycler.
+        axes = []
         snake_booleans = []
         for motor, start, stop, num, snake in chunked(self.args, 5):
             init_pos = self._init_pos[motor]
             steps = init_pos + np.linspace(start, stop, num=num, endpoint=True)
-            c = cycler(motor, steps)
-            cyclers.append(c)
+            axes.append({motor: steps})
             snake_booleans.append(snake)
-        return snake_cyclers(cyclers, snake_booleans)
+        return Trajectory(axes, snake_booleans)
 
     @property
     def num(self):
-        return len(self.cycler)
+        return int(np.prod(self.shape))
 
     @property
     def args(self):
@@ -828,15 +922,14 @@ class _InnerProductScanBase(ScanND):
 
     @property
     def cycler(self):
-        # Build a Cycler for ScanND.
-        cyclers = []
+        # Build a lazy Trajectory, which ScanND iterates like a Cycler.
+        # All the motors move together along one axis.
+        axis = {}
         for motor, start, stop, in chunked(self.args, 3):
             init_pos = self._init_pos[motor]
-            steps = init_pos + np.linspace(start, stop, num=self.num,
-                                           endpoint=True)
-            c = cycler(motor, steps)
-            cyclers.append(c)
-        return functools.reduce(operator.add, cyclers)
+            axis[motor] = init_pos + np.linspace(start, stop, num=self.num,
+                                                 endpoint=True)
+        return Trajectory([axis])
 
 
 class InnerProductAbsScan(_InnerProductScanBase):
@@ -1,8 +1,9 @@
+import bisect
 import numpy as np
 from cycler import cycler
 import matplotlib.pyplot as plt
 from scipy.ndimage import center_of_mass
-from bluesky.callbacks import CollectThenCompute
+from bluesky.callbacks import CollectThenCompute, CallbackBase, _GrowableArray
 
 
 class PeakStats(CollectThenCompute):
@@ -67,17 +68,14 @@ class PeakStats(CollectThenCompute):
 
         x = []
         y = []
-        for event in self._events:
-            try:
-                _x = event['data'][self.x]
-                _y = event['data'][self.y]
-            except KeyError:
-                pass
-            else:
-                x.append(_x)
-                y.append(_y)
-        x = np.array(x)
-        y = np.array(y)
+        buf = self._buffer
+        for uid, descriptor in buf.descriptors.items():
+            if (self.x in descriptor['data_keys'] and
+                    self.y in descriptor['data_keys']):
+                x.append(buf.column(self.x, uid))
+                y.append(buf.column(self.y, uid))
+        x = np.concatenate(x) if x else np.array([])
+        y = np.concatenate(y) if y else np.array([])
         self.x_data = x
         self.y_data = y
         if self._edge_count is not None:
@@ -120,6 +118,210 @@ class PeakStats(CollectThenCompute):
         # insert lmfit
 
 
+class OnlinePeakStats(CallbackBase):
+
+    def __init__(self, x, y):
+        """
+        Compute peak statistics as Events arrive.
+
+        Unlike PeakStats, the results are up to date after every Event, so
+        plans can use them during the run, and no Event documents are kept.
+        The x and y values are kept in compact numpy arrays, for x_data and
+        y_data. Each point costs O(log N) time at worst, however long the
+        run: the statistics are not recomputed over all the points.
+
+        Parameters
+        ----------
+        x : string
+            field name for the x variable (e.g., a motor)
+        y : string
+            field name for the y variable (e.g., a detector)
+
+        Note
+        ----
+        It is assumed that the two fields, x and y, are recorded in the same
+        Event stream.
+
+        The center of mass is the mean of x weighted by y. For evenly spaced
+        x, this is what PeakStats computes. There is no background
+        subtraction; use PeakStats for that.
+
+        The half-maximum crossings are those nearest to the maximum, one on
+        each side of it. For a single peak, these are the crossings
+        PeakStats finds; for noisy data, PeakStats averages all of them.
+
+        Attributes
+        ----------
+        com : center of mass
+        cen : mean x location of the half-maximum crossings
+        max : x location of y maximum, and that maximum
+        min : x location of y minimum, and that minimum
+        fwhm : full width at half maximum, if there are two crossings
+        num : number of points seen
+        """
+        super().__init__()
+        self.x = x
+        self.y = y
+        self.lin_bkg = None  # for compatibility with plot_peak_stats
+        self._reset()
+
+    def _reset(self):
+        self.num = 0
+        self.max = None
+        self.min = None
+        self._sum_y = 0
+        self._sum_xy = 0
+        self._x_buffer = _GrowableArray()
+        self._y_buffer = _GrowableArray()
+        self._mid = None  # (max + min) / 2
+        self._imax = None  # index of the maximum
+        # Indices of the points before the maximum that are lower than
+        # every later point before it, and their y values, both increasing.
+        # The last point at or below mid before the maximum is among them.
+        self._left_stack = []
+        self._left_stack_y = []
+        self._left = None  # x of the crossing before the maximum, if any
+        self._right_scan = None  # next index to look at after the maximum
+        self._right = None  # x of the crossing after the maximum, if any
+
+    def __getitem__(self, key):
+        if key in ['com', 'cen', 'max', 'min']:
+            return getattr(self, key)
+        else:
+            raise KeyError
+
+    @property
+    def x_data(self):
+        return self._x_buffer.data
+
+    @property
+    def y_data(self):
+        return self._y_buffer.data
+
+    @property
+    def com(self):
+        if not self._sum_y:
+            return None
+        return self._sum_xy / self._sum_y
+
+    @property
+    def cen(self):
+        crossings = self._half_max_crossings()
+        if not crossings:
+            return None
+        return np.mean(crossings)
+
+    @property
+    def fwhm(self):
+        crossings = self._half_max_crossings()
+        if len(crossings) != 2:
+            return None
+        return float(crossings[1] - crossings[0])
+
+    def _half_max_crossings(self):
+        return [c for c in (self._left, self._right) if c is not None]
+
+    def start(self, doc):
+        self._reset()
+
+    def event(self, doc):
+        try:
+            x = doc['data'][self.x]
+            y = doc['data'][self.y]
+        except KeyError:
+            # wrong event stream, skip it
+            return
+        self._update([x], [y])
+
+    def event_page(self, doc):
+        try:
+            x = doc['data'][self.x]
+            y = doc['data'][self.y]
+        except KeyError:
+            # wrong event stream, skip it
+            return
+        self._update(x, y)
+
+    def _update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if not len(y):
+            return
+        start = self.num
+        self.num += len(y)
+        self._x_buffer.extend(x)
+        self._y_buffer.extend(y)
+        self._sum_y += np.sum(y)
+        self._sum_xy += np.dot(x, y)
+        i, j = np.argmax(y), np.argmin(y)
+        new_max = self.max is None or y[i] > self.max[1]
+        if new_max:
+            self.max = x[i], y[i]
+            self._extend_left_stack(start + i)
+        if self.min is None or y[j] < self.min[1]:
+            self.min = x[j], y[j]
+        mid = (self.max[1] + self.min[1]) / 2
+        if new_max:
+            # Look for the crossing after the new maximum from scratch.
+            self._right_scan = self._imax + 1
+            self._right = None
+        elif mid != self._mid:
+            # mid went down with the minimum. Every point between the
+            # maximum and the crossing after it is still above mid.
+            self._right = None
+        else:
+            if self._right is None:
+                self._scan_right(mid)
+            return
+        self._mid = mid
+        self._find_left(mid)
+        self._scan_right(mid)
+
+    def _extend_left_stack(self, imax):
+        # Push the points from the old maximum up to the new one.
+        stack, stack_y = self._left_stack, self._left_stack_y
+        first = 0 if self._imax is None else self._imax
+        y_data = self.y_data
+        for index in range(first, imax):
+            value = y_data[index]
+            while stack_y and stack_y[-1] >= value:
+                stack.pop()
+                stack_y.pop()
+            stack.append(index)
+            stack_y.append(value)
+        self._imax = imax
+
+    def _find_left(self, mid):
+        # the last point at or below mid before the maximum
+        k = bisect.bisect_right(self._left_stack_y, mid) - 1
+        if k < 0:
+            self._left = None
+            return
+        index = self._left_stack[k]
+        self._left = self._crossing(index, mid)
+
+    def _scan_right(self, mid):
+        # the first point at or below mid after the maximum
+        y_data = self.y_data
+        index = self._right_scan
+        while index < self.num:
+            if y_data[index] <= mid:
+                self._right_scan = index
+                self._right = self._crossing(index - 1, mid)
+                return
+            index += 1
+        self._right_scan = index
+
+    def _crossing(self, index, mid):
+        "x where the line from point index to the next crosses y = mid"
+        x0, x1 = self.x_data[index:index + 2]
+        y0, y1 = self.y_data[index:index + 2] - mid
+        if y0 == y1:
+            # All the points are equal, so nothing crosses.
+            return None
+        return x0 - y0 * (x1 - x0) / (y1 - y0)
+
+
 def plot_peak_stats(peak_stats, ax=None):
     """
     Plot data and various peak statistics.
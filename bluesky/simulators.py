@@ -0,0 +1,305 @@
+"""
+Dry-run plans without hardware and estimate how long they would take.
+"""
+from collections import Counter, defaultdict
+import itertools
+import types
+import warnings
+import numpy as np
+from .utils import object_name
+
+
+class SimulationReport:
+    """
+    The outcome of simulating a plan
+
+    Attributes
+    ----------
+    num_messages : int
+        the number of messages the plan yielded
+    commands : collections.Counter
+        the number of messages per command
+    objects : collections.Counter
+        the number of messages per (object name, command)
+    duration : float
+        the estimated wall time of the plan, in seconds
+    warnings : list
+        a dict for each pathological pattern found in the plan, with the
+        keys 'kind' ('redundant set', 'redundant read' or 'redundant
+        wait'), 'index' (of the message in the plan), and 'msg'
+    """
+    def __init__(self):
+        self.num_messages = 0
+        self.commands = Counter()
+        self.objects = Counter()
+        self.duration = 0.
+        self.warnings = []
+
+    def __repr__(self):
+        kinds = Counter(warning['kind'] for warning in self.warnings)
+        lines = ['{0} messages, estimated duration {1:.3f} s'
+                 ''.format(self.num_messages, self.duration)]
+        for command, num in sorted(self.commands.items()):
+            lines.append('  {0}: {1}'.format(command, num))
+        for kind, num in sorted(kinds.items()):
+            lines.append('  warning: {0} x {1}'.format(num, kind))
+        return '\n'.join(lines)
+
+
+def timing_model_from_stats(stats):
+    """
+    Build a timing model from the statistics of a real run.
+
+    Parameters
+    ----------
+    stats : dict
+        ``RE.stats``, recorded with ``RE.record_stats = True``
+
+    Returns
+    -------
+    timing_model : dict
+        mapping (command, object name) and command to the mean latency
+    """
+    timing_model = {}
+    for command, hist in stats['commands'].items():
+        timing_model[command] = hist['mean']
+    for name, commands in stats['objects'].items():
+        for command, hist in commands.items():
+            timing_model[(command, name)] = hist['mean']
+    return timing_model
+
+
+def simulate(plan, timing_model=None, *, max_messages=1000000):
+    """
+    Drive a plan without hardware and estimate how long it would take.
+
+    No method of any object is called except ``describe``, which is used
+    to make up readings. Reading an object that has been set returns the
+    position it was set to; otherwise, the value is 0.
+
+    The duration is the sum of the latencies of the messages. Sets and
+    triggers in a block group run concurrently: a 'wait' for the group
+    takes as long as the slowest of them, unless the timing model gives
+    a latency for 'wait' itself (as one built by timing_model_from_stats
+    does). Likewise, 'read_many' takes as long as the slowest read. A
+    'sleep' takes as long as it says.
+
+    Parameters
+    ----------
+    plan : iterable
+        a generator or other iterable that yields ``Msg`` objects
+    timing_model : dict or callable, optional
+        the latency in seconds of each message. A dict maps a
+        (command, object name) pair or, failing that, a command to the
+        latency; anything else takes no time. Objects are named by
+        ``bluesky.utils.object_name``. A warning is issued if no object in
+        the plan has the name of a (command, object name) pair, which
+        usually means the name is misspelled. A callable gets the message
+        and returns its latency. By default, nothing takes any time.
+    max_messages : int, optional
+        give up on plans that yield more messages than this
+
+    Returns
+    -------
+    report : SimulationReport
+
+    Examples
+    --------
+    >>> report = simulate(AbsScan([det], motor, 1, 5, 5),
+    ...                   {('set', 'motor'): 0.5, 'read': 0.01})
+    >>> report.duration  # about 2.6 seconds: 5 moves and 10 reads
+    >>> report.warnings
+    """
+    return _Simulator(timing_model).run(plan, max_messages)
+
+
+class _Status:
+    "A status object that is always done"
+    done = True
+    success = True
+    finished_cb = None
+
+
+class _Simulator:
+    def __init__(self, timing_model):
+        if timing_model is None:
+            timing_model = {}
+        self.timing_model = timing_model
+        self.report = SimulationReport()
+        self._positions = dict()  # obj -> last position set
+        self._block_groups = defaultdict(list)  # group -> latencies
+        self._bundle = None  # objects read since 'create', if any
+        self._fresh = set()  # objects read, not set or triggered since
+        self._names = set()  # names of the objects the plan used
+        self._command_registry = {
+            'read': self._read,
+            'read_many': self._read_many,
+            'read_last': self._read_last,
+            'set': self._set,
+            'trigger': self._trigger,
+            'wait': self._wait,
+            'sleep': self._sleep,
+            'create': self._create,
+            'save': self._save,
+        }
+
+    def modeled(self, command):
+        "Whether the timing model gives the latency of command itself."
+        model = self.timing_model
+        return not callable(model) and command in model
+
+    def latency(self, msg, command=None, obj=None):
+        if command is None:
+            command = msg.command
+        if obj is None:
+            obj = msg.obj
+        model = self.timing_model
+        if callable(model):
+            return model(msg)
+        if obj is not None:
+            name = object_name(obj)
+            self._names.add(name)
+            try:
+                return model[(command, name)]
+            except KeyError:
+                pass
+        return model.get(command, 0)
+
+    def run(self, plan, max_messages):
+        gen = iter(plan)  # no-op on generators; needed for classes
+        if not isinstance(gen, types.GeneratorType):
+            # If plan does not support .send, we must wrap it in a generator.
+            gen = (msg for msg in gen)
+        report = self.report
+        response = None
+        for index in itertools.count():
+            try:
+                msg = gen.send(response)
+            except StopIteration:
+                self._check_model_names()
+                return report
+            if index == max_messages:
+                raise RuntimeError("The plan yielded more than {0} messages."
+                                   "".format(max_messages))
+            report.num_messages += 1
+            report.commands[msg.command] += 1
+            if msg.obj is not None:
+                name = object_name(msg.obj)
+                self._names.add(name)
+                report.objects[(name, msg.command)] += 1
+            func = self._command_registry.get(msg.command, self._default)
+            response = func(index, msg)
+
+    def _check_model_names(self):
+        model = self.timing_model
+        if callable(model):
+            return
+        unknown = sorted({key[1] for key in model if isinstance(key, tuple)}
+                         - self._names)
+        if unknown:
+            warnings.warn("No object in the plan is named {0}; the timing "
+                          "model entries for them were not used."
+                          "".format(', '.join(map(repr, unknown))))
+
+    def _warn(self, kind, index, msg):
+        self.report.warnings.append({'kind': kind, 'index': index,
+                                     'msg': msg})
+
+    def _default(self, index, msg):
+        self.report.duration += self.latency(msg)
+
+    def _describe(self, obj):
+        try:
+            return obj.describe()
+        except Exception:
+            return {object_name(obj): {}}
+
+    def _reading(self, obj):
+        value = self._positions.get(obj, 0)
+        return {key: {'value': value, 'timestamp': 0.}
+                for key in self._describe(obj)}
+
+    def _bundle_read(self, index, msg, obj):
+        if self._bundle is not None:
+            if obj in self._bundle:
+                self._warn('redundant read', index, msg)
+            self._bundle.add(obj)
+        self._fresh.add(obj)
+
+    def _read(self, index, msg):
+        obj = msg.obj
+        self._bundle_read(index, msg, obj)
+        self.report.duration += self.latency(msg)
+        return self._reading(obj)
+
+    def _read_last(self, index, msg):
+        # The last reading is reused if obj has not changed since.
+        if msg.obj not in self._fresh:
+            return self._read(index, msg)
+        self._bundle_read(index, msg, msg.obj)
+        return self._reading(msg.obj)
+
+    def _read_many(self, index, msg):
+        objs = list(msg.args[0])
+        ret = {}
+        latencies = [0]
+        for obj in objs:
+            self._bundle_read(index, msg, obj)
+            latencies.append(self.latency(msg, 'read', obj))
+            ret.update(self._reading(obj))
+        if self.modeled('read_many'):
+            self.report.duration += self.latency(msg)
+        else:
+            self.report.duration += max(latencies)
+        return ret
+
+    def _set(self, index, msg):
+        obj = msg.obj
+        new_pos, = msg.args
+        if obj in self._positions:
+            try:
+                unchanged = bool(np.all(self._positions[obj] == new_pos))
+            except Exception:
+                unchanged = False
+            if unchanged:
+                self._warn('redundant set', index, msg)
+        self._positions[obj] = new_pos
+        self._fresh.discard(obj)
+        self._start(msg)
+        return _Status()
+
+    def _trigger(self, index, msg):
+        self._fresh.discard(msg.obj)
+        self._start(msg)
+        return _Status()
+
+    def _start(self, msg):
+        # Sets and triggers in a block group run until it is waited for.
+        latency = self.latency(msg)
+        group = msg.kwargs.get('block_group')
+        if group is None:
+            self.report.duration += latency
+        else:
+            self._block_groups[group].append(latency)
+
+    def _wait(self, index, msg):
+        group = msg.kwargs['group'] if 'group' in msg.kwargs else msg.args[0]
+        latencies = self._block_groups.pop(group, None)
+        if latencies is None:
+            self._warn('redundant wait', index, msg)
+            latencies = [0]
+        if self.modeled('wait'):
+            self.report.duration += self.latency(msg)
+        else:
+            self.report.duration += max(latencies)
+
+    def _sleep(self, index, msg):
+        self.report.duration += msg.args[0]
+
+    def _create(self, index, msg):
+        self._bundle = set()
+        self._default(index, msg)
+
+    def _save(self, index, msg):
+        self._bundle = None
+        self._default(index, msg)
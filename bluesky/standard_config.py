@@ -25,7 +25,6 @@ logger = logging.getLogger(__name__)
 
 
 loop = asyncio.get_event_loop()
-loop.set_debug(False)
 
 
 # pylab-esque imports
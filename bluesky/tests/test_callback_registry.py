@@ -0,0 +1,68 @@
+import gc
+from nose.tools import assert_equal, assert_raises
+from bluesky.utils import CallbackRegistry
+from bluesky.run_engine import DocumentNames
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def method(self, name, doc):
+        self.count += 1
+
+
+def test_connect_process_disconnect():
+    reg = CallbackRegistry()
+    seen = []
+
+    def f(name, doc):
+        seen.append(doc)
+
+    cid = reg.connect('event', f)
+    # Connecting the same function again is a no-op.
+    assert_equal(reg.connect('event', f), cid)
+    reg.process('event', 'event', 1)
+    assert_equal(seen, [1])
+    reg.disconnect(cid)
+    reg.process('event', 'event', 2)
+    assert_equal(seen, [1])
+    # Disconnecting twice is harmless.
+    reg.disconnect(cid)
+
+
+def test_bound_method_weakref():
+    reg = CallbackRegistry()
+    counter = Counter()
+    reg.connect('event', counter.method)
+    reg.process('event', 'event', {})
+    assert_equal(counter.count, 1)
+    del counter
+    gc.collect()
+    assert_equal(reg.callbacks, {})
+    reg.process('event', 'event', {})
+
+
+def test_disconnect_during_process():
+    reg = CallbackRegistry()
+    seen = []
+
+    def f(name, doc):
+        seen.append('f')
+        reg.disconnect(cid)
+
+    def g(name, doc):
+        seen.append('g')
+
+    cid = reg.connect('event', f)
+    reg.connect('event', g)
+    reg.process('event', 'event', {})
+    assert_equal(seen, ['f', 'g'])
+    reg.process('event', 'event', {})
+    assert_equal(seen, ['f', 'g', 'g'])
+
+
+def test_allowed_sigs():
+    reg = CallbackRegistry(allowed_sigs=DocumentNames)
+    assert_raises(ValueError, reg.connect, 'not a sig', print)
+    assert_raises(ValueError, reg.process, 'not a sig')
@@ -1,15 +1,23 @@
-from nose.tools import assert_equal, assert_raises, assert_true
+from nose.tools import (assert_equal, assert_raises, assert_true,
+                        assert_false, assert_almost_equal, assert_is_none)
 from nose import SkipTest
 from bluesky.run_engine import Msg
 from bluesky.examples import (motor, det, stepscan)
 from bluesky.scans import AdaptiveAbsScan, AbsScan
-from bluesky.callbacks import (CallbackCounter, LiveTable)
+from bluesky.callbacks import (CallbackCounter, LiveTable, LivePlot,
+                               LiveRaster, RunBuffer, _GrowableArray,
+                               _RedrawThrottle)
+from bluesky.scientific_callbacks import OnlinePeakStats
 from bluesky.standard_config import mesh
 from bluesky.tests.utils import setup_test_run_engine
 from nose.tools import raises
+import asyncio
 import contextlib
 import sys
 import tempfile
+import threading
+import numpy as np
+import matplotlib.pyplot as plt
 
 RE = setup_test_run_engine()
 
@@ -132,6 +140,203 @@ def _print_redirect():
         sys.stdout = old_stdout
 
 
+def test_growable_array():
+    arr = _GrowableArray((2,), capacity=2)
+    for i in range(5):
+        arr.append((i, -i))
+    arr.extend([(5, -5), (6, -6)])
+    assert_equal(len(arr), 7)
+    assert_equal(arr.data.tolist(), [[i, -i] for i in range(7)])
+
+
+def test_run_buffer():
+    buf = RunBuffer()
+    RE(AbsScan([det], motor, 1, 5, 5), subs={'all': buf})
+    assert_equal(len(buf), 5)
+    assert_equal(buf.column('motor').tolist(), [1, 2, 3, 4, 5])
+    assert_equal(buf.column('det').dtype, np.dtype(float))
+    assert_equal(buf.seq_num().tolist(), [1, 2, 3, 4, 5])
+
+    # Large columns are moved to memory-mapped files.
+    buf = RunBuffer(spill_threshold=0)
+    RE(AbsScan([det], motor, 1, 5, 5), subs={'all': buf})
+    assert_true(isinstance(buf.column('det'), np.memmap))
+    assert_equal(buf.column('motor').tolist(), [1, 2, 3, 4, 5])
+
+    # Values that do not match their data keys are kept as objects.
+    buf('start', {'uid': 'a'})
+    buf('descriptor', {'uid': 'b', 'data_keys': {
+        'x': {'dtype': 'integer', 'shape': [], 'source': 'x'}}})
+    buf('event', {'descriptor': 'b', 'seq_num': 1, 'data': {'x': 1}})
+    buf('event', {'descriptor': 'b', 'seq_num': 2, 'data': {'x': 'one'}})
+    assert_equal(buf.column('x').tolist(), [1, 'one'])
+
+
+def test_redraw_throttle():
+    redraws = []
+    throttle = _RedrawThrottle(lambda: redraws.append(None), max_fps=1)
+    for i in range(10):
+        throttle.request()
+    # The first request is drawn; the rest are coalesced into one redraw.
+    assert_equal(len(redraws), 1)
+    assert_true(throttle.pending)
+    throttle.flush()
+    assert_equal(len(redraws), 2)
+    throttle.flush()
+    assert_equal(len(redraws), 2)
+
+    throttle = _RedrawThrottle(lambda: redraws.append(None), max_fps=None)
+    for i in range(10):
+        throttle.request()
+    assert_equal(len(redraws), 12)
+
+
+def test_redraw_throttle_timer():
+    loop = asyncio.new_event_loop()
+    redraws = []
+    throttle = _RedrawThrottle(lambda: redraws.append(None), max_fps=20,
+                               loop=loop)
+    throttle.request()
+    throttle.request()
+    assert_equal(len(redraws), 1)
+    # No more requests come, but the deferred redraw still happens.
+    loop.run_until_complete(asyncio.sleep(0.2, loop=loop))
+    assert_equal(len(redraws), 2)
+    assert_false(throttle.pending)
+    loop.close()
+
+
+def test_redraw_throttle_other_thread():
+    loop = asyncio.new_event_loop()
+    threads = []
+    throttle = _RedrawThrottle(
+        lambda: threads.append(threading.current_thread()), max_fps=20,
+        loop=loop)
+
+    def request_many():
+        for i in range(10):
+            throttle.request()
+
+    worker = threading.Thread(target=request_many)
+    worker.start()
+    worker.join()
+    # Requests from another thread wait for the loop, coalesced.
+    assert_equal(threads, [])
+    loop.run_until_complete(asyncio.sleep(0.2, loop=loop))
+    assert_equal(threads, [threading.main_thread()])
+
+    # A flush from another thread also redraws on the loop's thread.
+    throttle.request()
+    throttle.request()
+    assert_true(throttle.pending)
+    worker = threading.Thread(target=throttle.flush)
+    worker.start()
+    worker.join()
+    loop.run_until_complete(asyncio.sleep(0, loop=loop))
+    assert_equal(threads, [threading.main_thread()] * 3)
+    assert_false(throttle.pending)
+    loop.close()
+
+
+def test_live_plot_blits_only_alone():
+    fig = plt.figure()
+    blits = []
+    fig.canvas.blit = lambda bbox=None: blits.append(bbox)
+    fig.canvas.draw_idle = fig.canvas.draw
+
+    def event(plot, x, y):
+        plot('event', {'data': {'motor': x, 'det': y}, 'seq_num': 1})
+
+    plot1 = LivePlot('det', 'motor', fig=fig, max_fps=None)
+    plot2 = LivePlot('det', 'motor', fig=fig, max_fps=None)
+    plot1('start', {})
+    event(plot1, 0, 0)
+    event(plot1, 2, 2)
+    # This point leaves the limits alone, so only the line is redrawn.
+    event(plot1, 1, 1)
+    assert_equal(len(blits), 1)
+
+    # With another live line on the axes, blitting would erase it.
+    plot2('start', {})
+    event(plot2, 1, 1)
+    event(plot1, 1, 1)
+    assert_equal(len(blits), 1)
+
+    plot2('stop', {})
+    event(plot1, 1, 1)
+    assert_equal(len(blits), 2)
+    plot1('stop', {})
+    plt.close(fig)
+
+
+def test_live_plot_non_numeric_x():
+    import datetime
+    fig = plt.figure()
+    plot = LivePlot('det', 'time', fig=fig, max_fps=None)
+    plot('start', {})
+    times = [datetime.datetime(2017, 1, 1, 0, i) for i in range(3)]
+    # Values a list took, which do not fit an array of floats
+    for i, t in enumerate(times):
+        plot('event', {'data': {'time': t, 'det': i}, 'seq_num': i + 1})
+    assert_equal(list(plot.x_data), times)
+    assert_equal(list(plot.y_data), [0, 1, 2])
+    plot('stop', {})
+    plt.close(fig)
+
+
+def test_live_raster_clim():
+    raster = LiveRaster((2, 2), 'det', max_fps=None)
+    raster('start', {'uid': 'abcdef', 'scan_id': 1})
+
+    def event(seq_num, value):
+        raster('event', {'seq_num': seq_num, 'data': {'det': value}})
+
+    event(1, 5)
+    event(2, 1)
+    assert_equal(raster.im.get_clim(), (1, 5))
+    # The pixel that held the maximum is measured again.
+    event(1, 3)
+    assert_equal(raster.im.get_clim(), (1, 3))
+    raster('stop', {})
+    plt.close(raster.fig)
+
+
+def test_online_peak_stats():
+    ps = OnlinePeakStats('motor', 'det')
+    RE(AbsScan([det], motor, -5, 5, 41), subs={'all': ps})
+    assert_equal(ps.num, 41)
+    assert_equal(ps.max, (0, 1))
+    assert_almost_equal(ps.com, 0)
+    assert_almost_equal(ps.cen, 0)
+    # 2 * sqrt(2 * ln(2)), less the error of linear interpolation
+    assert_almost_equal(ps.fwhm, 2.3548, places=1)
+
+    # The statistics are available in the middle of a run.
+    ps('start', {})
+    for i, (x, y) in enumerate([(0, 0), (1, 2), (2, 0)]):
+        ps('event', {'data': {'motor': x, 'det': y}, 'seq_num': i + 1})
+        if i == 1:
+            assert_equal(ps.max, (1, 2))
+            assert_equal(ps.cen, 0.5)
+    assert_equal(ps.cen, 1)
+    assert_equal(ps.fwhm, 1)
+
+    # Only the crossings next to the maximum count.
+    ps('start', {})
+    ps('event_page', {'data': {'motor': [0, 1, 2, 3, 4],
+                               'det': [0, 2, 0, 3, 0]}})
+    assert_equal(ps.cen, 3)
+    assert_equal(ps.fwhm, 1)
+
+    # On a rising edge, the crossing follows the half maximum.
+    ps('start', {})
+    for i in range(100):
+        ps('event', {'data': {'motor': i, 'det': i}, 'seq_num': i + 1})
+        if i:
+            assert_equal(ps.cen, i / 2)
+    assert_is_none(ps.fwhm)
+
+
 def test_table():
     with _print_redirect() as fout:
         table = LiveTable(['det', 'motor'])
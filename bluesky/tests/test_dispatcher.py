@@ -0,0 +1,137 @@
+import threading
+import time as ttime
+from nose.tools import assert_equal, assert_false, assert_raises, assert_true
+from bluesky.run_engine import Dispatcher, DocumentNames
+from bluesky.examples import stepscan, det, motor
+from bluesky.tests.utils import setup_test_run_engine
+
+
+RE = setup_test_run_engine()
+
+
+def test_slow_callback_keeps_order():
+    seen = []
+
+    def slow_cb(name, doc):
+        if name == 'event':
+            ttime.sleep(0.01)
+            seen.append(doc['seq_num'])
+        else:
+            seen.append(name)
+
+    RE(stepscan(det, motor), subs={'all': slow_cb})
+    expected = (['start', 'descriptor'] + list(range(1, 11)) + ['stop'])
+    assert_equal(seen, expected)
+    assert_equal(RE.dispatcher.stats['dropped'], 0)
+
+
+def _fill_blocked_queue(policy):
+    d = Dispatcher(maxsize=2, policy=policy, record_timing=True)
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def cb(name, doc):
+        started.set()
+        release.wait()
+        seen.append(doc['seq_num'])
+
+    token = d.subscribe('event', cb)
+    d.put(DocumentNames.event, {'seq_num': 1})
+    started.wait()  # The worker is now stuck on the first Event.
+    for seq_num in range(2, 6):
+        assert_true(d.put_nowait(DocumentNames.event, {'seq_num': seq_num}))
+    release.set()
+    d.join()
+    assert_true(d.idle)
+    stats = d.stats
+    assert_equal(stats['queue_depth'], 0)
+    assert_equal(stats['max_queue_depth'], 2)
+    assert_equal(stats['dropped'], 2)
+    assert_equal(stats['processed'], 3)
+    assert_equal(stats['callbacks'][token]['count'], 3)
+    return seen
+
+
+def test_drop_oldest():
+    assert_equal(_fill_blocked_queue('drop_oldest'), [1, 4, 5])
+
+
+def test_coalesce():
+    assert_equal(_fill_blocked_queue('coalesce'), [1, 2, 5])
+
+
+def test_block():
+    d = Dispatcher(maxsize=1)
+    release = threading.Event()
+
+    def cb(name, doc):
+        release.wait()
+
+    d.subscribe('event', cb)
+    d.put(DocumentNames.event, {})
+    d.put(DocumentNames.event, {})
+    # The worker is stuck on the first Event, so the queue is now full.
+    assert_false(d.put_nowait(DocumentNames.event, {}))
+    release.set()
+    d.join()
+    assert_equal(d.stats['dropped'], 0)
+    # Subscriptions are timed only on request.
+    assert_equal(d.stats['callbacks'], {})
+
+
+def test_bad_policy():
+    assert_raises(ValueError, Dispatcher, policy='drop_newest')
+
+
+def test_thread_lane():
+    slow_seen = []
+    fast_seen = []
+
+    def slow_cb(name, doc):
+        ttime.sleep(0.01)
+        slow_seen.append(name)
+
+    def fast_cb(name, doc):
+        fast_seen.append(name)
+
+    expected = ['start', 'descriptor'] + ['event'] * 10 + ['stop']
+    slow_token = RE.subscribe('all', slow_cb, lane='thread')
+    fast_token = RE.subscribe('all', fast_cb)
+    try:
+        RE(stepscan(det, motor))
+        assert_equal(fast_seen, expected)
+        RE.dispatcher.join(lanes=True)
+        assert_equal(slow_seen, expected)
+        stats = RE.dispatcher.stats['lanes'][slow_token]
+        assert_equal(stats['processed'], len(expected))
+        assert_equal(stats['dropped'], 0)
+    finally:
+        RE.unsubscribe(slow_token)
+        RE.unsubscribe(fast_token)
+    assert_equal(RE.dispatcher.stats['lanes'], {})
+
+
+def test_main_lane():
+    threads = []
+
+    def cb(name, doc):
+        threads.append(threading.current_thread())
+
+    token = RE.subscribe('all', cb, lane='main')
+    try:
+        RE(stepscan(det, motor))
+        RE.dispatcher.join(lanes=True)
+    finally:
+        RE.unsubscribe(token)
+    assert_equal(len(threads), 13)
+    assert_true(all(t is threading.main_thread() for t in threads))
+
+
+def test_bad_lane():
+    def cb(name, doc):
+        pass
+
+    assert_raises(ValueError, RE.subscribe, 'all', cb, lane='gpu')
+    assert_raises(ValueError, RE.subscribe, 'all', cb, lane='thread',
+                  policy='drop_newest')
@@ -1,7 +1,15 @@
-from nose.tools import assert_in, assert_equal
-from bluesky.run_engine import RunEngine
+from nose.tools import assert_in, assert_equal, assert_raises
+import uuid
+import jsonschema
+import numpy as np
+from bluesky.run_engine import (DocumentNames, SequentialUIDFactory,
+                                new_uid, _sanitize_np,
+                                _rearrange_into_parallel_dicts)
+from bluesky.run_engine import RunEngine, Msg
 from bluesky.tests.utils import setup_test_run_engine
-from bluesky.examples import simple_scan, motor
+from bluesky.examples import simple_scan, stepscan, motor, det
+from bluesky.callbacks import CallbackBase
+from bluesky.utils import unpack_event_page
 
 
 RE = setup_test_run_engine()
@@ -15,3 +23,144 @@ def test_custom_metadata():
     RE(simple_scan(motor), animal='lion', subs={'start': assert_lion})
     # Note: Because assert_lion is processed on the main thread, it can
     # fail the test. I checked by writing a failing version of it.  - D.A.
+
+
+def test_validation_modes():
+    RE = setup_test_run_engine()
+    # An Event missing its required 'timestamps'.
+    bad_event = dict(descriptor='abc', uid='def', time=0, data={}, seq_num=1)
+
+    assert_equal(RE.validation, 'full')
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.event, bad_event)
+
+    RE.validation = 'off'
+    RE._validate(DocumentNames.event, bad_event)
+
+    RE.validation = 'sampled'
+    RE.validation_sample_interval = 3
+    # The first Event for a descriptor is always validated...
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.event, bad_event)
+    # ...then only every third one.
+    RE._validate(DocumentNames.event, bad_event)
+    RE._validate(DocumentNames.event, bad_event)
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.event, bad_event)
+    # Each Descriptor is counted on its own, so Events of another stream
+    # do not change which of these are validated...
+    other_event = dict(bad_event, descriptor='xyz')
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.event, other_event)
+    RE._validate(DocumentNames.event, bad_event)
+    RE._validate(DocumentNames.event, other_event)
+    RE._validate(DocumentNames.event, bad_event)
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.event, bad_event)
+    # ...and the counts start over with each run.
+    RE._clear_run_cache()
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.event, bad_event)
+    # Other documents are always validated.
+    assert_raises(jsonschema.ValidationError,
+                  RE._validate, DocumentNames.stop, {})
+
+    assert_raises(ValueError, setattr, RE, 'validation', 'sometimes')
+
+
+def test_event_pages():
+    RE = setup_test_run_engine()
+    RE.event_pages = True
+    RE.event_page_size = 4
+    pages = []
+    events = []
+
+    class EventCollector(CallbackBase):
+        def event(self, doc):
+            events.append(doc)
+
+    def collect_pages(name, doc):
+        pages.append(doc)
+
+    RE(stepscan(det, motor), subs={'event_page': collect_pages,
+                                   'all': EventCollector()})
+    assert_equal([len(page['seq_num']) for page in pages], [4, 4, 2])
+    seq_nums = [seq_num for page in pages for seq_num in page['seq_num']]
+    assert_equal(seq_nums, list(range(1, 11)))
+    # CallbackBase unpacks pages into Events by default.
+    assert_equal([event['seq_num'] for event in events], seq_nums)
+    assert_equal(events[0]['data']['motor'], pages[0]['data']['motor'][0])
+    assert_equal(set(events[0]), set(['descriptor', 'uid', 'time', 'seq_num',
+                                      'data', 'timestamps']))
+
+
+def test_event_page_timeout():
+    RE = setup_test_run_engine()
+    RE.event_pages = True
+    RE.event_page_timeout = 0.1
+    pages = []
+
+    def collect_pages(name, doc):
+        pages.append(doc)
+
+    def plan():
+        yield Msg('open_run')
+        for i in range(2):
+            yield Msg('create')
+            yield Msg('read', det)
+            yield Msg('save')
+            # No Event arrives for a while after the first one.
+            yield Msg('sleep', None, 0.3)
+        yield Msg('close_run')
+
+    RE(plan(), subs={'event_page': collect_pages})
+    # Each page was emitted on its own timer, not with the next Event.
+    assert_equal([page['seq_num'] for page in pages], [[1], [2]])
+
+
+def test_unpack_event_page():
+    page = {'descriptor': 'abc', 'uid': ['a', 'b'], 'time': [1, 2],
+            'seq_num': [1, 2], 'data': {'x': [10, 20]},
+            'timestamps': {'x': [1.5, 2.5]}}
+    events = list(unpack_event_page(page))
+    assert_equal(events[1], {'descriptor': 'abc', 'uid': 'b', 'time': 2,
+                             'seq_num': 2, 'data': {'x': 20},
+                             'timestamps': {'x': 2.5}})
+
+
+def test_sequential_uid_factory():
+    uids = []
+
+    def collect_uids(name, doc):
+        uids.append(doc['uid'])
+
+    RE.uid_factory = SequentialUIDFactory()
+    try:
+        RE(stepscan(det, motor), subs={'all': collect_uids})
+    finally:
+        RE.uid_factory = new_uid
+    assert_equal(len(uids), len(set(uids)))
+    for uid in uids:
+        assert_equal(str(uuid.UUID(uid)), uid)
+
+
+def test_sanitize_np():
+    assert_equal(type(_sanitize_np(np.float64(1.5))), float)
+    assert_equal(type(_sanitize_np(np.array(1.5))), float)
+    assert_equal(_sanitize_np(np.arange(3)), [0, 1, 2])
+    arr = np.arange(1000)
+    view = _sanitize_np(arr, keep_arrays=True)
+    assert_equal(view.tolist(), list(range(1000)))
+    assert_equal(view.flags.writeable, False)
+    assert_equal(arr.flags.writeable, True)
+    # Small arrays are cheaper to convert than to view.
+    assert_equal(_sanitize_np(np.arange(3), keep_arrays=True), [0, 1, 2])
+    assert_equal(_sanitize_np('a'), 'a')
+
+
+def test_rearrange_into_parallel_dicts():
+    readings = [{'a': {'value': np.int64(1), 'timestamp': 10}},
+                {'b': {'value': np.arange(2), 'timestamp': 20}}]
+    data, timestamps = _rearrange_into_parallel_dicts(readings)
+    assert_equal(data, {'a': 1, 'b': [0, 1]})
+    assert_equal(timestamps, {'a': 10, 'b': 20})
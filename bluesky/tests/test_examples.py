@@ -1,21 +1,26 @@
 from history import History
 import nose
 from nose.tools import (assert_equal, assert_is, assert_is_none, assert_raises,
-                        assert_true, assert_in, assert_not_in)
+                        assert_true, assert_false, assert_in, assert_not_in)
 from bluesky.examples import (motor, simple_scan, det, sleepy, wait_one,
                               wait_multiple, motor1, motor2, conditional_pause,
                               loop, checkpoint_forever, simple_scan_saving,
                               stepscan, MockFlyer, fly_gen, panic_timer,
-                              conditional_break, SynGauss
+                              conditional_break, SynGauss, FlyMagic, Reader,
+                              Mover
                               )
 from bluesky.callbacks import LivePlot
 from bluesky import RunEngine, Msg, PanicError, IllegalMessageSequence
 from bluesky.tests.utils import setup_test_run_engine
-from bluesky.testing.noseclasses import KnownFailureTest
 import os
 import signal
 import asyncio
+import gc
+import weakref
+import threading
+import warnings
 import time as ttime
+from collections import defaultdict
 
 try:
     import matplotlib.pyplot as plt
@@ -132,6 +137,43 @@ def test_pause_from_outside():
     assert_equal(RE.state, 'idle')
 
 
+def test_pause_takes_effect_before_next_msg():
+    after_pause = []
+
+    def gen():
+        yield Msg('open_run')
+        yield Msg('checkpoint')
+        yield Msg('null')
+        yield Msg('pause')
+        after_pause.append(True)
+        yield Msg('null')
+        yield Msg('close_run')
+
+    RE(gen())
+    assert_equal(RE.state, 'paused')
+    assert_equal(after_pause, [])
+    RE.resume()
+    assert_equal(RE.state, 'idle')
+    assert_equal(after_pause, [True])
+
+
+def test_loop_callbacks_run_during_fast_plan():
+    # No command in this plan awaits anything, but the RunEngine must still
+    # yield to the event loop periodically.
+    called = []
+
+    def gen():
+        yield Msg('open_run')
+        loop.call_soon(called.append, True)
+        while not called:
+            yield Msg('null')
+        yield Msg('close_run')
+
+    RE(gen())
+    assert_equal(RE.state, 'idle')
+    assert_equal(called, [True])
+
+
 def test_panic_during_pause():
     assert_equal(RE.state, 'idle')
     RE(conditional_pause(det, motor, False, True))
@@ -262,6 +304,62 @@ def test_simple_fly():
     assert mm._future.done()
 
 
+def _collect_bulk_events(plan):
+    docs = []
+
+    def f(name, doc):
+        docs.append(doc)
+
+    token = RE.subscribe('bulk_events', f)
+    try:
+        RE(plan)
+    finally:
+        RE.unsubscribe(token)
+    return docs
+
+
+def test_collect_in_chunks():
+    flyer = FlyMagic('flyer', 'theta', 'sin', 'cos', scan_points=15)
+    RE.collect_chunk_size = 4
+    try:
+        docs = _collect_bulk_events([Msg('open_run'), Msg('kickoff', flyer),
+                                     Msg('collect', flyer),
+                                     Msg('close_run')])
+    finally:
+        RE.collect_chunk_size = 1000
+    # 15 points, each yielding two events in two streams
+    assert_equal(len(docs), 8)
+    assert_true(all(sum(map(len, doc.values())) <= 4 for doc in docs))
+    seq_nums = defaultdict(list)
+    for doc in docs:
+        for descriptor, events in doc.items():
+            seq_nums[descriptor].extend(ev['seq_num'] for ev in events)
+    assert_equal(len(seq_nums), 2)
+    for descriptor_seq_nums in seq_nums.values():
+        assert_equal(descriptor_seq_nums, list(range(1, 16)))
+
+
+def test_partial_collect():
+    # The motor takes 0.05 s per step, so the flyer is partway through its
+    # 0.75 s scan when it is collected from.
+    slow_motor = Mover('slow_motor', ['slow_motor'], sleep_time=0.05)
+    mm = MockFlyer(det, slow_motor)
+    docs = _collect_bulk_events([
+        Msg('open_run'),
+        Msg('kickoff', mm, -1, 1, 15, block_group='fly'),
+        Msg('sleep', None, 0.2),
+        Msg('collect', mm, partial=True),
+        Msg('wait', None, 'fly'),
+        Msg('collect', mm),
+        Msg('close_run')])
+    # The partial collect emitted what the flyer had so far.
+    assert_equal(len(docs), 2)
+    num_partial = sum(map(len, docs[0].values()))
+    assert_true(0 < num_partial < 15)
+    events = [ev for doc in docs for evs in doc.values() for ev in evs]
+    assert_equal([ev['seq_num'] for ev in events], list(range(1, 16)))
+
+
 def test_list_of_msgs():
     # smoke tests checking that RunEngine accepts a plain list of Messages
     RE([Msg('open_run'), Msg('set', motor, 5), Msg('close_run')])
@@ -367,7 +465,6 @@ def test_pause_abort():
 
 
 def test_abort():
-    raise KnownFailureTest
     ev = asyncio.Event()
 
     def done():
@@ -385,8 +482,8 @@ def test_abort():
     RE.verbose = True
     assert_equal(RE.state, 'idle')
     start = ttime.time()
-    # loop.call_later(1, sim_kill)
-    # loop.call_later(2, done)
+    loop.call_later(1, sim_kill)
+    loop.call_later(2, done)
 
     RE(scan)
     assert_equal(RE.state, 'idle')
@@ -437,6 +534,155 @@ def test_seqnum_nonrepeated():
     assert_equal(seq_nums, [1, 2, 2, 3])
 
 
+def test_read_many():
+    lock = threading.Lock()
+    active = [0]  # reads in progress
+    max_active = [0]
+    read_kwargs = []
+
+    class SlowReader(Reader):
+        def read(self, **kwargs):
+            with lock:
+                active[0] += 1
+                max_active[0] = max(max_active[0], active[0])
+                read_kwargs.append(kwargs)
+            ttime.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return super().read()
+
+    dets = [SlowReader('det{}'.format(i), ['det{}'.format(i)])
+            for i in range(4)]
+    events = []
+    readings = []
+
+    def gen():
+        yield Msg('open_run')
+        yield Msg('create')
+        ret = yield Msg('read_many', None, dets, fast=True)
+        readings.append(ret)
+        yield Msg('save')
+        yield Msg('close_run')
+
+    RE(gen(), {'event': lambda name, doc: events.append(doc)})
+    # The reads overlapped.
+    assert_true(max_active[0] > 1)
+    assert_equal(read_kwargs, [{'fast': True}] * 4)
+    assert_equal(sorted(readings[0]), ['det0', 'det1', 'det2', 'det3'])
+    assert_equal(len(events), 1)
+    assert_equal(sorted(events[0]['data']), ['det0', 'det1', 'det2', 'det3'])
+
+
+def test_read_last():
+    m = Mover('m', ['m'])
+    m.set(1)
+    readings = []
+
+    def gen():
+        yield Msg('open_run')
+        yield Msg('create')
+        yield Msg('read', m)
+        yield Msg('save')
+        yield Msg('checkpoint')
+        m.set(2)  # behind the RunEngine's back
+        yield Msg('create')
+        readings.append((yield Msg('read_last', m)))
+        yield Msg('save')
+        yield Msg('pause')
+        yield Msg('create')
+        readings.append((yield Msg('read_last', m)))
+        yield Msg('save')
+        yield Msg('close_run')
+
+    RE(gen())
+    assert_equal(RE.state, 'paused')
+    # The reading is reused, so the move it did not see is missed.
+    assert_equal(readings[0]['m']['value'], 1)
+    m.set(3)
+    RE.resume()
+    assert_equal(RE.state, 'idle')
+    # After the pause, the object is read again.
+    assert_equal(len(readings), 2)
+    assert_equal(readings[1]['m']['value'], 3)
+
+
+def test_stats():
+    RE.clear_stats()
+    RE.record_stats = True
+    try:
+        RE(simple_scan_saving(det, motor))
+    finally:
+        RE.record_stats = False
+    stats = RE.stats
+    assert_equal(stats['commands']['set']['count'], 1)
+    # These example objects keep their names in _name.
+    assert_equal(stats['objects']['motor']['set']['count'], 1)
+    assert_in('read', stats['objects']['det'])
+    # start, descriptor, event, and stop
+    assert_equal(stats['emit']['validate']['count'], 4)
+    histogram = stats['commands']['save']['histogram']
+    assert_equal(sum(count for edge, count in histogram), 1)
+    RE.clear_stats()
+    assert_equal(RE.stats['commands'], {})
+
+
+def test_slow_commands():
+    RE.slow_commands.clear()
+    RE.slow_command_threshold = 0.1
+    try:
+        RE([Msg('null'), Msg('sleep', None, 0.2), Msg('null')])
+    finally:
+        RE.slow_command_threshold = None
+    assert_equal(len(RE.slow_commands), 1)
+    report, = RE.slow_commands
+    assert_equal(report['command'], 'sleep')
+    assert_is_none(report['obj'])
+    assert_true(report['duration'] >= 0.2)
+
+
+def test_msg_cache_size_limit():
+    def gen():
+        yield Msg('open_run')
+        yield Msg('checkpoint')
+        for i in range(5):
+            yield Msg('null')
+        yield Msg('pause')
+        yield Msg('close_run')
+
+    RE.max_msg_cache_size = 3
+    try:
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            RE(gen())
+        assert_equal(len(w), 1)
+        # The cache overflowed. The run paused, but it cannot be resumed.
+        assert_equal(RE.state, 'paused')
+        assert_raises(RuntimeError, RE.resume)
+        assert_equal(RE.state, 'paused')
+        RE.abort()
+        assert_equal(RE.state, 'idle')
+    finally:
+        RE.max_msg_cache_size = None
+
+
+def test_unwaited_sets_forgotten_at_checkpoint():
+    in_flight = []
+
+    def gen():
+        yield Msg('open_run')
+        for i in range(20):
+            yield Msg('checkpoint')
+            in_flight.append(len(RE._unwaited_msgs))
+            # This group is never waited for.
+            yield Msg('set', motor, i, block_group='A')
+        yield Msg('close_run')
+
+    RE(gen())
+    # Each set is kept through one checkpoint, in case it is waited for
+    # next, and then forgotten.
+    assert_equal(in_flight, [0] + [1] * 19)
+
+
 def test_duplicate_keys():
     # two detectors, same data keys
     det1 = SynGauss('det', motor, 'motor', center=0, Imax=1, sigma=1)
@@ -476,3 +722,122 @@ def test_illegal_sequences():
 
     with assert_raises(IllegalMessageSequence):
         RE(gen1())
+
+
+def test_describe_cache():
+    class CountingReader(Reader):
+        describe_calls = 0
+
+        def describe(self):
+            self.describe_calls += 1
+            return super().describe()
+
+    det = CountingReader('det', ['det'])
+
+    def gen():
+        yield Msg('open_run')
+        yield Msg('create')
+        yield Msg('read', det)
+        yield Msg('save')
+        yield Msg('close_run')
+
+    RE(gen())
+    RE(gen())
+    assert_equal(det.describe_calls, 1)
+    det.describe_version = 1
+    RE(gen())
+    assert_equal(det.describe_calls, 2)
+    RE.clear_describe_cache(det)
+    RE(gen())
+    assert_equal(det.describe_calls, 3)
+
+    # The cache does not keep objects alive.
+    temp = Reader('temp', ['temp'])
+    RE._cached_describe(temp)
+    temp_ref = weakref.ref(temp)
+    del temp
+    gc.collect()
+    assert_is_none(temp_ref())
+
+
+def test_concurrent_runs_on_one_loop():
+    RE1 = setup_test_run_engine()
+    RE2 = setup_test_run_engine()
+
+    def slow_count(det):
+        yield Msg('open_run')
+        for i in range(3):
+            yield Msg('create')
+            yield Msg('read', det)
+            yield Msg('save')
+            yield Msg('sleep', None, 0.2)
+        yield Msg('close_run')
+
+    events = defaultdict(list)
+
+    def collect(name, doc):
+        events[doc['descriptor']].append(doc)
+
+    unrelated = []
+
+    @asyncio.coroutine
+    def unrelated_task():
+        yield from asyncio.sleep(0.1)
+        unrelated.append(True)
+
+    det1 = Reader('det1', ['det1'])
+    det2 = Reader('det2', ['det2'])
+    start = ttime.time()
+    uids1, uids2, _ = loop.run_until_complete(asyncio.gather(
+        RE1.run(slow_count(det1), {'event': collect}),
+        RE2.run(slow_count(det2), {'event': collect}),
+        unrelated_task()))
+    # Each plan sleeps for 0.6 seconds, but they ran concurrently.
+    assert_true(ttime.time() - start < 1)
+    assert_equal(len(uids1), 1)
+    assert_equal(len(uids2), 1)
+    assert_equal(sorted(len(evs) for evs in events.values()), [3, 3])
+    assert_equal(unrelated, [True])
+    assert_equal(RE1.state, 'idle')
+    assert_equal(RE2.state, 'idle')
+
+
+def test_blocking_call_leaves_other_tasks_alone():
+    RE = setup_test_run_engine()
+    unrelated = loop.create_task(asyncio.sleep(10))
+
+    def aborted_wait():
+        yield Msg('open_run')
+        yield Msg('set', motor, 5, block_group='A')
+        yield Msg('wait_for', [never_done])
+
+    never_done = asyncio.Future(loop=loop)
+    RE(wait_one(det, motor))
+    loop.call_later(0.1, RE.abort)
+    RE(aborted_wait())
+    assert_equal(RE.state, 'idle')
+    assert_false(unrelated.done())
+    # The future passed to wait_for is not the RunEngine's to cancel.
+    assert_false(never_done.done())
+    unrelated.cancel()
+
+
+def test_call_while_paused_makes_no_task():
+    RE = setup_test_run_engine()
+
+    def paused_plan():
+        yield Msg('open_run')
+        yield Msg('checkpoint')
+        yield Msg('pause')
+        yield Msg('close_run')
+
+    RE(paused_plan())
+    assert_equal(RE.state, 'paused')
+    # Refused without running the loop, so nothing waiting on it runs.
+    ran = []
+    handle = loop.call_soon(ran.append, True)
+    assert_raises(RuntimeError, RE, paused_plan())
+    assert_equal(ran, [])
+    handle.cancel()
+    RE.abort()
+    assert_equal(RE.state, 'idle')
@@ -0,0 +1,308 @@
+import os
+import shutil
+import tempfile
+import time as ttime
+from nose.tools import assert_equal, assert_raises, assert_true
+import numpy as np
+from bluesky.examples import motor, det
+from bluesky.journal import DocumentJournal, JournalReplayer, register_journal
+from bluesky.scans import AbsScan
+from bluesky.tests.utils import setup_test_run_engine
+
+
+def _recording_replayer(directory, **kwargs):
+    inserted = []
+    inserters = {name: lambda name, doc: inserted.append((name, doc['uid']))
+                 for name in ['start', 'descriptor', 'stop']}
+
+    def bulk_insert_events(descriptor, events):
+        inserted.append(('events', [ev['seq_num'] for ev in events]))
+
+    replayer = JournalReplayer(directory, inserters, bulk_insert_events,
+                               **kwargs)
+    return replayer, inserted
+
+
+def _write_run(journal, num):
+    journal('start', {'uid': 'start'})
+    journal('descriptor', {'uid': 'desc'})
+    for i in range(num):
+        journal('event', {'uid': str(i), 'descriptor': 'desc', 'seq_num': i,
+                          'data': {'det': np.float64(i)}})
+    journal('stop', {'uid': 'stop'})
+
+
+def test_replay():
+    directory = tempfile.mkdtemp()
+    try:
+        journal = DocumentJournal(directory)
+        _write_run(journal, 5)
+        journal.close()
+
+        replayer, inserted = _recording_replayer(directory, batch_size=2)
+        assert_equal(replayer.replay(), 8)
+        assert_equal(inserted, [('start', 'start'), ('descriptor', 'desc'),
+                                ('events', [0, 1]), ('events', [2, 3]),
+                                ('events', [4]), ('stop', 'stop')])
+
+        # Nothing is shipped twice.
+        del inserted[:]
+        assert_equal(replayer.replay(), 0)
+        assert_equal(inserted, [])
+
+        # A new replayer picks up where the last one stopped.
+        journal = DocumentJournal(directory)
+        journal('start', {'uid': 'start2'})
+        journal.close()
+        replayer, inserted = _recording_replayer(directory)
+        assert_equal(replayer.replay(), 1)
+        assert_equal(inserted, [('start', 'start2')])
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_segments():
+    directory = tempfile.mkdtemp()
+    try:
+        journal = DocumentJournal(directory, segment_size=100)
+        _write_run(journal, 10)
+        journal.close()
+        assert len(os.listdir(directory)) > 1
+
+        replayer, inserted = _recording_replayer(directory)
+        assert_equal(replayer.replay(), 13)
+        seq_nums = sum((item[1] for item in inserted
+                        if item[0] == 'events'), [])
+        assert_equal(seq_nums, list(range(10)))
+        assert_equal(inserted[-1], ('stop', 'stop'))
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_incomplete_line():
+    directory = tempfile.mkdtemp()
+    try:
+        journal = DocumentJournal(directory)
+        journal('start', {'uid': 'start'})
+        # The journal is in the middle of writing a line.
+        journal._file.write('["descriptor", {"ui')
+        journal._file.flush()
+        replayer, inserted = _recording_replayer(directory)
+        assert_equal(replayer.replay(), 1)
+
+        # The rest of the line is written later.
+        journal._file.write('d": "desc"}]\n')
+        journal._file.flush()
+        assert_equal(replayer.replay(), 1)
+        assert_equal(inserted, [('start', 'start'), ('descriptor', 'desc')])
+
+        # Once no journal has the segment open, a cut-off line is skipped.
+        journal._file.write('["stop", {"ui')
+        journal.close()
+        assert_equal(replayer.replay(), 0)
+        journal = DocumentJournal(directory)
+        journal('stop', {'uid': 'stop'})
+        journal.close()
+        assert_equal(replayer.replay(), 1)
+        assert_equal(inserted[-1], ('stop', 'stop'))
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_older_segment_still_written():
+    directory = tempfile.mkdtemp()
+    try:
+        journal1 = DocumentJournal(directory)
+        journal1('start', {'uid': 'start'})
+        journal2 = DocumentJournal(directory)
+        journal2('start', {'uid': 'start2'})
+        # journal1 is in the middle of writing a line.
+        journal1._file.write('["descriptor", {"ui')
+        journal1._file.flush()
+        replayer, inserted = _recording_replayer(directory)
+        assert_equal(replayer.replay(), 2)
+
+        # The older segment is still open, so the line is finished later.
+        journal1._file.write('d": "desc"}]\n')
+        journal1('stop', {'uid': 'stop'})
+        assert_equal(replayer.replay(), 2)
+        assert_equal(inserted, [('start', 'start'), ('start', 'start2'),
+                                ('descriptor', 'desc'), ('stop', 'stop')])
+        journal1.close()
+        journal2.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_journals_racing():
+    directory = tempfile.mkdtemp()
+    try:
+        # Both journals see an empty directory, so both pick segment 1.
+        journal1 = DocumentJournal(directory)
+        journal2 = DocumentJournal(directory)
+        journal1('start', {'uid': 'start'})
+        journal2('start', {'uid': 'start2'})
+        journal2('stop', {'uid': 'stop2'})
+        journal1('stop', {'uid': 'stop'})
+        journal1.close()
+        journal2.close()
+        assert_equal(sorted(os.listdir(directory)),
+                     ['segment-00000001.jsonl', 'segment-00000002.jsonl'])
+
+        replayer, inserted = _recording_replayer(directory)
+        assert_equal(replayer.replay(), 4)
+        assert_equal(inserted, [('start', 'start'), ('stop', 'stop'),
+                                ('start', 'start2'), ('stop', 'stop2')])
+    finally:
+        shutil.rmtree(directory)
+
+
+class DuplicateError(Exception):
+    pass
+
+
+def test_duplicates():
+    directory = tempfile.mkdtemp()
+    try:
+        journal = DocumentJournal(directory)
+        _write_run(journal, 5)
+        journal.close()
+
+        # a database that refuses uids it has already stored, like
+        # metadatastore, and inserts Events in order until it does
+        stored = []
+
+        def insert(name, doc):
+            if doc['uid'] in stored:
+                raise DuplicateError()
+            stored.append(doc['uid'])
+
+        def bulk_insert_events(descriptor, events):
+            for event in events:
+                insert('event', event)
+
+        inserters = {name: insert
+                     for name in ['start', 'descriptor', 'event', 'stop']}
+        replayer = JournalReplayer(directory, inserters, bulk_insert_events,
+                                   batch_size=3,
+                                   duplicate_errors=(DuplicateError,))
+        assert_equal(replayer.replay(), 8)
+
+        # The replayer stopped before saving its progress, part of the way
+        # through a batch.
+        os.remove(os.path.join(directory, 'progress.json'))
+        stored.remove('4')
+        assert_equal(replayer.replay(), 8)
+        assert_equal(sorted(stored), sorted(['start', 'desc', 'stop'] +
+                                            [str(i) for i in range(5)]))
+        assert_equal(replayer.replay(), 0)
+
+        # Other errors are still raised.
+        replayer.duplicate_errors = ()
+        os.remove(os.path.join(directory, 'progress.json'))
+        assert_raises(DuplicateError, replayer.replay)
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_duplicate_bulk_events():
+    directory = tempfile.mkdtemp()
+    try:
+        journal = DocumentJournal(directory)
+        journal('start', {'uid': 'start'})
+        journal('descriptor', {'uid': 'desc1'})
+        journal('descriptor', {'uid': 'desc2'})
+        journal('bulk_events',
+                {desc: [{'uid': '{0}-{1}'.format(desc, i),
+                         'descriptor': desc, 'seq_num': i,
+                         'data': {'det': i}} for i in range(3)]
+                 for desc in ['desc1', 'desc2']})
+        journal('stop', {'uid': 'stop'})
+        journal.close()
+
+        stored = []
+
+        def insert(name, doc):
+            if doc['uid'] in stored:
+                raise DuplicateError()
+            stored.append(doc['uid'])
+
+        def bulk_insert_events(descriptor, events):
+            for event in events:
+                assert_equal(event['descriptor'], descriptor)
+                insert('event', event)
+
+        inserters = {name: insert
+                     for name in ['start', 'descriptor', 'event', 'stop']}
+        replayer = JournalReplayer(directory, inserters, bulk_insert_events,
+                                   batch_size=2,
+                                   duplicate_errors=(DuplicateError,))
+        assert_equal(replayer.replay(), 5)
+        events = ['{0}-{1}'.format(desc, i)
+                  for desc in ['desc1', 'desc2'] for i in range(3)]
+        assert_equal(sorted(stored),
+                     sorted(['start', 'desc1', 'desc2', 'stop'] + events))
+
+        # The replayer stopped part of the way through the bulk_events.
+        os.remove(os.path.join(directory, 'progress.json'))
+        stored.remove('desc2-2')
+        assert_equal(replayer.replay(), 5)
+        assert_equal(sorted(stored),
+                     sorted(['start', 'desc1', 'desc2', 'stop'] + events))
+        assert_equal(replayer.replay(), 0)
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_register_journal():
+    directory = tempfile.mkdtemp()
+    try:
+        RE = setup_test_run_engine()
+        journal = register_journal(RE, directory)
+        RE(AbsScan([det], motor, -1, 1, 5))
+        journal.close()
+
+        replayer, inserted = _recording_replayer(directory)
+        replayer.replay()
+        assert_equal([item[0] for item in inserted],
+                     ['start', 'descriptor', 'events', 'stop'])
+        assert_equal(inserted[2][1], [1, 2, 3, 4, 5])
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_start_stop():
+    directory = tempfile.mkdtemp()
+    try:
+        replayer, inserted = _recording_replayer(directory)
+        replayer.start(poll_interval=0.01)
+        assert_raises(RuntimeError, replayer.start)
+
+        journal = DocumentJournal(directory)
+        _write_run(journal, 2)
+        deadline = ttime.time() + 5
+        while len(inserted) < 4 and ttime.time() < deadline:
+            ttime.sleep(0.01)
+        replayer.stop()
+        journal.close()
+        assert_equal(inserted, [('start', 'start'), ('descriptor', 'desc'),
+                                ('events', [0, 1]), ('stop', 'stop')])
+
+        # Stopped, it ships nothing more.
+        journal = DocumentJournal(directory)
+        journal('start', {'uid': 'start2'})
+        journal.close()
+        ttime.sleep(0.05)
+        assert_equal(len(inserted), 4)
+        replayer.stop()  # does nothing
+
+        # It can be started again.
+        replayer.start(poll_interval=0.01)
+        deadline = ttime.time() + 5
+        while len(inserted) < 5 and ttime.time() < deadline:
+            ttime.sleep(0.01)
+        replayer.stop()
+        assert_equal(inserted[-1], ('start', 'start2'))
+        assert_true(replayer._thread is None)
+    finally:
+        shutil.rmtree(directory)
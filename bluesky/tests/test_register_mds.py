@@ -0,0 +1,116 @@
+import threading
+import time as ttime
+from nose import SkipTest
+from nose.tools import assert_equal, assert_raises
+from bluesky.run_engine import DocumentNames
+from bluesky.examples import motor, det
+from bluesky.scans import AbsScan
+from bluesky.tests.utils import setup_test_run_engine
+
+
+def _register_mds():
+    try:
+        import bluesky.register_mds as register_mds
+    except ImportError:
+        raise SkipTest
+    return register_mds
+
+
+class InsertError(Exception):
+    pass
+
+
+def _events(num, descriptors=('a',)):
+    "Events that take turns among descriptors"
+    return [{'descriptor': descriptors[i % len(descriptors)], 'seq_num': i}
+            for i in range(num)]
+
+
+def test_events_inserted_before_stop():
+    register_mds = _register_mds()
+    inserted = []
+
+    def inserter(name, doc):
+        inserted.append(name)
+
+    def bulk_insert(descriptor, events):
+        ttime.sleep(0.01)  # a slow database
+        inserted.append([ev['seq_num'] for ev in events])
+
+    inserters = {name: inserter for name in [DocumentNames.start,
+                                             DocumentNames.descriptor,
+                                             DocumentNames.stop]}
+    funcs = register_mds._buffered_insert_funcs(
+        inserters, bulk_insert, max_batch_size=3, max_delay=0.05,
+        max_queue_size=100, timeout=5)
+    RE = setup_test_run_engine()
+    for name, func in funcs.items():
+        RE._register_scan_callback(name, func)
+    RE(AbsScan([det], motor, -1, 1, 7))
+
+    assert_equal(inserted[:2], ['start', 'descriptor'])
+    assert_equal(inserted[-1], 'stop')
+    seq_nums = [seq_num for batch in inserted[2:-1] for seq_num in batch]
+    assert_equal(seq_nums, list(range(1, 8)))
+
+
+def test_order_within_descriptor():
+    register_mds = _register_mds()
+    inserted = {}
+
+    def bulk_insert(descriptor, events):
+        inserted.setdefault(descriptor, []).extend(ev['seq_num']
+                                                   for ev in events)
+
+    writer = register_mds._BufferedEventWriter(
+        bulk_insert, max_batch_size=4, max_delay=1, max_queue_size=100,
+        timeout=5)
+    for event in _events(20, descriptors=('a', 'b', 'c')):
+        writer.put('event', event)
+    writer.flush()
+    assert_equal(inserted, {'a': list(range(0, 20, 3)),
+                            'b': list(range(1, 20, 3)),
+                            'c': list(range(2, 20, 3))})
+
+
+def test_failed_insert_is_raised():
+    register_mds = _register_mds()
+
+    def bulk_insert(descriptor, events):
+        raise InsertError()
+
+    writer = register_mds._BufferedEventWriter(
+        bulk_insert, max_batch_size=10, max_delay=0.01, max_queue_size=100,
+        timeout=5)
+
+    # on the RunStop
+    writer.put('event', _events(1)[0])
+    assert_raises(InsertError, writer.flush)
+    writer.flush()  # raised only once
+
+    # on the next Event
+    writer.put('event', _events(1)[0])
+    ttime.sleep(0.2)  # The batch is inserted after max_delay.
+    assert_raises(InsertError, writer.put, 'event', _events(1)[0])
+
+
+def test_full_queue_times_out():
+    register_mds = _register_mds()
+    unblock = threading.Event()
+
+    def bulk_insert(descriptor, events):
+        unblock.wait()
+
+    writer = register_mds._BufferedEventWriter(
+        bulk_insert, max_batch_size=1, max_delay=0, max_queue_size=1,
+        timeout=0.05)
+    try:
+        writer.put('event', _events(1)[0])  # being inserted
+        ttime.sleep(0.05)
+        writer.put('event', _events(1)[0])  # fills the queue
+        # The scan does not wait for the database forever.
+        assert_raises(RuntimeError, writer.put, 'event', _events(1)[0])
+        assert_raises(RuntimeError, writer.flush)
+    finally:
+        unblock.set()
+    writer.flush()
@@ -11,7 +11,8 @@ from bluesky.scans import (AbsListScan, AbsScan, LogAbsScan,
                            OuterProductDeltaScan, InnerProductDeltaScan)
 
 from bluesky import Msg
-from bluesky.examples import motor, det, SynGauss, motor1, motor2
+from bluesky.examples import motor, det, SynGauss, motor1, motor2, Mover
+from bluesky.simulators import simulate
 from bluesky.tests.utils import setup_test_run_engine
 import asyncio
 import time as ttime
@@ -69,6 +70,29 @@ def test_outer_product_ascan_snaked():
     yield multi_traj_checker, scan, expected_data
 
 
+def test_outer_product_skips_idle_motors():
+    scan = OuterProductAbsScan([det], motor1, 1, 3, 3, motor2, 10, 20, 2,
+                               False)
+    report = simulate(scan)
+    # motor1 moves 3 times and motor2 6 times, and nothing waits in vain.
+    assert_equal(report.commands['set'], 3 + 6)
+    assert_equal(report.commands['read'], 2 * 6)
+    assert_equal(report.warnings, [])
+
+    scan.reuse_readings = True
+    report = simulate(scan)
+    assert_equal(report.commands['read'], 3 + 6)
+    assert_equal(report.commands['read_last'], 3)
+
+    events = []
+    RE(scan, subs={'event': lambda name, doc: events.append(doc)})
+    assert_equal([ev['data']['motor1'] for ev in events],
+                 [1, 1, 2, 2, 3, 3])
+    # The reused readings keep their original timestamps.
+    assert_equal(events[0]['timestamps']['motor1'],
+                 events[1]['timestamps']['motor1'])
+
+
 def test_inner_product_ascan():
     motor.set(0)
     scan = InnerProductAbsScan([det], 3, motor1, 1, 3, motor2, 10, 30)
@@ -222,6 +246,102 @@ def test_adaptive_dscan():
     assert_true(monotonic_increasing)
 
 
+def test_pipelined_scan():
+    log = []
+
+    class LoggingMover(Mover):
+        def set(self, val, **kwargs):
+            log.append(('set', val))
+            return super().set(val, **kwargs)
+
+    class LoggingGauss(SynGauss):
+        def read(self):
+            log.append(('read', self._name))
+            return super().read()
+
+    pmotor = LoggingMover('pmotor', ['pmotor'])
+    pdet = LoggingGauss('pdet', pmotor, 'pmotor', center=0, Imax=1, sigma=1)
+    scan = AbsScan([pdet], pmotor, -1, 1, 3)
+    events = []
+    RE(scan, subs={'event': lambda name, doc: events.append(doc)})
+    assert_equal(log, [('set', -1), ('read', 'pdet'), ('set', 0),
+                       ('read', 'pdet'), ('set', 1), ('read', 'pdet')])
+
+    # Opt in: the next move starts before the detector is read.
+    pmotor.pipeline_safe = True
+    pdet.pipeline_safe = True
+    log.clear()
+    events.clear()
+    RE(scan, subs={'event': lambda name, doc: events.append(doc)})
+    assert_equal(log, [('set', -1), ('set', 0), ('read', 'pdet'),
+                       ('set', 1), ('read', 'pdet'), ('read', 'pdet')])
+    # The readings are still those of their own points.
+    for ev in events:
+        expected = np.exp(-ev['data']['pmotor']**2 / 2)
+        assert_equal(ev['data']['pdet'], expected)
+
+
+def test_pipelined_scan_checks_timestamps():
+    class UnlatchedGauss(SynGauss):
+        # This detector measures when it is read, not when it is triggered,
+        # so it wrongly claims to be pipeline-safe.
+        def read(self):
+            self.trigger()
+            return super().read()
+
+    pmotor = Mover('pmotor', ['pmotor'])
+    pdet = UnlatchedGauss('pdet', pmotor, 'pmotor', center=0, Imax=1, sigma=1)
+    pmotor.pipeline_safe = True
+    pdet.pipeline_safe = True
+    events = []
+    for scan in [AbsScan([pdet], pmotor, -1, 1, 3),
+                 InnerProductAbsScan([pdet], 3, pmotor, -1, 1)]:
+        events.clear()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            RE(scan, subs={'event': lambda name, doc: events.append(doc)})
+        assert_equal(len(w), 1)
+        # The contaminated point was retaken.
+        assert_equal([ev['data']['pmotor'] for ev in events], [-1, 0, 1])
+        for ev in events:
+            expected = np.exp(-ev['data']['pmotor']**2 / 2)
+            assert_equal(ev['data']['pdet'], expected)
+
+
+def test_pipelined_scan_resumes_at_its_point():
+    pmotor = Mover('pmotor', ['pmotor'])
+    paused = []
+
+    class PausingGauss(SynGauss):
+        def read(self):
+            if not paused and pmotor.read()['pmotor']['value'] == 0:
+                # The move to the next point has started. Pause before it.
+                paused.append(True)
+                RE.request_pause(defer=True)
+            return super().read()
+
+    pdet = PausingGauss('pdet', pmotor, 'pmotor', center=0, Imax=1, sigma=1)
+    pmotor.pipeline_safe = True
+    pdet.pipeline_safe = True
+    events = []
+    RE(AbsScan([pdet], pmotor, -1, 1, 3),
+       subs={'event': lambda name, doc: events.append(doc)})
+    try:
+        assert_equal(RE.state, 'paused')
+        # Something moves the motor while the scan is paused.
+        pmotor.set(99)
+        RE.resume()
+    finally:
+        if RE.state != 'idle':
+            RE.abort()
+    assert_equal(RE.state, 'idle')
+    # The rewind sent the motor back to the point it was moving to.
+    assert_equal([ev['data']['pmotor'] for ev in events], [-1, 0, 1])
+    for ev in events:
+        expected = np.exp(-ev['data']['pmotor']**2 / 2)
+        assert_equal(ev['data']['pdet'], expected)
+
+
 def test_count():
     actual_intensity = []
     col = collector('det', actual_intensity)
@@ -0,0 +1,136 @@
+from nose.tools import (assert_equal, assert_almost_equal, assert_raises,
+                        assert_in, assert_true)
+import warnings
+from bluesky import Msg
+from bluesky.simulators import simulate, timing_model_from_stats
+from bluesky.examples import motor, det
+
+
+def test_message_counts():
+    def plan():
+        yield Msg('open_run')
+        for pos in [1, 2, 3]:
+            yield Msg('set', motor, pos, block_group='A')
+            yield Msg('wait', None, 'A')
+            yield Msg('create')
+            yield Msg('read', det)
+            yield Msg('save')
+        yield Msg('close_run')
+
+    report = simulate(plan())
+    assert_equal(report.num_messages, 17)
+    assert_equal(report.commands['set'], 3)
+    assert_equal(report.commands['read'], 3)
+    assert_equal(report.objects[('motor', 'set')], 3)
+    assert_equal(report.duration, 0)
+    assert_equal(report.warnings, [])
+
+
+def test_unnamed_objects_counted_apart():
+    class Unnamed:
+        pass
+
+    obj1, obj2 = Unnamed(), Unnamed()
+
+    def plan():
+        yield Msg('set', obj1, 1)
+        yield Msg('set', obj2, 1)
+
+    report = simulate(plan())
+    names = [name for name, command in report.objects]
+    assert_equal(len(set(names)), 2)
+    assert_true(all(name.startswith('Unnamed-') for name in names))
+
+
+def test_duration():
+    def plan():
+        yield Msg('set', motor, 1, block_group='A')
+        yield Msg('trigger', det, block_group='A')
+        yield Msg('wait', None, 'A')  # as long as the slowest: 0.5
+        yield Msg('sleep', None, 2)
+        yield Msg('trigger', det)  # not in a group: 0.1
+        yield Msg('read', det)  # 0.01
+
+    timing_model = {('set', 'motor'): 0.5, 'trigger': 0.1, 'read': 0.01}
+    report = simulate(plan(), timing_model)
+    assert_almost_equal(report.duration, 2.61)
+
+    # A callable timing model
+    report = simulate(plan(), lambda msg: 1)
+    assert_almost_equal(report.duration, 2 + 1 + 1 + 1)
+
+
+def test_unknown_model_names():
+    def plan():
+        yield Msg('set', motor, 1)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        report = simulate(plan(), {('set', 'motr'): 0.5})
+    assert_equal(report.duration, 0)
+    assert_equal(len(caught), 1)
+    assert_in("'motr'", str(caught[0].message))
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        report = simulate(plan(), {('set', 'motor'): 0.5,
+                                   ('read', 'motor'): 0.1})
+    assert_equal(report.duration, 0.5)
+    assert_equal(caught, [])
+
+
+def test_wait_group_kwarg():
+    def plan():
+        yield Msg('set', motor, 1, block_group='A')
+        yield Msg('wait', None, group='A')
+
+    report = simulate(plan(), {('set', 'motor'): 0.5})
+    assert_almost_equal(report.duration, 0.5)
+    assert_equal(report.warnings, [])
+
+
+def test_readings():
+    def plan():
+        yield Msg('set', motor, 3)
+        ret = yield Msg('read', motor)
+        assert_equal(ret['motor']['value'], 3)
+        ret = yield Msg('read_many', None, [motor, det])
+        assert_equal(set(ret), {'motor', 'det'})
+        assert_equal(ret['det']['value'], 0)
+
+    report = simulate(plan())
+    assert_equal(report.num_messages, 3)
+
+
+def test_redundant_patterns():
+    def plan():
+        yield Msg('set', motor, 1, block_group='A')
+        yield Msg('wait', None, 'A')
+        yield Msg('set', motor, 1, block_group='A')  # redundant set
+        yield Msg('wait', None, 'A')
+        yield Msg('wait', None, 'A')  # redundant wait
+        yield Msg('create')
+        yield Msg('read', det)
+        yield Msg('read', det)  # redundant read
+        yield Msg('save')
+
+    report = simulate(plan())
+    kinds = [(w['kind'], w['index']) for w in report.warnings]
+    assert_equal(kinds, [('redundant set', 2), ('redundant wait', 4),
+                         ('redundant read', 7)])
+
+
+def test_max_messages():
+    def plan():
+        while True:
+            yield Msg('null')
+
+    assert_raises(RuntimeError, simulate, plan(), max_messages=10)
+
+
+def test_timing_model_from_stats():
+    stats = {'commands': {'set': {'mean': 0.5}, 'read': {'mean': 0.1}},
+             'objects': {'motor': {'set': {'mean': 0.4}}}}
+    timing_model = timing_model_from_stats(stats)
+    assert_equal(timing_model, {'set': 0.5, 'read': 0.1,
+                                 ('set', 'motor'): 0.4})
@@ -1,5 +1,5 @@
-from nose.tools import assert_equal
-from bluesky.utils import snake_cyclers
+from nose.tools import assert_equal, assert_raises
+from bluesky.utils import snake_cyclers, Trajectory
 from cycler import cycler
 
 
@@ -75,3 +75,23 @@ def test_snake_some_snaking():
         {'x': 2, 'y': 2, 'z': 3},
         {'x': 3, 'y': 2, 'z': 3}]
     assert_equal(actual, expected)
+
+
+def test_trajectory_is_lazy_sequence():
+    traj = snake_cyclers([z, y, x], [False, True, True])
+    assert_equal(len(traj), 18)
+    assert_equal(traj.keys, {'x', 'y', 'z'})
+    assert_equal(traj[0], {'x': 1, 'y': 1, 'z': 1})
+    assert_equal(traj[4], {'x': 2, 'y': 2, 'z': 1})
+    assert_equal(traj[-1], {'x': 1, 'y': 2, 'z': 3})
+    assert_equal(traj[3:5], [{'x': 3, 'y': 2, 'z': 1},
+                             {'x': 2, 'y': 2, 'z': 1}])
+    assert_raises(IndexError, lambda: traj[18])
+
+
+def test_trajectory_keys_on_one_axis_move_together():
+    traj = Trajectory([{'x': [1, 2, 3], 'y': [4, 5, 6]}])
+    assert_equal(list(traj), [{'x': 1, 'y': 4},
+                              {'x': 2, 'y': 5},
+                              {'x': 3, 'y': 6}])
+    assert_raises(ValueError, Trajectory, [{'x': [1, 2], 'y': [1]}])
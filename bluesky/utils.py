@@ -1,6 +1,6 @@
 import signal
-import operator
-from functools import reduce
+import time as ttime
+import bisect
 from weakref import ref, WeakKeyDictionary
 import types
 from inspect import Parameter, Signature
@@ -8,14 +8,21 @@ import itertools
 from collections import Iterable
 import sys
 import numpy as np
-from cycler import cycler
 import logging
 logger = logging.getLogger(__name__)
 
 
 class SignalHandler:
-    def __init__(self, sig):
+    """
+    Context manager that intercepts a signal
+
+    By default, the first signal sets the interrupted attribute and restores
+    the original handler. If a callback is given, the handler stays in
+    place and calls it (with no arguments) on every signal instead.
+    """
+    def __init__(self, sig, callback=None):
         self.sig = sig
+        self.callback = callback
 
     def __enter__(self):
         self.interrupted = False
@@ -23,8 +30,11 @@ class SignalHandler:
         self.original_handler = signal.getsignal(self.sig)
 
         def handler(signum, frame):
-            self.release()
+            if self.callback is None:
+                self.release()
             self.interrupted = True
+            if self.callback is not None:
+                self.callback()
 
         signal.signal(self.sig, handler)
         return self
@@ -44,13 +54,22 @@ class CallbackRegistry:
     """
     See matplotlib.cbook.CallbackRegistry. This is a simplified since
     ``bluesky`` is python3.4+ only!
+
+    For fast processing, the registry keeps an immutable tuple of the
+    callbacks for each signal, which is rebuilt whenever a callback is
+    connected, disconnected, or garbage collected.
     """
-    def __init__(self, ignore_exceptions=False, allowed_sigs=None):
+    def __init__(self, ignore_exceptions=False, allowed_sigs=None,
+                 record_timing=False):
         self.ignore_exceptions = ignore_exceptions
         self.allowed_sigs = allowed_sigs
+        self.record_timing = record_timing
         self.callbacks = dict()
+        self.timings = dict()  # cid -> CallbackTiming, if record_timing
         self._cid = 0
         self._func_cid_map = {}
+        self._cid_index = {}  # cid -> (sig, proxy)
+        self._ready = {}  # sig -> tuple of (cid, function, instance weakref)
 
     def __getstate__(self):
         # We cannot currently pickle the callables in the registry, so
@@ -93,19 +112,34 @@ class CallbackRegistry:
         self._func_cid_map[sig][proxy] = cid
         self.callbacks.setdefault(sig, dict())
         self.callbacks[sig][cid] = proxy
+        self._cid_index[cid] = (sig, proxy)
+        self._rebuild(sig)
         return cid
 
+    def _rebuild(self, sig):
+        callbacks = self.callbacks.get(sig)
+        if callbacks:
+            self._ready[sig] = tuple((cid, proxy.func, proxy.inst)
+                                     for cid, proxy in callbacks.items())
+        else:
+            self._ready.pop(sig, None)
+
     def _remove_proxy(self, proxy):
         # need the list because `del self._func_cid_map[sig]` mutates the dict
         for sig, proxies in list(self._func_cid_map.items()):
             try:
-                del self.callbacks[sig][proxies[proxy]]
+                cid = proxies[proxy]
+                del self.callbacks[sig][cid]
             except KeyError:
                 pass
+            else:
+                del self._cid_index[cid]
+                self.timings.pop(cid, None)
 
-            if len(self.callbacks[sig]) == 0:
-                del self.callbacks[sig]
+            if not self.callbacks.get(sig):
+                self.callbacks.pop(sig, None)
                 del self._func_cid_map[sig]
+            self._rebuild(sig)
 
     def disconnect(self, cid):
         """Disconnect the callback registered with callback id *cid*
@@ -115,17 +149,14 @@ class CallbackRegistry:
         cid : int
             The callback index and return value from ``connect``
         """
-        for eventname, callbackd in self.callbacks.items():
-            try:
-                del callbackd[cid]
-            except KeyError:
-                continue
-            else:
-                for sig, functions in self._func_cid_map.items():
-                    for function, value in list(functions.items()):
-                        if value == cid:
-                            del functions[function]
-                return
+        try:
+            sig, proxy = self._cid_index.pop(cid)
+        except KeyError:
+            return
+        del self.callbacks[sig][cid]
+        self._func_cid_map[sig].pop(proxy, None)
+        self.timings.pop(cid, None)
+        self._rebuild(sig)
 
     def process(self, sig, *args, **kwargs):
         """Process ``sig``
@@ -139,24 +170,109 @@ class CallbackRegistry:
         args
         kwargs
         """
-        if self.allowed_sigs is not None:
-            if sig not in self.allowed_sigs:
-                raise ValueError("Allowed signals are {0}".format(
-                    self.allowed_sigs))
+        try:
+            ready = self._ready[sig]
+        except KeyError:
+            # Nothing is connected. Only now is it worth validating sig.
+            if self.allowed_sigs is not None:
+                if sig not in self.allowed_sigs:
+                    raise ValueError("Allowed signals are {0}".format(
+                        self.allowed_sigs))
+            return []
         exceptions = []
-        if sig in self.callbacks:
-            for cid, func in self.callbacks[sig].items():
-                try:
-                    func(*args, **kwargs)
-                except ReferenceError:
-                    self._remove_proxy(func)
-                except Exception as e:
-                    if self.ignore_exceptions:
-                        exceptions.append((e, sys.exc_info()[2]))
+        record_timing = self.record_timing
+        for cid, func, inst in ready:
+            try:
+                if inst is not None:
+                    # a bound method: func is unbound, inst is a weakref
+                    obj = inst()
+                    if obj is None:
+                        raise ReferenceError
+                    if record_timing:
+                        start = ttime.perf_counter()
+                        try:
+                            func(obj, *args, **kwargs)
+                        finally:
+                            self._record(cid, ttime.perf_counter() - start)
                     else:
-                        raise
+                        func(obj, *args, **kwargs)
+                elif record_timing:
+                    start = ttime.perf_counter()
+                    try:
+                        func(*args, **kwargs)
+                    finally:
+                        self._record(cid, ttime.perf_counter() - start)
+                else:
+                    func(*args, **kwargs)
+            except ReferenceError:
+                try:
+                    sig_, proxy = self._cid_index[cid]
+                except KeyError:
+                    pass  # already removed
+                else:
+                    self._remove_proxy(proxy)
+            except Exception as e:
+                if self.ignore_exceptions:
+                    exceptions.append((e, sys.exc_info()[2]))
+                else:
+                    raise
         return exceptions
 
+    def _record(self, cid, elapsed):
+        try:
+            timing = self.timings[cid]
+        except KeyError:
+            timing = self.timings[cid] = CallbackTiming()
+        timing.add(elapsed)
+
+
+class CallbackTiming:
+    "Running count, total and maximum of the time spent in one callback."
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total,
+                'mean': self.mean, 'max': self.max}
+
+
+class LatencyHistogram(CallbackTiming):
+    """
+    Running count, total and maximum of some latency, plus a histogram
+
+    The histogram counts latencies in logarithmic buckets whose upper edges
+    are 10 us, 100 us, 1 ms, 10 ms, 100 ms, 1 s, 10 s and infinity.
+    """
+    __slots__ = ('buckets',)
+    edges = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1, 10)
+
+    def __init__(self):
+        super().__init__()
+        self.buckets = [0] * (len(self.edges) + 1)
+
+    def add(self, elapsed):
+        super().add(elapsed)
+        self.buckets[bisect.bisect_left(self.edges, elapsed)] += 1
+
+    def to_dict(self):
+        d = super().to_dict()
+        d['histogram'] = list(zip(self.edges + (float('inf'),), self.buckets))
+        return d
+
 
 class _BoundMethodProxy:
     '''
@@ -319,7 +435,7 @@ class ExtendedList(list):
         super().remove(value)
 
 
-SUBS_NAMES = ['all', 'start', 'stop', 'event', 'descriptor']
+SUBS_NAMES = ['all', 'start', 'stop', 'event', 'descriptor', 'event_page']
 
 
 def normalize_subs_input(subs):
@@ -341,6 +457,47 @@ def normalize_subs_input(subs):
                          "names to lists of callables.")
 
 
+def unpack_event_page(page):
+    """
+    Yield the Events in an Event Page, one dict per Event.
+
+    Parameters
+    ----------
+    page : dict
+        an 'event_page' document
+
+    Yields
+    ------
+    event : dict
+        an 'event' document
+    """
+    descriptor = page['descriptor']
+    data = page['data']
+    timestamps = page['timestamps']
+    for i, (uid, time, seq_num) in enumerate(zip(page['uid'], page['time'],
+                                                  page['seq_num'])):
+        yield dict(descriptor=descriptor, uid=uid, time=time,
+                   seq_num=seq_num,
+                   data={k: v[i] for k, v in data.items()},
+                   timestamps={k: v[i] for k, v in timestamps.items()})
+
+
+def object_name(obj):
+    """
+    The name of obj or, if it has none, its type name and id.
+
+    This identifies objects in statistics and timing models. The name is
+    the ``name`` attribute of obj or, failing that, its ``_name`` attribute
+    (as the objects in bluesky.examples have), and it is the same from one
+    session to the next. The fallback, such as 'Mover-7f3a...', only tells
+    apart the objects alive in this session.
+    """
+    name = getattr(obj, 'name', None) or getattr(obj, '_name', None)
+    if name:
+        return name
+    return '{0}-{1:x}'.format(type(obj).__name__, id(obj))
+
+
 class DefaultSubs:
     """a class-level descriptor"""
     def __init__(self, default):
@@ -366,6 +523,95 @@ class Subs:
         self.data[instance] = normalize_subs_input(value)
 
 
+class Trajectory:
+    """
+    A lazy sequence of points on a mesh, optionally 'snaking' back and forth
+
+    Each point is computed on demand from the positions along each axis, so
+    memory use and construction time do not depend on the number of points.
+
+    Parameters
+    ----------
+    axes : list
+        a list of dicts, slowest axis first, each mapping keys (e.g., motors)
+        to a 1D array of positions. Keys on the same axis move together, so
+        their arrays must have the same length.
+    snake_booleans : list, optional
+        a list of the same length as axes indicating whether each axis should
+        'snake' (True) or not (False). Note that the first boolean does not
+        make a difference because the first (slowest) axis does not repeat.
+        By default, no axis snakes.
+
+    Examples
+    --------
+    >>> traj = Trajectory([{'y': [1, 2]}, {'x': [1, 2, 3]}], [False, True])
+    >>> len(traj)
+    6
+    >>> traj[3]
+    {'y': 2, 'x': 3}
+    """
+    def __init__(self, axes, snake_booleans=None):
+        if snake_booleans is None:
+            snake_booleans = [False] * len(axes)
+        if len(axes) != len(snake_booleans):
+            raise ValueError("number of axes does not match number of "
+                             "booleans")
+        self._axes = []
+        for axis in axes:
+            columns = [(k, np.asarray(v)) for k, v in axis.items()]
+            lengths = set(len(v) for k, v in columns)
+            if len(lengths) != 1:
+                raise ValueError("positions on the same axis must have the "
+                                 "same length")
+            self._axes.append((columns, lengths.pop()))
+        self._snake = [bool(snake) for snake in snake_booleans]
+        # the number of points between steps of each axis
+        self._strides = []
+        stride = 1
+        for columns, length in reversed(self._axes):
+            self._strides.insert(0, stride)
+            stride *= length
+        self._len = stride if self._axes else 0
+
+    @property
+    def keys(self):
+        return set(k for columns, length in self._axes for k, v in columns)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._point(i) for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("Trajectory index out of range")
+        return self._point(index)
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self._point(i)
+
+    def _point(self, n):
+        point = {}
+        for (columns, length), stride, snake in zip(self._axes, self._strides,
+                                                     self._snake):
+            sweep, i = divmod(n // stride, length)
+            if snake and sweep % 2:
+                # Odd sweeps run backward.
+                i = length - 1 - i
+            for k, v in columns:
+                point[k] = v[i]
+        return point
+
+    def __repr__(self):
+        return '{0}({1!r}, {2!r})'.format(
+            type(self).__name__,
+            [{k: v for k, v in columns} for columns, length in self._axes],
+            self._snake)
+
+
 def snake_cyclers(cyclers, snake_booleans):
     """
     Combine cyclers with a 'snaking' back-and-forth order.
@@ -382,22 +628,9 @@ def snake_cyclers(cyclers, snake_booleans):
 
     Returns
     -------
-    result : cycler
+    result : Trajectory
+        a lazy sequence of points, which can be iterated over like a cycler
     """
     if len(cyclers) != len(snake_booleans):
         raise ValueError("number of cyclers does not match number of booleans")
-    lengths = []
-    new_cyclers = []
-    for c in cyclers:
-        lengths.append(len(c))
-    total_length = np.product(lengths)
-    for i, (c, snake) in enumerate(zip(cyclers, snake_booleans)):
-        num_tiles = np.product(lengths[:i])
-        num_repeats = np.product(lengths[i+1:])
-        for k, v in c._transpose().items():
-            if snake:
-                v = v + v[::-1]
-            v2 = np.tile(np.repeat(v, num_repeats), num_tiles)
-            expanded = v2[:total_length]
-            new_cyclers.append(cycler(k, expanded))
-    return reduce(operator.add, new_cyclers)
+    return Trajectory([c._transpose() for c in cyclers], snake_booleans)